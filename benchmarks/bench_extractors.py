@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+# bench_extractors
+# author: krunch3r (KJM github.com/krunch3r76)
+# license: General Poetic License (GPL3)
+
+"""
+measure the throughput of each randomness extractor in MB/s of input consumed
+
+usage: python3 benchmarks/bench_extractors.py [--book-mib 8] [--width 5] [--repeat 3]
+
+the byte loop interleaver is included as the yardstick the extractors should stay
+cheap against
+"""
+
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+
+sys.path.append(str(Path(os.path.dirname(__file__)).resolve().parents[0]))
+from entropythief import extractors
+from entropythief import interleave
+
+
+def _best_time(fn, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--book-mib", type=int, default=8, help="size of the book extracted in MiB")
+    parser.add_argument("--width", type=int, default=5, help="providers interleaved into the book")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per extractor, best is kept")
+    args = parser.parse_args()
+
+    book = os.urandom(args.book_mib * 2**20)
+    book_mb = len(book) / 1e6
+    print(f"book: {len(book):,} bytes from {args.width} providers, best of {args.repeat}")
+    print(f"{'stage':>24} {'ratio':>7} {'MB/s in':>10}")
+
+    configurations = [
+        ("xorfold", extractors.XorFoldExtractor()),
+        ("xorfold ratio=0.5", extractors.XorFoldExtractor(ratio=0.5)),
+    ]
+    if extractors.numpy is not None:
+        configurations += [
+            ("toeplitz ratio=0.5", extractors.ToeplitzExtractor(ratio=0.5)),
+            ("toeplitz ratio=0.25", extractors.ToeplitzExtractor(ratio=0.25)),
+        ]
+    else:
+        print("numpy is not installed, skipping toeplitz")
+
+    for label, extractor in configurations:
+        elapsed = _best_time(lambda: extractor.extract(book, args.width), args.repeat)
+        ratio = extractor.ratio or 1 / args.width
+        print(f"{label:>24} {ratio:>7.3f} {book_mb / elapsed:>10.1f}")
+
+    # the original byte loop over a sample of the book, for scale
+    sample = [book[i * 2**16 : (i + 1) * 2**16] for i in range(args.width)]
+    elapsed = _best_time(lambda: interleave.interleave_loop(sample), 1)
+    print(f"{'byte loop interleave':>24} {'':>7} {len(sample) * 2**16 / 1e6 / elapsed:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+# bench_granularity
+# author: krunch3r (KJM github.com/krunch3r76)
+# license: General Poetic License (GPL3)
+
+"""
+measure the throughput of each interleave granularity for every engine
+
+usage: python3 benchmarks/bench_granularity.py [--page-kib 256] [--sources 5] [--repeat 3]
+
+every engine is checked against the loop engine on a short sample of the pages first.
+the loop engine is only timed at byte granularity and on the sample, for scale, since
+at bit granularity it would take minutes
+"""
+
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+
+sys.path.append(str(Path(os.path.dirname(__file__)).resolve().parents[0]))
+from entropythief import interleave
+
+_kSAMPLE_SIZE = 8192  # bytes per page compared against the loop engine
+
+
+def _best_time(engine, pages, bits, repeat):
+    """return the best time of repeat runs"""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        engine(pages, bits)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--page-kib", type=int, default=256, help="bytes per source page in KiB")
+    parser.add_argument("--sources", type=int, default=5, help="pages interleaved into each book")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per engine, best is kept")
+    args = parser.parse_args()
+
+    page_size = args.page_kib * 1024
+    pages = [os.urandom(page_size) for _ in range(args.sources)]
+    sample = [page[:_kSAMPLE_SIZE] for page in pages]
+    total_mb = page_size * args.sources / 1e6
+    print(f"page size: {page_size:,} bytes x {args.sources} sources, best of {args.repeat}")
+    print(f"{'granularity':>12} {'engine':>8} {'MB/s':>10} {'vs byte':>9}")
+    rates = {}
+    for granularity, bits in interleave.GRANULARITIES.items():
+        reference = interleave.interleave_loop(sample, bits)
+        for name, engine in interleave.ENGINES.items():
+            if name == "loop" or (bits == 1 and name == "strided"):
+                continue
+            if bytes(engine(sample, bits)) != reference:
+                raise SystemExit(f"engine {name} changed the {granularity} order")
+            rates[granularity, name] = total_mb / _best_time(engine, pages, bits, args.repeat)
+    # the original byte loop, timed on the sample only, for scale
+    start = time.perf_counter()
+    interleave.interleave_loop(sample)
+    loop_rate = len(sample) * _kSAMPLE_SIZE / 1e6 / (time.perf_counter() - start)
+    print(f"{'byte':>12} {'loop':>8} {loop_rate:>10.1f}")
+    for (granularity, name), rate in rates.items():
+        print(f"{granularity:>12} {name:>8} {rate:>10.1f} {rate / rates['byte', name]:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+# bench_interleave
+# author: krunch3r (KJM github.com/krunch3r76)
+# license: General Poetic License (GPL3)
+
+"""
+measure the throughput of each interleave engine against the original byte loop
+
+usage: python3 benchmarks/bench_interleave.py [--page-kib 256] [--repeat 3]
+
+the same random pages are given to every engine and each result is checked against
+the loop engine so that a faster engine can never silently change the byte order
+"""
+
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+
+sys.path.append(str(Path(os.path.dirname(__file__)).resolve().parents[0]))
+from entropythief import interleave
+
+SOURCE_COUNTS = (2, 5, 13)
+
+
+def _time_engine(engine, pages, repeat):
+    """return the best time of repeat runs and the last book produced"""
+    best = float("inf")
+    book = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        book = engine(pages)
+        best = min(best, time.perf_counter() - start)
+    return best, book
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--page-kib", type=int, default=256, help="bytes per source page in KiB")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per engine, best is kept")
+    args = parser.parse_args()
+
+    page_size = args.page_kib * 1024
+    print(f"page size: {page_size:,} bytes per source, best of {args.repeat}")
+    print(f"{'sources':>8} {'engine':>8} {'MB/s':>10} {'speedup':>9}")
+    for count in SOURCE_COUNTS:
+        pages = [os.urandom(page_size) for _ in range(count)]
+        total_mb = page_size * count / 1e6
+        reference_time, reference_book = _time_engine(interleave.interleave_loop, pages, 1)
+        print(f"{count:>8} {'loop':>8} {total_mb / reference_time:>10.1f} {1.0:>8.1f}x")
+        for name, engine in interleave.ENGINES.items():
+            if name == "loop":
+                continue
+            elapsed, book = _time_engine(engine, pages, args.repeat)
+            if bytes(book) != reference_book:
+                raise SystemExit(f"engine {name} changed the byte order")
+            print(
+                f"{count:>8} {name:>8} {total_mb / elapsed:>10.1f}"
+                f" {reference_time / elapsed:>8.1f}x"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+# bench_loop_lag
+# author: krunch3r (KJM github.com/krunch3r76)
+# license: General Poetic License (GPL3)
+
+"""
+measure how long the Interleaver holds up the event loop while reading result files
+
+usage: python3 benchmarks/bench_loop_lag.py [--sources 4] [--mib 64] [--dir /var/tmp]
+
+the result files are dropped from the page cache before each run so that pages come
+from the disk, as they do for results downloaded a while before they are interleaved.
+a ticker coroutine asks to wake every millisecond and records how late it woke; the
+late wake ups are the lag every other coroutine (yapapi, the controller) would see.
+
+the output is written to /tmp/pilferedbits and drained by a thread, so do not run this
+while entropythief is running
+"""
+
+import argparse
+import asyncio
+import fcntl
+import os
+import statistics
+import sys
+import threading
+import time
+import uuid
+from pathlib import Path
+
+sys.path.append(str(Path(os.path.dirname(__file__)).resolve().parents[0]))
+from entropythief.TaskResultWriter import Interleaver
+
+_kFIFO = "/tmp/pilferedbits"
+_kTICK = 0.001
+
+CASES = (
+    ("read on loop", dict(mapped_sources=False, read_workers=0)),
+    ("read workers", dict(mapped_sources=False, read_workers=2)),
+    ("mapped", dict(mapped_sources=True, read_workers=0)),
+    ("mapped + ahead", dict(mapped_sources=True, read_workers=2)),
+)
+
+
+def _make_results(directory, count, size):
+    """write count result files of size random bytes and evict them from the page cache"""
+    paths = []
+    for _ in range(count):
+        path = os.path.join(directory, str(uuid.uuid4()))
+        with open(path, "wb") as file:
+            for _ in range(size // 2**20):
+                file.write(os.urandom(2**20))
+            file.flush()
+            os.fsync(file.fileno())
+            os.posix_fadvise(file.fileno(), 0, 0, os.POSIX_FADV_DONTNEED)
+        paths.append(path)
+    return paths
+
+
+def _drain(stop):
+    """read the named pipe until stopped so the writer never backs up"""
+    fd = os.open(_kFIFO, os.O_RDONLY | os.O_NONBLOCK)
+    fcntl.fcntl(fd, fcntl.F_SETFL, fcntl.fcntl(fd, fcntl.F_GETFL) & ~os.O_NONBLOCK)
+    try:
+        while not stop.is_set():
+            if len(os.read(fd, 2**20)) == 0:
+                time.sleep(_kTICK)  # no writer yet
+    finally:
+        os.close(fd)
+
+
+async def _run(paths, expected, kwargs):
+    """interleave the results, returning the lag of every tick and the elapsed time"""
+    to_ctl_q = asyncio.Queue()
+    interleaver = Interleaver(to_ctl_q, **kwargs)
+    for path in paths:
+        interleaver.add_result_file(path)
+    interleaver.commit_added_result_files()
+
+    lags = []
+    written = 0
+    start = time.perf_counter()
+    refresh = asyncio.create_task(interleaver.refresh())
+    while written < expected:
+        tick = time.perf_counter()
+        await asyncio.sleep(_kTICK)
+        lags.append(time.perf_counter() - tick - _kTICK)
+        while not to_ctl_q.empty():
+            msg = to_ctl_q.get_nowait()
+            if msg.get("cmd") == "add_bytes":
+                written += len(msg["hex"])
+    elapsed = time.perf_counter() - start
+    refresh.cancel()
+    del interleaver
+    return lags, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sources", type=int, default=4, help="result files interleaved")
+    parser.add_argument("--mib", type=int, default=64, help="size of each result file in MiB")
+    parser.add_argument("--dir", default="/var/tmp", help="disk backed directory for the results")
+    args = parser.parse_args()
+
+    if not os.path.exists(_kFIFO):
+        os.mkfifo(_kFIFO)
+    stop = threading.Event()
+    drainer = threading.Thread(target=_drain, args=(stop,), daemon=True)
+    drainer.start()
+
+    size = args.mib * 2**20
+    print(f"{args.sources} results of {args.mib} MiB from {args.dir}, tick {_kTICK * 1e3:.0f} ms")
+    print(f"{'case':>16} {'max ms':>8} {'p99 ms':>8} {'mean ms':>8} {'MB/s':>8}")
+    stderr = sys.stderr
+    try:
+        for name, kwargs in CASES:
+            paths = _make_results(args.dir, args.sources, size)
+            sys.stderr = open(os.devnull, "w")  # the writers are chatty on stderr
+            try:
+                lags, elapsed = asyncio.run(_run(paths, size * args.sources, kwargs))
+            finally:
+                sys.stderr.close()
+                sys.stderr = stderr
+            lags.sort()
+            print(
+                f"{name:>16} {lags[-1] * 1e3:>8.2f} {lags[int(len(lags) * 0.99)] * 1e3:>8.2f}"
+                f" {statistics.mean(lags) * 1e3:>8.2f} {size * args.sources / 1e6 / elapsed:>8.1f}"
+            )
+    finally:
+        stop.set()
+
+
+if __name__ == "__main__":
+    main()
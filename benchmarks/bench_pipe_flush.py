@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+# bench_pipe_flush
+# author: krunch3r (KJM github.com/krunch3r76)
+# license: General Poetic License (GPL3)
+
+"""
+measure the throughput of the writev and vmsplice flush paths of the PipeWriter
+
+usage: python3 benchmarks/bench_pipe_flush.py [--book-mib 8] [--books 32] [--repeat 3]
+
+books are written to a named pipe drained by a reader process, so the writer's copies
+are the only ones measured alongside the reader's. the bytes read are compared against
+the bytes written on the first run of each path, which is not timed
+"""
+
+import argparse
+import asyncio
+import hashlib
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.append(str(Path(os.path.dirname(__file__)).resolve().parents[0]))
+from entropythief import pipe_writer
+
+CASES = (
+    ("writev", pipe_writer.PipeWriter, {}),
+    ("vmsplice", pipe_writer.VmsplicePipeWriter, {}),
+    ("vmsplice gift", pipe_writer.VmsplicePipeWriter, dict(gift=True)),
+)
+
+
+def _drain(path, expected, digests, verify):
+    """read expected bytes from the named pipe, reporting their md5 when verifying"""
+    digest = hashlib.md5()
+    read = 0
+    with open(path, "rb", buffering=0) as fifo:
+        while read < expected:
+            chunk = fifo.read(2**20)
+            if not chunk:
+                break
+            if verify:
+                digest.update(chunk)
+            read += len(chunk)
+    digests.put(digest.hexdigest())
+
+
+async def _run(path, writer_class, kwargs, book, books):
+    """write books copies of book, returning the seconds until the writer has flushed them"""
+    writer = writer_class(path, **kwargs)
+    while writer._whether_pipe_is_broken():  # the reader is still opening its end
+        await asyncio.sleep(0.001)
+        writer._open_pipe()
+    start = time.perf_counter()
+    for _ in range(books):
+        await writer.write(book)
+        while writer._count_bytes_in_internal_buffers() > 0:
+            if await writer._flush_buffers() == 0:
+                await asyncio.sleep(0)
+    elapsed = time.perf_counter() - start
+    # let the reader finish before the write end closes
+    while writer._count_bytes_in_pipe() > 0:
+        await asyncio.sleep(0.001)
+    del writer
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--book-mib", type=int, default=8, help="size of each book written in MiB")
+    parser.add_argument("--books", type=int, default=32, help="books written per run")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per path, best is kept")
+    args = parser.parse_args()
+
+    book = os.urandom(args.book_mib * 2**20)
+    digest = hashlib.md5()
+    for _ in range(args.books):
+        digest.update(book)
+    expected = digest.hexdigest()
+    total = len(book) * args.books
+    path = os.path.join(tempfile.mkdtemp(), "bench_pipe_flush")
+    os.mkfifo(path)
+    digests = multiprocessing.Queue()
+
+    print(f"{args.books} books of {args.book_mib} MiB, best of {args.repeat}")
+    print(f"{'path':>14} {'MB/s':>10}")
+    stderr = sys.stderr
+    try:
+        for name, writer_class, kwargs in CASES:
+            best = float("inf")
+            for run in range(args.repeat + 1):
+                reader = multiprocessing.Process(target=_drain, args=(path, total, digests, run == 0))
+                reader.start()
+                sys.stderr = open(os.devnull, "w")  # the writers are chatty on stderr
+                try:
+                    elapsed = asyncio.run(_run(path, writer_class, kwargs, book, args.books))
+                finally:
+                    sys.stderr.close()
+                    sys.stderr = stderr
+                reader.join()
+                if run == 0 and digests.get() != expected:
+                    raise SystemExit(f"{name} changed the bytes")
+                elif run > 0:
+                    digests.get()
+                    best = min(best, elapsed)
+            print(f"{name:>14} {total / 1e6 / best:>10.1f}")
+    finally:
+        os.unlink(path)
+        os.rmdir(os.path.dirname(path))
+
+
+if __name__ == "__main__":
+    main()
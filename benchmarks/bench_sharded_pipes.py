@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+# bench_sharded_pipes
+# author: krunch3r (KJM github.com/krunch3r76)
+# license: General Poetic License (GPL3)
+
+"""
+measure the throughput of a ring of K named pipes against a single named pipe
+
+usage: python3 benchmarks/bench_sharded_pipes.py [--shards 1,2,4,8] [--mib 512] [--read-kib 1024] [--repeat 3]
+
+a single pipe is written by a PipeWriter and read by a PipeReader, a ring by a
+ShardedPipeWriter and a PipeReader(shards=K) in another process. the time is taken from
+the first book written until the reader has read every byte, and the capacity is what
+the pipes hold between them
+"""
+
+import argparse
+import asyncio
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.append(str(Path(os.path.dirname(__file__)).resolve().parents[0]))
+sys.path.append(str(Path(os.path.dirname(__file__)).resolve().parents[0] / "readers"))
+from entropythief import pipe_writer
+from pipe_reader import PipeReader
+
+
+def _drain(path, shards, expected, read_size, done):
+    """read expected bytes from the pipe or ring of pipes, reporting the count read"""
+    reader = PipeReader(namedPipeFilePathString=path, shards=shards or None, max_read_size=read_size)
+    read = 0
+    while read < expected:
+        read += len(reader.read(min(read_size, expected - read)))
+    done.put(read)
+
+
+async def _until_writable(writer):
+    """wait for a pipe holding bytes back to take more, as the TaskResultWriter does"""
+    writable = asyncio.Event()
+    if writer.when_writable(writable.set):
+        await writable.wait()
+    else:
+        await asyncio.sleep(0.001)
+
+
+async def _run(path, shards, book, books, done):
+    """write books copies of book, returning the seconds until they are read and the capacity"""
+    if shards:
+        writer = pipe_writer.ShardedPipeWriter(path, shards=shards)
+        pipes = writer._shards
+    else:
+        writer = pipe_writer.PipeWriter(path)
+        pipes = [writer]
+    while any(pipe._whether_pipe_is_broken() for pipe in pipes):  # the reader is still opening
+        await asyncio.sleep(0.001)
+        for pipe in pipes:
+            pipe._open_pipe()
+    capacity = sum(pipe.named_pipe_system_capacity for pipe in pipes)
+    loop = asyncio.get_running_loop()
+    start = time.perf_counter()
+    for _ in range(books):
+        await writer.write(book)
+        while writer._count_bytes_in_internal_buffers() > len(book):
+            await _until_writable(writer)
+            await writer.refresh()
+    while writer._count_bytes_in_internal_buffers() > 0:
+        await _until_writable(writer)
+        await writer.refresh()
+    read = await loop.run_in_executor(None, done.get)
+    elapsed = time.perf_counter() - start
+    del writer
+    if read != len(book) * books:
+        raise SystemExit(f"read {read} bytes of {len(book) * books}")
+    return elapsed, capacity
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--shards", default="1,2,4,8", help="ring sizes to measure, comma separated")
+    parser.add_argument("--mib", type=int, default=512, help="MiB written per run")
+    parser.add_argument("--book-mib", type=int, default=4, help="size of each book written in MiB")
+    parser.add_argument("--read-kib", type=int, default=1024, help="size of each read in KiB")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per ring size, best is kept")
+    args = parser.parse_args()
+
+    book = os.urandom(args.book_mib * 2**20)
+    books = args.mib // args.book_mib
+    total = len(book) * books
+    directory = tempfile.mkdtemp()
+    path = os.path.join(directory, "bench_sharded_pipes")
+    done = multiprocessing.Queue()
+
+    print(f"{args.mib} MiB in books of {args.book_mib} MiB, reads of {args.read_kib} KiB, best of {args.repeat}")
+    print(f"{'pipes':>12} {'capacity KiB':>14} {'MB/s':>10}")
+    stderr = sys.stderr
+    cases = [("single", 0)] + [(f"ring of {k}", k) for k in map(int, args.shards.split(","))]
+    try:
+        for name, shards in cases:
+            best = float("inf")
+            for _ in range(args.repeat):
+                reader = multiprocessing.Process(
+                    target=_drain, args=(path, shards, total, args.read_kib * 1024, done)
+                )
+                reader.start()
+                sys.stderr = open(os.devnull, "w")  # the writers are chatty on stderr
+                try:
+                    elapsed, capacity = asyncio.run(_run(path, shards, book, books, done))
+                finally:
+                    sys.stderr.close()
+                    sys.stderr = stderr
+                reader.join()
+                best = min(best, elapsed)
+            print(f"{name:>12} {capacity // 1024:>14} {total / 1e6 / best:>10.1f}")
+    finally:
+        for entry in os.listdir(directory):
+            os.unlink(os.path.join(directory, entry))
+        os.rmdir(directory)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,14 +1,23 @@
 import os
 import io
+import mmap
 import asyncio
 import concurrent.futures
 import functools
+import collections
+import time
+import math
 
 from . import pipe_writer
-import sys  # for output to sys.stderr
+from . import interleave
+from .group_scheduler import GroupScheduler
+from .staging import StagingArea
+from . import ringlog
 
 from abc import ABC, abstractmethod
 
+_log = ringlog.Logger("TaskResultWriter")  # to stderr, which the controller sends to a file
+
 
 ###################################
 # TaskResultWriter{}              #
@@ -17,51 +26,158 @@ class TaskResultWriter(ABC):
     """interfaces with pipe_writer module or derivative to communicate the results of a finished task externally"""
 
     _bytesSeen = 0
+    _bytesRecovered = 0  # bytes past the end of a group carried into a later group
+    _bytesDiscarded = 0  # bytes purchased but deleted unread
     _writerPipe = None
+    _reservoir = None
+    staging = None  # where results are downloaded to, see model.steps
+    _kRESERVOIR_LOW_WATER = 2097152  # writer backlog beneath which the reservoir is drained
+    _kIDLE_TIMEOUT = 0.1  # longest wait for work, bounding how late a new reader is noticed
+    _wakeup = None  # asyncio.Event ending a wait for work
     to_ctl_q = None
 
-    def __init__(self, to_ctl_q, writer=pipe_writer.PipeWriter, target_capacity=None):
+    def __init__(
+        self,
+        to_ctl_q,
+        writer=pipe_writer.PipeWriter,
+        target_capacity=None,
+        reservoir=None,
+        staging=None,
+    ):
         """initialize TaskResultWriter with a message queue to the controller and a pipe writer
         
         Args:
             to_ctl_q: Queue to send messages to controller
-            writer: PipeWriter class to use
+            writer: PipeWriter class (or callable returning a writer) to use
             target_capacity: Target capacity limit - for controller tracking only
+            reservoir: optional reservoir.EntropyReservoir holding what the writer cannot take
+                       right away, and what is left of it from the previous run
+            staging: staging.StagingArea results are downloaded to, by default the temporary
+                     directory
         """
         self.to_ctl_q = to_ctl_q
         self.target_capacity = target_capacity
+        self._reservoir = reservoir
+        self.staging = staging if staging is not None else StagingArea()
         
         # Create PipeWriter without capacity limits - let data flow freely
         self._writerPipe = writer()
 
+    def _writer_backlog(self):
+        """bytes the pipe writer holds internally because the pipe could not take them yet"""
+        count_internal = getattr(self._writerPipe, "_count_bytes_in_internal_buffers", None)
+        return count_internal() if count_internal else 0
+
     async def _write_to_pipe(self, data):
-        """writes data to the pipe"""
+        """writes data to the pipe, by way of the reservoir while the writer is backed up"""
         # TRACKING: Log data being sent to PipeWriter
         data_size = len(data) if data else 0
-        print(f"DEBUG: TaskResultWriter._write_to_pipe: Sending {data_size:,} bytes to PipeWriter", file=sys.stderr)
+        reserved = 0
+        if self._reservoir is not None and (
+            len(self._reservoir) > 0 or self._writer_backlog() >= self._kRESERVOIR_LOW_WATER
+        ):
+            # queue behind what is already reserved, overflowing to the writer only when full
+            reserved = self._reservoir.put(data)
+            if reserved == data_size:
+                return reserved
+            data = data[reserved:]
+        _log.log(3, "TaskResultWriter._write_to_pipe: Sending {:,} bytes to PipeWriter", len(data))
         written = await self._writerPipe.write(data)
-        print(f"DEBUG: TaskResultWriter._write_to_pipe: PipeWriter accepted {written:,} bytes", file=sys.stderr)
-        return written
+        _log.log(3, "TaskResultWriter._write_to_pipe: PipeWriter accepted {:,} bytes", written)
+        return reserved + written
+
+    async def _refresh_writer(self):
+        """tops off the writer from the reservoir then flushes it
+
+        the reservoir is synced to disk once per refresh, off the event loop, journaling the
+        books put since the last refresh and what is taken here before it is handed out
+        """
+        if self._reservoir is not None:
+            taken = b""
+            if len(self._reservoir) > 0 and self._writer_backlog() < self._kRESERVOIR_LOW_WATER:
+                taken = self._reservoir.take(self._kRESERVOIR_LOW_WATER)
+            if self._reservoir.dirty():
+                await asyncio.get_running_loop().run_in_executor(None, self._reservoir.sync)
+            if len(taken) > 0:
+                await self._writerPipe.write(taken)
+        await self._writerPipe.refresh()
 
     def __len__(self):
-        """Return the number of bytes currently buffered in the writer."""
-        return self._writerPipe.len()
+        """Return the number of bytes currently buffered in the writer and the reservoir."""
+        reserved = len(self._reservoir) if self._reservoir is not None else 0
+        return self._writerPipe.len() + reserved
 
     def update_capacity(self, new_capacity):
         """Update the target capacity for controller tracking only"""
-        print(f"DEBUG: TaskResultWriter.update_capacity called with {new_capacity:,} bytes (tracking only)", file=sys.stderr)
+        _log.log(2, "TaskResultWriter.update_capacity called with {:,} bytes (tracking only)", new_capacity)
         self.target_capacity = new_capacity
         # Note: PipeWriter has no capacity enforcement - data flows freely
 
+    def _wake(self):
+        """end any wait for work, e.g. because results were committed"""
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    async def _wait_for_work(self, holding=False):
+        """sleep until the pipe has room for bytes held for it or until woken
+
+        while the writer (or the caller, when holding) has bytes the pipe could not take,
+        the pipe is watched by the event loop and the wait ends as soon as the kernel reports
+        room. with nothing to write, the wait lasts until results are committed or at most
+        _kIDLE_TIMEOUT, so an idle writer makes no system calls in between. a pipe without a
+        reader, or a writer that cannot be watched, is polled every 2ms as before
+        """
+        if self._wakeup is None:
+            self._wakeup = asyncio.Event()
+        self._wakeup.clear()
+        if holding or self._writer_backlog() > 0:
+            when_writable = getattr(self._writerPipe, "when_writable", None)
+            if when_writable is None or not when_writable(self._wakeup.set):
+                await asyncio.sleep(0.002)  # no reader yet, or nothing to watch
+                return
+        try:
+            await asyncio.wait_for(self._wakeup.wait(), self._kIDLE_TIMEOUT)
+        except asyncio.TimeoutError:
+            pass
+
     # the inheritor may wish to write processed data first then calling this as a super
     async def refresh(self):
         """flushes the pipe writer in an asynchronous loop"""
         # since the PipeWriter object must be manually refreshed regularly
         while True:
-            await self._writerPipe.refresh()
+            await self._refresh_writer()
             # await self._flush_pipe()
-            print("refresh", file=sys.stderr)
-            await asyncio.sleep(0.002)  # 2ms for responsive UI (was 0.01 = 10ms)
+            await self._wait_for_work()
+
+    def get_tail_stats(self):
+        """reports what became of the bytes that did not fit within their group"""
+        return {
+            "bytes_seen": self._bytesSeen,
+            "bytes_recovered": self._bytesRecovered,
+            "bytes_discarded": self._bytesDiscarded,
+            "bytes_pooled": 0,
+        }
+
+    def get_queue_stats(self):
+        """reports the results waiting to be written"""
+        return {}
+
+    def get_flow_estimates(self):
+        """reports how fast readers drain the writer and when what is buffered runs out
+
+        see pipe_writer.PipeWriter.get_flow_estimates, the times counting the reservoir too.
+        empty if the writer keeps no estimates
+        """
+        get_flow_estimates = getattr(self._writerPipe, "get_flow_estimates", None)
+        if get_flow_estimates is None:
+            return {}
+        estimates = get_flow_estimates()
+        estimates["held"] = len(self)
+        net = estimates["drain_rate"] - estimates["fill_rate"]
+        estimates["time_to_empty"] = estimates["held"] / net if net > 0 else math.inf
+        if estimates["drain_rate"] > 0:
+            estimates["time_to_empty_unfed"] = estimates["held"] / estimates["drain_rate"]
+        return estimates
 
     # number of result files added so far
     @abstractmethod
@@ -93,9 +209,14 @@ class Interleaver__Source:
     _file = None
     _filePath = None
     _file_len = None
-
-    def __init__(self, filePath):
-        """initializes with the file to wrap"""
+    _ahead = None  # (offset, page_size, future) of a page being read ahead
+    _recovered = False  # whether its tail has been counted as recovered
+    _on_unlink = None  # called with the path once the file is unlinked
+
+    def __init__(self, filePath, on_unlink=None):
+        """initializes with the file to wrap, on_unlink(path) being called once it is unlinked"""
+        self._on_unlink = on_unlink
+        self._arrived = time.monotonic()
         self._file_len = os.path.getsize(filePath)
         self._file = open(
             filePath,
@@ -104,48 +225,277 @@ class Interleaver__Source:
         )
         self._filePath = filePath
 
+    def remaining(self):
+        """the number of bytes not yet read"""
+        return self._file_len - self._file.tell()
+
     def hasPageAvailable(self, page_size):
         """determines if a length of page size is able to be read"""
-
-        def ___remaining():
-            told = self._file.tell()
-            remaining = self._file_len - told
-            return remaining
-
-        return ___remaining() >= page_size
+        return self.remaining() >= page_size
 
     def read(self, page_size):
-        """reads a page_size length of bytes from the file and returns the bytearray"""
-        return self._file.read(page_size)
+        """reads a page_size length of bytes from the file and returns a memoryview of them"""
+        ahead = self._take_ahead(page_size)
+        if ahead is not None:
+            return self._advance(ahead.result())
+        return memoryview(self._file.read(page_size))
+
+    def prefetch(self, page_size, executor):
+        """starts reading the next page in executor so that reading it later does not block"""
+        self._take_ahead(None)  # a stale read ahead is dropped
+        offset = self._file.tell()
+        length = min(page_size, self._file_len - offset)
+        if length > 0:
+            future = executor.submit(os.pread, self._file.fileno(), length, offset)
+            self._ahead = (offset, length, future)
+
+    async def read_async(self, page_size, executor):
+        """as read, but waiting on the page in executor rather than blocking the event loop"""
+        ahead = self._take_ahead(page_size)
+        if ahead is None:
+            length = min(page_size, self.remaining())
+            ahead = executor.submit(os.pread, self._file.fileno(), length, self._file.tell())
+        return self._advance(await asyncio.wrap_future(ahead))
+
+    def _take_ahead(self, page_size):
+        """claims the page read ahead if it is the next page_size bytes, otherwise drops it"""
+        if self._ahead is None:
+            return None
+        offset, length, future = self._ahead
+        self._ahead = None
+        if offset == self._file.tell() and length == min(page_size or 0, self.remaining()):
+            return future
+        if not future.cancel():
+            concurrent.futures.wait([future])  # must not outlive the file it reads
+        return None
+
+    def _advance(self, data):
+        """moves past a page read out of band and returns a memoryview of it"""
+        self._file.seek(len(data), io.SEEK_CUR)
+        return memoryview(data)
+
+    def release(self, page):
+        """signals that a page returned by read is no longer referenced"""
+        page.release()
+
+    def segment(self, page_size):
+        """advances past the next page without reading it, returning where it lies in the file"""
+        self._take_ahead(None)
+        offset = self._file.tell()
+        length = min(page_size, self._file_len - offset)
+        self._file.seek(length, io.SEEK_CUR)
+        return self._filePath, offset, length
+
+    def _unlink(self):
+        """unlinks the wrapped file, reporting it to on_unlink"""
+        os.unlink(self._filePath)
+        if self._on_unlink is not None:
+            self._on_unlink(self._filePath)
 
     def __del__(self):
         """unlinks the wrapped file"""
+        self._take_ahead(None)
         self._file.close()
-        os.unlink(self._filePath)
+        self._unlink()
+
+
+######################{}########################
+class Interleaver__MappedSource(Interleaver__Source):
+    """wraps a task result file as a read only memory map handing out zero-copy pages
+
+    pages are memoryview slices of the map, so nothing is copied until the interleave
+    engine weaves them into a book. the map is closed and the file unlinked only once
+    every page handed out has been released and the source itself has been dropped
+    """
+
+    def __init__(self, filePath, on_unlink=None):
+        """maps the file to wrap, see Interleaver__Source"""
+        self._on_unlink = on_unlink
+        self._arrived = time.monotonic()
+        self._filePath = filePath
+        self._file_len = os.path.getsize(filePath)
+        self._offset = 0
+        self._outstanding = {}  # id(page) -> offset of the page within the map
+        self._closing = False
+        self._map = None
+        self._view = memoryview(b"")
+        if self._file_len > 0:
+            fd = os.open(filePath, os.O_RDONLY)
+            try:
+                self._map = mmap.mmap(fd, self._file_len, prot=mmap.PROT_READ)
+            finally:
+                os.close(fd)  # the map holds its own reference to the file
+            self._map.madvise(mmap.MADV_SEQUENTIAL)
+            self._view = memoryview(self._map)
+
+    def remaining(self):
+        """the number of bytes not yet handed out"""
+        return self._file_len - self._offset
+
+    def hasPageAvailable(self, page_size):
+        """determines if a length of page size is able to be read"""
+        return self.remaining() >= page_size
+
+    def read(self, page_size):
+        """returns a memoryview over the next page_size bytes of the map"""
+        page = self._view[self._offset : self._offset + page_size]
+        self._outstanding[id(page)] = self._offset
+        self._offset += len(page)
+        return page
+
+    def prefetch(self, page_size, executor):
+        """asks the kernel to start paging in the next page so the engine does not fault on disk"""
+        length = min(page_size, self.remaining())
+        if self._map is not None and length > 0:
+            aligned = self._offset - self._offset % mmap.PAGESIZE
+            self._map.madvise(mmap.MADV_WILLNEED, aligned, self._offset + length - aligned)
+
+    async def read_async(self, page_size, executor):
+        """as read, which only hands out a view of the map"""
+        return self.read(page_size)
+
+    def segment(self, page_size):
+        """advances past the next page without mapping it, returning where it lies in the file"""
+        offset = self._offset
+        length = min(page_size, self._file_len - offset)
+        self._offset += length
+        return self._filePath, offset, length
+
+    def release(self, page):
+        """releases a page returned by read, dropping its memory from the resident set"""
+        start = self._outstanding.pop(id(page))
+        if self._map is not None and len(page) > 0:
+            aligned = start - start % mmap.PAGESIZE  # madvise requires a page aligned start
+            self._map.madvise(mmap.MADV_DONTNEED, aligned, start + len(page) - aligned)
+        page.release()
+        if self._closing and len(self._outstanding) == 0:
+            self._unmap_and_unlink()
+
+    def _unmap_and_unlink(self):
+        """closes the map and unlinks the file, unlinking even when the map cannot be closed"""
+        try:
+            self._view.release()
+            if self._map is not None:
+                self._map.close()
+                self._map = None
+        except BufferError:
+            # a view of the map is still exported, the map goes once the last view does
+            self._map = None
+        finally:
+            self._unlink()
+            self._filePath = None
+
+    def __del__(self):
+        """unlinks the wrapped file once no page of it remains outstanding"""
+        if self._filePath is None:
+            return
+        self._closing = True
+        if len(self._outstanding) == 0:
+            self._unmap_and_unlink()
+        else:
+            # pages escaped without being released, the kernel keeps the mapped data
+            # alive for them so only the directory entry can be reclaimed here
+            self._unlink()
+            self._filePath = None
 
 
 ######################{}########################
 class Interleaver(TaskResultWriter):
     """implements TaskResultWriter to aggregate then interleave task results writing out as a random byte stream"""
 
-    _source_groups = []  # sublists of task result groups
-    _source_next_group = []  # next sublist of tasks results before being committed
     pending = False
     
-    def __init__(self, to_ctl_q, target_capacity=None):
+    def __init__(
+        self,
+        to_ctl_q,
+        target_capacity=None,
+        engine="auto",
+        granularity="byte",
+        mapped_sources=True,
+        mix_workers=0,
+        min_group_results=0,
+        extractor=None,
+        recover_tails=True,
+        reservoir=None,
+        group_policy="fifo",
+        staging=None,
+        read_workers=2,
+        writer=pipe_writer.PipeWriter,
+    ):
         """Initialize Interleaver without capacity enforcement
         
         Args:
             to_ctl_q: Queue to send messages to controller  
             target_capacity: Target capacity limit (ENTROPY_BUFFER_CAPACITY) - for tracking only
+            engine: interleave engine name (see interleave.ENGINES), "auto" picks the fastest available
+            granularity: unit alternated across sources, 'bit', 'byte', 'word' (8 bytes),
+                         'line' (64 bytes) or 'block' (4 KiB); coarser is faster but mixes less finely
+            mapped_sources: memory map result files (Interleaver__MappedSource) instead of reading them
+            mix_workers: when above 0, books are built by a pool of this many processes instead of
+                         on the event loop, and written back in the order they were submitted
+            min_group_results: when above 0, uncommitted results are committed as a group as soon as
+                               this many have arrived and nothing else is queued, so interleaving
+                               starts before the slowest provider of a round has finished.
+                               1 is refused, a group of one would never be interleaved
+            extractor: an extractors.Extractor applied to every book before it is written to the pipe
+            recover_tails: page each group by the bytes its sources have left and carry whatever a
+                           group cannot interleave into the next group instead of deleting it
+            reservoir: optional reservoir.EntropyReservoir, see TaskResultWriter
+            group_policy: order in which committed groups are interleaved, see GroupScheduler.POLICIES
+            staging: optional staging.StagingArea, see TaskResultWriter
+            read_workers: when above 0, pages are read in a pool of this many threads, the next
+                          page of each source being read ahead while the current one is
+                          interleaved, instead of blocking the event loop on the disk
+            writer: callable returning the pipe writer, e.g. a functools.partial of
+                    pipe_writer.MultiPipeWriter to share the stream across several consumers
         """
         # Create PipeWriter without capacity limits - let data flow freely
-        super().__init__(to_ctl_q, pipe_writer.PipeWriter, target_capacity=None)
+        super().__init__(
+            to_ctl_q,
+            writer,
+            target_capacity=None,
+            reservoir=reservoir,
+            staging=staging,
+        )
         self._entropy_buffer_size = target_capacity  # Store for internal tracking only
+        self._source_groups = GroupScheduler(group_policy)  # committed groups of task results
+        self._source_next_group = []  # next group of task results before being committed
+        self._source_type = Interleaver__MappedSource if mapped_sources else Interleaver__Source
+        self._mix_workers = mix_workers
+        self._mix_pool = None  # created on first use from within the running loop
+        self._read_workers = read_workers
+        self._read_pool = None  # created on first use
+        self._mixed_books = collections.deque()  # (future book, sources kept alive, page lengths) in output order
+        self._unmixed_books = collections.deque()  # (submit, sources, page lengths) waiting behind _mixed_books
+        self._min_group_results = min_group_results
+        self._extractor = extractor
+        self._recover_tails = recover_tails
+        self._tail_pool = []  # partially read sources waiting to join the next group
+        if min_group_results < 0 or min_group_results == 1:
+            # a group of one is written as it is, never interleaved
+            raise ValueError(f"min_group_results must be 0 or at least 2, got {min_group_results}")
         
         # Set default buffer size for SSD storage (most common modern setup)
         # This ensures consistency with the storage type configurations
         self.set_buffer_size_for_storage_type('ssd')
+        self.set_interleave_engine(engine, granularity)
+
+    def set_interleave_engine(self, name: str, granularity: str = "byte") -> None:
+        """Select the engine used to weave pages into books
+
+        Args:
+            name: 'auto', 'loop', 'strided' or 'numpy' (when numpy is installed)
+            granularity: a key of interleave.GRANULARITIES
+        """
+        self._interleave = interleave.select_engine(name, granularity)
+        self._engine_name = name
+        self._granularity = granularity
+
+    def _positions_per_book(self, width: int) -> int:
+        """the bytes taken from each page per book, a whole number of interleave units"""
+        unit = interleave.granularity_unit(self._granularity)
+        positions = -(-self._optimal_buffer_size // width)
+        return -(-positions // unit) * unit
 
     def set_buffer_size_for_storage_type(self, storage_type: str) -> None:
         """Configure optimal buffer size based on storage type
@@ -171,24 +521,28 @@ class Interleaver(TaskResultWriter):
 
     def update_capacity(self, new_capacity):
         """Update the target capacity for tracking only"""
-        print(f"DEBUG: Interleaver.update_capacity called with {new_capacity:,} bytes (tracking only)", file=sys.stderr)
+        _log.log(2, "Interleaver.update_capacity called with {:,} bytes (tracking only)", new_capacity)
         super().update_capacity(new_capacity)
         old_buffer_size = getattr(self, '_entropy_buffer_size', 'None')
         self._entropy_buffer_size = new_capacity  # Update internal tracking
-        print(f"DEBUG: Updated Interleaver._entropy_buffer_size from {old_buffer_size} to {new_capacity:,}", file=sys.stderr)
+        _log.log(2, "Updated Interleaver._entropy_buffer_size from {} to {:,}", old_buffer_size, new_capacity)
 
     # ----------------Interleaver-------------------
     @property
     def _page_size(self):
         """compute the shortest length of all files in the current group, so that all can be read from alternately"""
         # ----------------------------------------------
-        if len(self._source_groups) == 0:
+        head = self._source_groups.head()
+        if head is None:
             return 0  # no pages no length
 
-        if len(self._source_groups[0]) > 0:
-            minimum_from_first_group = min(
-                self._source_groups[0], key=lambda source: source._file_len
-            )._file_len
+        if self._recover_tails:
+            # what is left rather than the file length, so that partially read sources fit a page
+            remaining = [source.remaining() for source in head]
+            return min([length for length in remaining if length > 0], default=0)
+
+        if len(head) > 0:
+            minimum_from_first_group = min(head, key=lambda source: source._file_len)._file_len
 
         minimum_length = minimum_from_first_group
         return minimum_length
@@ -202,8 +556,9 @@ class Interleaver(TaskResultWriter):
     # -----------------Interleaver--------------------------
     def add_result_file(self, filepathstring):  # implement
         # ----------------------------------
-        source = Interleaver__Source(filepathstring)
+        source = self._source_type(filepathstring, self.staging.released)
         self._source_next_group.append(source)
+        self._wake()  # enough may have arrived to stream
 
     # ----------Interleaver-------------
     def count_uncommitted(self):  # implement
@@ -216,12 +571,175 @@ class Interleaver(TaskResultWriter):
         # tip: a developer could subclass and modify commit_added_result_files to add a locally
         # generated stream to the group before adding the group
         # ------------------------------------------------------
+        if len(self._source_next_group) == 0:
+            return  # everything this round was already committed early
         accum = 0
         for source in self._source_next_group:
             accum += source._file_len
         self._bytesSeen += accum
-        self._source_groups.append(self._source_next_group)
+        self._push_group(self._source_next_group + self._take_tail_pool())
         self._source_next_group = []
+        self._wake()
+
+    # ---------------Interleaver----------------------------
+    def _push_group(self, sources):
+        """queue a group of sources, dated by the source that has waited longest"""
+        # ------------------------------------------------------
+        self._source_groups.push(sources, min(source._arrived for source in sources))
+
+    # ---------------Interleaver----------------------------
+    def get_queue_stats(self):  # override
+        """reports the groups waiting to be interleaved, see GroupScheduler.metrics"""
+        # ------------------------------------------------------
+        return self._source_groups.metrics()
+
+    # ---------------Interleaver----------------------------
+    def _take_tail_pool(self):
+        """empties the pool of partially read sources, counting their bytes as recovered
+
+        a tail pooled again after a later group is counted only the first time it is taken
+        """
+        # ------------------------------------------------------
+        tails = self._tail_pool
+        self._tail_pool = []
+        for source in tails:
+            if not source._recovered:
+                source._recovered = True
+                self._bytesRecovered += source.remaining()
+        return tails
+
+    # ---------------Interleaver----------------------------
+    def _drop_source(self, source):
+        """drops a source that has left its group, pooling or discarding whatever it has left"""
+        # ------------------------------------------------------
+        if source.remaining() == 0:
+            return  # fully consumed, the file is deleted with the source
+        if self._recover_tails:
+            self._tail_pool.append(source)
+        else:
+            self._bytesDiscarded += source.remaining()
+
+    # ---------------Interleaver----------------------------
+    def get_tail_stats(self):  # override
+        # ------------------------------------------------------
+        stats = super().get_tail_stats()
+        stats["bytes_pooled"] = sum(source.remaining() for source in self._tail_pool)
+        if self._extractor is not None:
+            # bought and interleaved but never written, see extractors.Extractor.accepts
+            stats["bytes_discarded"] += self._extractor.bytes_unextracted
+        return stats
+
+    # ------------Interleaver----------------
+    async def _write_book(self, book, lengths):
+        """write a book interleaved from pages of the given lengths to the pipe then share what was written with the controller"""
+        # ----------------------------------------
+        if self._extractor is not None:
+            # extracted run by run, each with the width of the pages it alternates across
+            view = memoryview(book)
+            position = 0
+            extracted = []
+            for count, width in interleave.ragged_runs(lengths, self._granularity):
+                extracted.append(self._extractor.extract(view[position : position + count], width))
+                position += count
+            book = b"".join(extracted)
+            if len(book) == 0:
+                return  # carried over until the extractor has a whole block, or unextractable
+        written = await self._write_to_pipe(book)
+
+        # send a view of the bytes written to the controller
+        to_ctl_cmd = {"cmd": "add_bytes", "hex": bytes(book[:written])}
+        self.to_ctl_q.put_nowait(to_ctl_cmd)
+
+        # directly inform controller of any change in pipe
+        msg = {"bytesInPipe": len(self)}
+        self.to_ctl_q.put_nowait(msg)
+
+    # ------------Interleaver----------------
+    def _submit_mixed_page(self):
+        """queue the next page of the head group for the mixing pool, one job per book
+
+        the jobs are submitted by _submit_mixed_books as earlier books are written
+        """
+        # ----------------------------------------
+        loop = asyncio.get_running_loop()
+        if self._mix_pool is None:
+            self._mix_pool = concurrent.futures.ProcessPoolExecutor(
+                max_workers=self._mix_workers
+            )
+        page_size = self._page_size
+        sources = list(self._source_groups.head())
+        segments = [source.segment(page_size) for source in sources]
+        positions_per_book = self._positions_per_book(len(segments))
+        for start in range(0, page_size, positions_per_book):
+            stop = min(start + positions_per_book, page_size)
+            book_segments = [
+                (path, offset + start, max(0, min(length, stop) - start))
+                for path, offset, length in segments
+            ]
+            submit = functools.partial(
+                loop.run_in_executor,
+                self._mix_pool,
+                functools.partial(
+                    interleave.interleave_segments,
+                    book_segments,
+                    self._engine_name,
+                    self._granularity,
+                ),
+            )
+            # the sources ride along so that their files outlive the workers reading them
+            self._unmixed_books.append(
+                (submit, sources, [length for _, _, length in book_segments])
+            )
+        self._submit_mixed_books()
+
+    # ------------Interleaver----------------
+    def _submit_mixed_books(self):
+        """submit queued books to the mixing pool, keeping at most 2 * mix_workers outstanding"""
+        # ----------------------------------------
+        while len(self._unmixed_books) > 0 and len(self._mixed_books) < 2 * self._mix_workers:
+            submit, sources, lengths = self._unmixed_books.popleft()
+            self._mixed_books.append((submit(), sources, lengths))
+
+    # ------------Interleaver----------------
+    async def _read_pages(self, sources, page_size):
+        """read the next page of each source, off the event loop when there are read workers"""
+        # ----------------------------------------
+        if self._read_workers == 0:
+            return [source.read(page_size) for source in sources]
+        if self._read_pool is None:
+            self._read_pool = concurrent.futures.ThreadPoolExecutor(
+                max_workers=self._read_workers, thread_name_prefix="interleaver-read"
+            )
+        pages = await asyncio.gather(
+            *[source.read_async(page_size, self._read_pool) for source in sources]
+        )
+        # read ahead the pages of the next round while these are interleaved and flushed
+        next_page_size = self._page_size
+        for source in sources:
+            source.prefetch(next_page_size, self._read_pool)
+        return pages
+
+    # ------------Interleaver----------------
+    def _queue_mixed_book(self, book):
+        """queue an already built book behind the books still being mixed"""
+        # ----------------------------------------
+        future = asyncio.get_running_loop().create_future()
+        future.set_result(book)
+        self._unmixed_books.append((lambda: future, [], [len(book)]))
+        self._submit_mixed_books()
+
+    # ------------Interleaver----------------
+    async def _write_mixed_books(self):
+        """write finished books in submission order, waiting on the oldest only when the pool is full"""
+        # ----------------------------------------
+        while len(self._mixed_books) > 0:
+            future, _, lengths = self._mixed_books[0]
+            if not future.done() and len(self._mixed_books) < 2 * self._mix_workers:
+                return  # room to submit more pages, keep the pool busy
+            book = await future
+            self._mixed_books.popleft()
+            self._submit_mixed_books()  # keep the pool busy while the book is written
+            await self._write_book(book, lengths)
 
     # post: if a group is available and readable, the `_writerPipe` is given a "book" of interleaved bytes
     # ------------Interleaver----------------
@@ -229,51 +747,69 @@ class Interleaver(TaskResultWriter):
         """alternate across bytes from each task result, write alternated sequence to pipe and controller-view"""
 
         # ........................................
-        # post: _source_groups either has a list of 2 or more results in the front of the queue
+        # post: _source_groups either has a group of 2 or more results at its head
         #       or groups are removed until this condition has been satisfied or until empty
         async def ___refresh_source_groups():
             if len(self._source_groups) > 0:
-                sources = self._source_groups[0]  # just treat head
-                shortlist = [
-                    source
-                    for source in sources
-                    if not source.hasPageAvailable(self._page_size)
-                ]
-                # prune from head source group
+                page_size = self._page_size  # of the head, which pruning leaves as the head
+                shortlist = self._source_groups.prune_head(
+                    lambda source: not source.hasPageAvailable(page_size) or source.remaining() == 0
+                )
+                # pruned from head source group
                 for source_list_item in shortlist:
-                    self._source_groups[0].remove(source_list_item)
-                    del source_list_item  # deletes the underlying file
+                    self._drop_source(source_list_item)
+                    del source_list_item  # deletes the underlying file unless pooled
 
             # after pruning, it is possible there are less than 2 items
             # in which case the group is popped
             if len(self._source_groups) > 0:
-                current_group = self._source_groups[0]
+                current_group = self._source_groups.head()
 
                 if len(current_group) == 0:
-                    self._source_groups.pop(0)  # empty pop
+                    self._source_groups.pop_head()  # empty pop
                 elif len(current_group) < 2:  # dangling group has only one member
                     # SINGLE FILE FIX: Process single files instead of deleting them
                     # This ensures downloaded entropy always appears in UI even with small batches
-                    single_file_group = self._source_groups.pop(0)
+                    single_file_group = self._source_groups.pop_head()
                     if single_file_group:
                         # Process the single file
                         single_source = single_file_group[0]
-                        if single_source.hasPageAvailable(single_source._file_len):
+                        if self._extractor is not None and not self._extractor.accepts(1):
+                            # cannot be extracted on its own, it waits in the tail pool for
+                            # other results to be interleaved with (or is discarded)
+                            self._drop_source(single_source)
+                        elif single_source.hasPageAvailable(single_source._file_len):
                             # Read the entire file and write it to pipe
-                            single_file_data = single_source.read(single_source._file_len)
-                            written = await self._write_to_pipe(single_file_data)
-                            
-                            # Notify controller
-                            to_ctl_cmd = {"cmd": "add_bytes", "hex": single_file_data[:written]}
-                            self.to_ctl_q.put_nowait(to_ctl_cmd)
-                            
-                            # Update bytesInPipe
-                            msg = {"bytesInPipe": len(self)}
-                            self.to_ctl_q.put_nowait(msg)
+                            single_file_data = (
+                                await self._read_pages([single_source], single_source._file_len)
+                            )[0]
+                            # copied, the pipe may hold on to what it cannot take at once
+                            # and the page is released back to the map below
+                            if self._mix_workers > 0:
+                                # must not overtake books of earlier groups still being mixed
+                                self._queue_mixed_book(bytes(single_file_data))
+                            else:
+                                await self._write_book(bytes(single_file_data), [len(single_file_data)])
+                            single_source.release(single_file_data)
+                        else:
+                            self._drop_source(single_source)  # the tail of a larger group
                     
                     # Clean up the single file group
                     single_file_group.clear()
 
+            # tails left over while nothing else is queued are interleaved with each other
+            if len(self._source_groups) == 0 and len(self._tail_pool) >= 2:
+                self._push_group(self._take_tail_pool())
+
+            # streaming: once idle, start on the results that have arrived so far instead of waiting
+            # for the round to be committed. results arriving meanwhile fold into the next group
+            if (
+                self._min_group_results > 0
+                and len(self._source_groups) == 0
+                and self.count_uncommitted() >= self._min_group_results
+            ):
+                self.commit_added_result_files()
+
         # ........................................
 
         while True:
@@ -281,69 +817,49 @@ class Interleaver(TaskResultWriter):
             # at the head of _source_groups
 
             # [ viable source list (2+ members with all having at least a page of bytes) now at head ]
-            if len(self._source_groups) > 0:
+            # a head of a single member is left to the next pass, which takes it as a single file
+            viable = len(self._source_groups) > 0 and len(self._source_groups.head()) >= 2
+            if self._mix_workers > 0:
+                if (
+                    viable
+                    and len(self._unmixed_books) == 0
+                    and len(self._mixed_books) < 2 * self._mix_workers
+                ):
+                    self._submit_mixed_page()
+                await self._write_mixed_books()
+                self.pending = len(self._mixed_books) > 0 or len(self._unmixed_books) > 0
+            elif viable:
                 self.pending = True
-                pages = []
+                page_size = self._page_size
 
                 # read the calculated page size from each file and add to a "pages" list
-                for source in self._source_groups[0]:
-                    pages.append(io.BytesIO(source.read(self._page_size)))
-                    # await asyncio.sleep(0)  # ------- yield ---------
-
-                # write the pages into a single book, alternating each byte across all pages
-                book = io.BytesIO()
-                # Optimize: Build much larger buffers before writing to pipe
-                # This allows PipeWriter to use its large chunk capabilities efficiently
-                # Large buffers are optimal for modern SSD performance
-                bytes_written_to_book = 0
-                # Use small fixed yield interval for UI responsiveness (not proportional to buffer size)
-                async_yield_interval = 1024  # Yield every 1KB for smooth UI interaction
-                
-                for position in range(self._page_size):  # up to the shortest length of all results
-                    for page in pages:  # read next byte from each page/result writing them alternately into the book
-                        book.write(page.read(1))  # read,write
-                        bytes_written_to_book += 1
-
-                    # Yield frequently during buffer building for UI responsiveness
-                    if bytes_written_to_book % async_yield_interval == 0:
-                        await asyncio.sleep(0)  # Pure yield, no delay
-
-                    # Write to pipe when we have a large optimal buffer, not frequently
-                    if bytes_written_to_book >= self._optimal_buffer_size:
-                        # Write large chunk to pipe for optimal performance
-                        written = await self._write_to_pipe(book.getvalue())  # Convert memoryview to bytes for pickling
-                        
-                        # send hex serialized version to controller
-                        randomBytesView = book.getvalue()
-                        to_ctl_cmd = {
-                            "cmd": "add_bytes",
-                            "hex": randomBytesView[:written],
-                        }
-                        self.to_ctl_q.put_nowait(to_ctl_cmd)
-
-                        # clear book from memory and start a new one
-                        book.close()
-                        book = io.BytesIO()
-                        bytes_written_to_book = 0
-
-                        # directly inform controller of any change in pipe
-                        msg = {"bytesInPipe": len(self)}
-                        self.to_ctl_q.put_nowait(msg)
-                        
-                # write remaining bytes that are less than optimal_buffer_size
-                if bytes_written_to_book > 0:
-                    written = await self._write_to_pipe(book.getvalue())  # Convert memoryview to bytes for pickling
-
-                    # share with controller a view of the bytes written
-                    randomBytesView = book.getvalue()
-                    to_ctl_cmd = {"cmd": "add_bytes", "hex": randomBytesView[:written]}
-                    self.to_ctl_q.put_nowait(to_ctl_cmd)
-
-                for page in pages:
-                    page.close()  # garbage collect pages (not really necessary in this case)
+                sources = list(self._source_groups.head())
+                pages = await self._read_pages(sources, page_size)
+
+                # write the pages into books, alternating each unit across all pages
+                # (a source read short of the page simply drops out of the alternation)
+                # each book is cut at the first whole position reaching the optimal buffer size
+                # so that PipeWriter can use its large chunk capabilities efficiently
+                positions_per_book = self._positions_per_book(len(pages))
+                for start in range(0, page_size, positions_per_book):
+                    stop = min(start + positions_per_book, page_size)
+                    book_pages = [page[start:stop] for page in pages]
+                    book = interleave.interleave_ragged(
+                        book_pages,
+                        self._interleave,
+                        self._granularity,
+                    )
+                    await self._write_book(book, [len(page) for page in book_pages])
+                    await asyncio.sleep(0)  # yield between books for UI responsiveness
+
+                for source, page in zip(sources, pages):
+                    source.release(page)
                 self.pending = False
-            await self._writerPipe.refresh()
-            await asyncio.sleep(0.002)  # 2ms for responsive UI (was 0.01 = 10ms)
+            await self._refresh_writer()
+            if len(self._source_groups) > 0 or len(self._mixed_books) > 0 or len(self._unmixed_books) > 0:
+                await asyncio.sleep(0.002)  # 2ms for responsive UI (was 0.01 = 10ms)
+            else:
+                await self._wait_for_work()
         # await self._flush_pipe()
 
     # ---------Interleaver-----------------
@@ -351,10 +867,133 @@ class Interleaver(TaskResultWriter):
         """deletes Interleaver__source objects added to it"""
         # -------------------------------------
         # the deconstructor is called on every member of every subgroup
-        for source_group in self._source_groups:
+        for source_group in [self._source_groups.clear(), self._tail_pool]:
+            for source in source_group:
+                self._bytesDiscarded += source.remaining()
             source_group.clear()  # deletes underlying files
+        if self._mix_pool is not None:
+            self._mix_pool.shutdown(wait=False, cancel_futures=True)
+        if self._read_pool is not None:
+            self._read_pool.shutdown(wait=False, cancel_futures=True)
+        self._mixed_books.clear()
+        self._unmixed_books.clear()
         super().__del__()
 
     def __len__(self):
         """Return the number of bytes currently buffered in the interleaver's writer."""
         return super().__len__()
+
+
+######################{}########################
+class Passthrough__Source:
+    """wraps a task result file moved into the pipe by the kernel"""
+
+    def __init__(self, filePath, on_unlink=None):
+        """opens the file to wrap, on_unlink(path) being called once it is unlinked"""
+        self._on_unlink = on_unlink
+        self._filePath = filePath
+        self._fd = os.open(filePath, os.O_RDONLY)
+        self._file_len = os.fstat(self._fd).st_size
+        self._offset = 0
+
+    def remaining(self):
+        """the number of bytes not yet moved"""
+        return self._file_len - self._offset
+
+    def splice_into(self, writer):
+        """moves as much of what remains as the writer's pipe takes, returning the count moved"""
+        moved = writer.splice_from(self._fd, self._offset, self.remaining())
+        self._offset += moved
+        return moved
+
+    def __del__(self):
+        """closes and unlinks the wrapped file"""
+        os.close(self._fd)
+        os.unlink(self._filePath)
+        if self._on_unlink is not None:
+            self._on_unlink(self._filePath)
+
+
+######################{}########################
+class Passthrough(TaskResultWriter):
+    """implements TaskResultWriter to concatenate task results into the pipe without mixing them
+
+    each result is spliced straight from its file into the named pipe, so its bytes never
+    enter python memory and throughput is bounded by the kernel's pipe rather than by
+    copying bytes objects. results are written whole in the order they were committed.
+    since nothing is read, no bytes are shared with the controller's view
+    """
+
+    pending = False
+
+    def __init__(
+        self, to_ctl_q, target_capacity=None, staging=None, writer=pipe_writer.PipeWriter
+    ):
+        """
+        Args:
+            to_ctl_q: Queue to send messages to controller
+            target_capacity: Target capacity limit (ENTROPY_BUFFER_CAPACITY) - for tracking only
+            staging: optional staging.StagingArea, see TaskResultWriter
+            writer: callable returning the pipe writer, see Interleaver
+        """
+        super().__init__(to_ctl_q, writer, target_capacity=target_capacity, staging=staging)
+        self._sources = collections.deque()  # committed results in the order to write them
+        self._source_next_group = []  # results added but not yet committed
+
+    # -----------------Passthrough--------------------------
+    def add_result_file(self, filepathstring):  # implement
+        # ----------------------------------
+        self._source_next_group.append(Passthrough__Source(filepathstring, self.staging.released))
+
+    # -----------------Passthrough--------------------------
+    def count_uncommitted(self):  # implement
+        # ----------------------------------
+        return len(self._source_next_group)
+
+    # -----------------Passthrough--------------------------
+    def commit_added_result_files(self):  # implement
+        # ----------------------------------
+        self._bytesSeen += sum(source.remaining() for source in self._source_next_group)
+        self._sources.extend(self._source_next_group)
+        self._source_next_group = []
+        self._wake()
+
+    # -----------------Passthrough--------------------------
+    def get_queue_stats(self):  # override
+        # ----------------------------------
+        return {
+            "queued_files": len(self._sources),
+            "queued_bytes": sum(source.remaining() for source in self._sources),
+        }
+
+    # -----------------Passthrough--------------------------
+    async def refresh(self):  # override
+        """splice committed results into the pipe as fast as it is drained"""
+        # ----------------------------------
+        while True:
+            await self._refresh_writer()  # anything buffered is written first
+            moved = 0
+            while len(self._sources) > 0:
+                if self._sources[0].remaining() == 0:
+                    self._sources.popleft()  # deletes the underlying file
+                    continue
+                self.pending = True
+                count = self._sources[0].splice_into(self._writerPipe)
+                if count == 0:
+                    break  # the pipe is full or has no reader
+                moved += count
+                await asyncio.sleep(0)  # at most a pipe's capacity is moved per call
+            self.pending = False
+            if moved > 0:
+                self.to_ctl_q.put_nowait({"bytesInPipe": len(self)})
+            await self._wait_for_work(holding=len(self._sources) > 0)
+
+    # -----------------Passthrough--------------------------
+    def __del__(self):  # override
+        """deletes the results not yet written"""
+        # ----------------------------------
+        for source in list(self._sources) + self._source_next_group:
+            self._bytesDiscarded += source.remaining()
+        self._sources.clear()
+        self._source_next_group.clear()
+        super().__del__()
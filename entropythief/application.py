@@ -22,13 +22,21 @@ import platform
 import subprocess
 import shutil
 import datetime
+import functools
 
 # Note: EntopyThief is a pure writer - expects external reader to be connected
 
 from . import utils
 from . import view
 from . import model
-from .TaskResultWriter import Interleaver
+from . import pipe_writer
+from .TaskResultWriter import Interleaver, Passthrough
+from .extractors import create_extractor
+from .reservoir import EntropyReservoir
+from .staging import StagingArea
+from .socket_server import EntropySocketServer
+from .spmc_ring import ShmRingWriter
+from . import ringlog
 
 _kMEBIBYTE = 2**20  # constant count
 
@@ -49,6 +57,7 @@ class Controller:
 
     count_workers = 0
     bytesInPipe = 0
+    flowEstimates = {}  # see TaskResultWriter.get_flow_estimates
     payment_failed_count = 0
     current_total = 0.0
     whether_paused = True
@@ -79,14 +88,13 @@ class Controller:
             "stderr", "w", buffering=1
         )  # messages from project and if logging enabled INFO messages from rest
         sys.stderr = self.stderr2file  # replace stderr stream with file stream
-        
-        # Clear PipeWriter log file on startup
-        import os
-        import datetime
-        os.makedirs('.logs', exist_ok=True)
-        with open('.logs/pipewriter.log', 'w') as f:
-            f.write("")  # Clear the file
-            
+        # .logs/pipewriter.log is cleared as pipe_writer is imported, see ringlog.file_sink
+        self._mainlog = ringlog.Logger(
+            "main",
+            sink=lambda: self.mainlog,
+            formatter=lambda logger, created, thread, level, message: f"{message}\n",
+        )  # main.log written in the background, events always and books when debugging
+
         # Log session start in main logs
         session_start = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
         print(f"=== EntopyThief Session Started: {session_start} ===", file=self.mainlog)
@@ -101,6 +109,54 @@ class Controller:
 
         # self.taskResultWriter = Interleaver(self.to_ctl_q)
 
+        # entropy left in the reservoir by the previous run tops off the pipe right away
+        reservoir = None
+        if self.args.reservoir_mib > 0:
+            reservoir = EntropyReservoir(
+                self.args.reservoir_path, self.args.reservoir_mib * _kMEBIBYTE
+            )
+
+        staging = StagingArea(self.args.staging_dir, self.args.staging_mib * _kMEBIBYTE)
+        writer = pipe_writer.PipeWriter
+        if self.args.flush == "vmsplice":
+            writer = pipe_writer.VmsplicePipeWriter
+        if self.args.pipe_size != "adaptive":
+            writer = functools.partial(writer, pipe_size=self.args.pipe_size)
+        if self.args.shards > 1:
+            # every named pipe becomes a ring of them, PATH.0 .. PATH.K-1
+            writer = functools.partial(pipe_writer.ShardedPipeWriter, shards=self.args.shards, writer=writer)
+        if self.args.pipe or self.args.socket or self.args.shm:
+            # several consumers, each with its own named pipe, socket or ring, share the stream fairly
+            pipes = [pipe_writer.parse_pipe_spec(spec) for spec in self.args.pipe or ["/tmp/pilferedbits"]]
+            for spec in self.args.socket or []:
+                pipes.append(pipe_writer.parse_pipe_spec(spec) + (EntropySocketServer,))
+            for spec in self.args.shm or []:
+                path, target_fill, weight = pipe_writer.parse_pipe_spec(spec)
+                ring = functools.partial(ShmRingWriter, capacity=target_fill)
+                pipes.append((path, target_fill, weight, ring))
+            writer = functools.partial(pipe_writer.MultiPipeWriter, pipes, writer=writer)
+        if self.args.writer == "passthrough":
+            # raw concatenated results spliced into the pipe, the mixing options do not apply
+            taskResultWriter = Passthrough(self.from_model_q, staging=staging, writer=writer)
+        else:
+            taskResultWriter = Interleaver(
+                self.from_model_q,
+                granularity=self.args.interleave_granularity,
+                mix_workers=self.args.mix_workers,
+                read_workers=self.args.read_workers,
+                group_policy=self.args.group_policy,
+                staging=staging,
+                min_group_results=self.args.stream_min_results,
+                extractor=create_extractor(
+                    self.args.extractor,
+                    ratio=self.args.extractor_ratio,
+                    seed=self.args.extractor_seed,
+                    granularity=self.args.interleave_granularity,
+                ),
+                reservoir=reservoir,
+                writer=writer,
+            )
+
         self.themodeltask = loop.create_task(
             model.model__EntropyThief(
                 loop=loop,
@@ -111,7 +167,7 @@ class Controller:
                 MAXWORKERS=self.MAXWORKERS,
                 BUDGET=self.BUDGET,
                 IMAGE_HASH=self.IMAGE_HASH,
-                taskResultWriter=Interleaver(self.from_model_q),
+                taskResultWriter=taskResultWriter,
             )()
         )
 
@@ -151,6 +207,7 @@ class Controller:
                     self.count_workers,
                     self.bytesInPipe,
                     self.whether_paused,
+                    self.flowEstimates,
                 )
 
                 #############################################
@@ -196,6 +253,8 @@ class Controller:
             # sys.stderr=sys.__stderr__
             print("+=+=+=+=+=+=+=stopping and settling accounts=+=+=+=+=+=+=")
             bytesPurchased = 0
+            tailStats = None
+            stagingStats = None
             if True:
                 print("asking entropythief golem executor to stop provisioning")
                 cmd = {"cmd": "stop"}
@@ -212,6 +271,8 @@ class Controller:
                         #         print(msg_from_model)
                         if "bytesPurchased" in msg_from_model:
                             bytesPurchased = msg_from_model["bytesPurchased"]
+                            tailStats = msg_from_model.get("tailStats")
+                            stagingStats = msg_from_model.get("stagingStats")
                         elif (
                             "event" in msg_from_model
                             and msg_from_model["event"] == "InvoiceAccepted"
@@ -235,6 +296,22 @@ class Controller:
             if bytesPurchased > 0:
                 rate = float(self.current_total / bytesPurchased) * 1000 * _kMEBIBYTE
                 print("cost/gigabyte: " + ("%6f" % rate))
+            if tailStats:
+                print(
+                    "Bytes recovered from result tails: "
+                    + locale.format_string("%d", tailStats["bytes_recovered"], grouping=True)
+                    + ", discarded: "
+                    + locale.format_string(
+                        "%d",
+                        tailStats["bytes_discarded"] + tailStats["bytes_pooled"],
+                        grouping=True,
+                    )
+                )
+            if stagingStats and stagingStats["directory"]:
+                print(
+                    f"Results staged in {stagingStats['directory']}: {stagingStats['staged']}"
+                    f", spilled to disk: {stagingStats['spilled']}"
+                )
             print()
             print(
                 utils.TEXT_COLOR_GREEN
@@ -247,6 +324,7 @@ class Controller:
                 + "\nOn behalf of the Golem Community, thank you for your participation."
                 + utils.TEXT_COLOR_DEFAULT
             )
+            ringlog.flush()
             self.stderr2file.close()
 
     #   ---------Controller------------
@@ -263,8 +341,7 @@ class Controller:
             self.u_update_main_window.send(
                 msg
             )  # TODO coroutine only updates one line at a time, buffering between calls
-            concat_msg = {msg_from_model["cmd"]: len(msg_from_model["hex"])}
-            print(concat_msg, file=self.mainlog)
+            self._mainlog.log(2, "{{'add_bytes': {}}}", len(msg_from_model["hex"]))
         elif "exception" in msg_from_model:
             raise Exception(msg_from_model["exception"])
         elif "info" in msg_from_model and msg_from_model["info"] == "worker started":
@@ -286,11 +363,13 @@ class Controller:
         elif "event" in msg_from_model and msg_from_model["event"] == "InvoiceAccepted":
             self.current_total += float(msg_from_model["amount"])
         elif "event" in msg_from_model:
-            print(msg_from_model, file=self.mainlog)  # report event to developer stream
+            self._mainlog.log(0, "{}", msg_from_model)  # report event to developer stream
         elif "debug" in msg_from_model:
             print(msg_from_model, file=self.devdebuglog)  # record debug message
         elif "bytesInPipe" in msg_from_model:
             self.bytesInPipe = msg_from_model["bytesInPipe"]
+        elif "flow" in msg_from_model:
+            self.flowEstimates = msg_from_model["flow"]
         elif "model exception" in msg_from_model:
             self.theview.destroy()  # to do, use the idiomatic del?
             timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
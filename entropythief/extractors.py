@@ -0,0 +1,231 @@
+# extractors
+# author: krunch3r (KJM github.com/krunch3r76)
+# license: General Poetic License (GPL3)
+
+"""
+randomness extractors applied to books between the Interleaver and the PipeWriter
+
+interleaving only changes the order of the bytes, it cannot remove a bias in any one
+provider's output. an extractor condenses each book into fewer, less biased bytes at
+a configurable output/input ratio.
+
+extractors:
+    toeplitz - seeded Toeplitz hash over fixed size blocks (requires numpy)
+    xorfold  - exclusive or of consecutive bytes, by default one unit from each provider page
+
+extractors are stateful: input that does not fill a whole block is carried over and
+consumed with the next book so that nothing is dropped between books. an extractor
+whose blocks are cut along the providers of a book (xorfold by default) instead drops a
+carry the next book is of another width, and counts as unextracted the books it cannot
+fold across providers, see Extractor.accepts
+"""
+
+from abc import ABC, abstractmethod
+from typing import Optional, Union
+
+from .interleave import granularity_unit
+
+try:
+    import numpy
+except ModuleNotFoundError:
+    numpy = None
+
+
+BytesLike = Union[bytes, bytearray, memoryview]
+
+
+class Extractor(ABC):
+    """interface for a stage that condenses books before they are written to the pipe"""
+
+    _carry = b""  # input left over from the previous book
+    _carry_width = None  # width of the book the carry was left over from
+    _per_provider = False  # whether blocks are cut along the providers of a book
+    bytes_unextracted = 0  # input dropped because it could not be extracted at its width
+
+    @property
+    @abstractmethod
+    def ratio(self) -> float:
+        """the number of bytes output per byte input"""
+        pass
+
+    @abstractmethod
+    def _block_size(self, width: int) -> int:
+        """the number of input bytes consumed per unit of work"""
+        pass
+
+    @abstractmethod
+    def _extract_blocks(self, data: memoryview, width: int) -> bytes:
+        """condense data, a whole number of blocks long"""
+        pass
+
+    def accepts(self, width: int) -> bool:
+        """whether a book of whole turns across width pages (0: a ragged turn) can be extracted
+
+        an extractor cutting its blocks along the providers needs two of them at least
+        """
+        return not self._per_provider or width >= 2
+
+    def extract(self, book: BytesLike, width: int = 1) -> bytes:
+        """condense a book interleaved from width provider pages
+
+        pre: none
+        in:
+            book: interleaved bytes, whole turns across the pages (see interleave.ragged_runs)
+            width: count of provider pages alternated in the book
+        out: the extracted bytes, possibly empty while input is carried over or when the
+             book cannot be extracted at its width, which is counted in bytes_unextracted
+        post: _carry holds the input short of a whole block
+        """
+        if len(self._carry) > 0 and self._per_provider and width != self._carry_width:
+            # its blocks would straddle providers of two books
+            self.bytes_unextracted += len(self._carry)
+            self._carry = b""
+        if not self.accepts(width):
+            self.bytes_unextracted += len(book)
+            return b""
+        self._carry_width = width
+        if len(self._carry) > 0:
+            book = self._carry + bytes(book)
+        block_size = self._block_size(width)
+        usable = len(book) - len(book) % block_size
+        data = memoryview(book)
+        self._carry = bytes(data[usable:])
+        if usable == 0:
+            return b""
+        return self._extract_blocks(data[:usable], width)
+
+
+class ToeplitzExtractor(Extractor):
+    """multiply each block of input bits by a seeded binary Toeplitz matrix over GF(2)
+
+    the matrix is out_bits x block_bits and is fully described by block_bits + out_bits - 1
+    seed bits. since the product is linear it is the exclusive or of the matrix applied to
+    each input byte on its own, so it is precomputed as one 256 entry table per input byte
+    and a whole book of blocks is hashed with block_bits / 8 vectorized lookups
+    """
+
+    def __init__(self, ratio: float = 0.5, seed: int = 0, block_bits: int = 256):
+        """
+        in:
+            ratio: output/input ratio, rounded so the output is a whole number of bytes per block
+            seed: seeds the matrix, both ends of a verification must agree on it
+            block_bits: input bits per block, a multiple of 8
+        """
+        if numpy is None:
+            raise ModuleNotFoundError("the toeplitz extractor requires numpy, pip install numpy")
+        if block_bits % 8 != 0:
+            raise ValueError(f"block_bits must be a multiple of 8, got {block_bits}")
+        out_bits = int(block_bits * ratio) // 8 * 8
+        if not 0 < out_bits <= block_bits:
+            raise ValueError(f"ratio must be in (0, 1] and leave at least one byte per block, got {ratio}")
+        self._block_bits = block_bits
+        self._out_bits = out_bits
+
+        diagonals = numpy.random.default_rng(seed).integers(
+            0, 2, size=block_bits + out_bits - 1, dtype=numpy.uint8
+        )
+        # T[i, j] = diagonals[i - j + block_bits - 1], constant along each diagonal
+        rows = numpy.arange(out_bits)[:, None]
+        columns = numpy.arange(block_bits)[None, :]
+        self._matrix = diagonals[rows - columns + block_bits - 1]
+
+        # tables[j][v] is the matrix applied to byte value v at input byte j, packed to bytes
+        byte_bits = numpy.unpackbits(numpy.arange(256, dtype=numpy.uint8)[:, None], axis=1)
+        tables = numpy.empty((block_bits // 8, 256, out_bits // 8), dtype=numpy.uint8)
+        for j in range(block_bits // 8):
+            products = byte_bits.astype(numpy.uint16) @ self._matrix[:, 8 * j : 8 * j + 8].T
+            tables[j] = numpy.packbits((products & 1).astype(numpy.uint8), axis=1)
+        # look up whole words at a time where the output length allows
+        self._word = numpy.uint64 if (out_bits // 8) % 8 == 0 else numpy.uint8
+        self._tables = tables.view(self._word)
+
+    @property
+    def ratio(self) -> float:
+        return self._out_bits / self._block_bits
+
+    def _block_size(self, width: int) -> int:
+        return self._block_bits // 8
+
+    def _extract_blocks(self, data: memoryview, width: int) -> bytes:
+        blocks = numpy.frombuffer(data, dtype=numpy.uint8).reshape(-1, self._block_bits // 8)
+        hashed = numpy.zeros((len(blocks), self._tables.shape[2]), dtype=self._word)
+        for j, table in enumerate(self._tables):
+            hashed ^= table[blocks[:, j]]
+        return hashed.tobytes()
+
+
+class XorFoldExtractor(Extractor):
+    """exclusive or every fold consecutive bytes of the book into one
+
+    with the default fold, across the book's width, each output unit combines the unit at
+    the same position from every provider page (a unit being a byte, word, line or block
+    as the book was interleaved, see interleave.granularity_unit), so a single biased or
+    failed provider is masked as long as any other provider in the group is sound. books
+    of a single provider, or the ragged turn in which a page runs out, are therefore not
+    accepted
+    """
+
+    def __init__(self, ratio: Optional[float] = None, granularity: str = "byte"):
+        """
+        in:
+            ratio: output/input ratio, 1/fold. None folds across the provider pages of each book
+            granularity: the interleave granularity of the books, which the default fold
+                steps over a unit at a time. books interleaved a bit at a time cannot be
+                folded across their providers a byte at a time, so require a ratio
+        """
+        if ratio is not None and not 0 < ratio <= 1:
+            raise ValueError(f"ratio must be in (0, 1], got {ratio}")
+        if ratio is None and granularity == "bit":
+            raise ValueError("xorfold cannot fold across providers at bit granularity, give it a ratio")
+        self._fold = None if ratio is None else max(1, round(1 / ratio))
+        self._unit = granularity_unit(granularity)
+        self._per_provider = self._fold is None
+
+    @property
+    def ratio(self) -> float:
+        return 0.0 if self._fold is None else 1 / self._fold  # 0.0: depends on the group width
+
+    def _block_size(self, width: int) -> int:
+        return self._fold if self._fold is not None else max(1, width) * self._unit
+
+    def _extract_blocks(self, data: memoryview, width: int) -> bytes:
+        block_size = self._block_size(width)
+        # xor the block's fold units of unit bytes each: single bytes unless folding across providers
+        unit = self._unit if self._fold is None else 1
+        fold = block_size // unit
+        if fold == 1:
+            return bytes(data)
+        if numpy is not None:
+            columns = numpy.frombuffer(data, dtype=numpy.uint8).reshape(-1, fold, unit)
+            return numpy.bitwise_xor.reduce(columns, axis=1).tobytes()
+        # without numpy: xor strided slices as big integers, one pass per fold offset and byte of the unit
+        length = len(data) // block_size
+        extracted = bytearray(length * unit)
+        for byte in range(unit):
+            accumulated = 0
+            for offset in range(fold):
+                accumulated ^= int.from_bytes(bytes(data[offset * unit + byte :: block_size]), "little")
+            extracted[byte::unit] = accumulated.to_bytes(length, "little")
+        return bytes(extracted)
+
+
+EXTRACTORS = {
+    "toeplitz": ToeplitzExtractor,
+    "xorfold": XorFoldExtractor,
+}
+
+
+def create_extractor(
+    name: str, ratio: Optional[float] = None, seed: int = 0, granularity: str = "byte"
+) -> Optional[Extractor]:
+    """create an extractor by name, "none" returning None to leave books untouched
+
+    granularity is the interleave granularity of the books, see XorFoldExtractor
+    """
+    if name == "none":
+        return None
+    if name == "toeplitz":
+        return ToeplitzExtractor(ratio=0.5 if ratio is None else ratio, seed=seed)
+    if name == "xorfold":
+        return XorFoldExtractor(ratio=ratio, granularity=granularity)
+    raise ValueError(f"Unknown extractor: {name}. Use: none, {', '.join(EXTRACTORS)}")
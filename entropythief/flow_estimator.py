@@ -0,0 +1,132 @@
+# flow_estimator
+# author: krunch3r (KJM github.com/krunch3r76)
+# license: General Poetic License (GPL3)
+
+"""
+estimates how fast consumers drain a writer and how fast books fill it, from counters
+the writer samples as it goes
+
+a writer samples three numbers: every byte it ever received, every byte its consumers
+ever took (for a named pipe, the bytes written to it less those still in it per FIONREAD)
+and the bytes it holds. the differences between samples give the rates, which are kept
+two ways:
+    - an exponentially weighted moving average, whose weight decays with the time
+      between samples rather than their count, so irregular sampling does not skew it
+    - a histogram of the rate in each second of a sliding window, whose percentiles tell
+      a steady reader from a bursty one (a median near zero and a high peak)
+
+the time to empty follows from the bytes held and the average rates
+"""
+
+import collections
+import math
+import time
+
+
+def _percentile(ordered: list, fraction: float) -> float:
+    """the value below which fraction of the sorted values lie, nearest rank"""
+    if len(ordered) == 0:
+        return 0.0
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+class FlowEstimator:
+    """drain and fill rates of a writer, and the time until its bytes run out
+
+    methods:
+        sample(received, consumed, held): record the writer's counters
+        rates(): the drain and fill rates
+        estimates(): the rates, their spread over the window and the times to empty
+    """
+
+    def __init__(self, halflife: float = 5.0, window: float = 60.0, interval: float = 0.05):
+        """
+        in:
+            halflife: seconds after which a rate seen counts half as much in the average
+            window: seconds of per second rates kept for the histograms
+            interval: least seconds between samples taken, closer ones are ignored
+        """
+        self._tau = halflife / math.log(2)
+        self._window = int(window)
+        self._interval = interval
+        self._last = None  # (time, received, consumed) of the last sample taken
+        self._held = 0
+        self._drain_rate = 0.0
+        self._fill_rate = 0.0
+        self._span = 0.0  # seconds between the first sample and the last
+        self._seconds = collections.deque()  # [second, drained, filled], oldest first
+
+    # ------------------FlowEstimator------------------
+    def sample(self, received: int, consumed: int, held: int, now: float = None) -> None:
+        """record the bytes ever received, ever consumed and currently held"""
+        # ----------------------------------------------
+        now = time.monotonic() if now is None else now
+        self._held = held
+        if self._last is None:
+            self._last = (now, received, consumed)
+            return
+        elapsed = now - self._last[0]
+        if elapsed < self._interval:
+            return
+        filled = max(0, received - self._last[1])
+        drained = max(0, consumed - self._last[2])  # a counter never runs backward
+        self._last = (now, received, consumed)
+
+        weight = 1.0 - math.exp(-elapsed / self._tau)
+        self._span += elapsed
+        self._drain_rate += weight * (drained / elapsed - self._drain_rate)
+        self._fill_rate += weight * (filled / elapsed - self._fill_rate)
+
+        # the bytes are credited to the second the sample was taken in
+        second = int(now)
+        if len(self._seconds) > 0 and self._seconds[-1][0] == second:
+            self._seconds[-1][1] += drained
+            self._seconds[-1][2] += filled
+        else:
+            self._seconds.append([second, drained, filled])
+        while self._seconds[0][0] <= second - self._window:
+            self._seconds.popleft()
+
+    def rates(self) -> tuple:
+        """the average drain and fill rates, in bytes per second"""
+        # the averages start from zero, which is corrected for by the weight they have
+        # gathered so far: early on they are the mean rate since the first sample
+        gathered = 1.0 - math.exp(-self._span / self._tau)
+        if gathered == 0:
+            return 0.0, 0.0
+        return self._drain_rate / gathered, self._fill_rate / gathered
+
+    # ------------------FlowEstimator------------------
+    def estimates(self, now: float = None) -> dict:
+        """rates in bytes per second and times in seconds
+
+        time_to_empty assumes books keep arriving at the fill rate, and is infinite while
+        they arrive faster than they drain. time_to_empty_unfed assumes none arrive, which
+        is the case between provisioning rounds
+        """
+        # ----------------------------------------------
+        now = time.monotonic() if now is None else now
+        first = int(now) - self._window + 1
+        # seconds of the window without samples saw no bytes move
+        drained = {second: count for second, count, _ in self._seconds if second >= first}
+        filled = {second: count for second, _, count in self._seconds if second >= first}
+        # the second under way is left out until complete
+        span = range(max(first, self._seconds[0][0]) if self._seconds else int(now), int(now))
+        drain_histogram = sorted(drained.get(second, 0) for second in span)
+        fill_histogram = sorted(filled.get(second, 0) for second in span)
+
+        drain_rate, fill_rate = self.rates()
+        net = drain_rate - fill_rate
+        return {
+            "held": self._held,
+            "drain_rate": drain_rate,
+            "fill_rate": fill_rate,
+            "drain_p50": _percentile(drain_histogram, 0.5),
+            "drain_p90": _percentile(drain_histogram, 0.9),
+            "drain_peak": _percentile(drain_histogram, 1.0),
+            "fill_p50": _percentile(fill_histogram, 0.5),
+            "fill_p90": _percentile(fill_histogram, 0.9),
+            "fill_peak": _percentile(fill_histogram, 1.0),
+            "time_to_empty": self._held / net if net > 0 else math.inf,
+            "time_to_empty_unfed": self._held / drain_rate if drain_rate > 0 else math.inf,
+        }
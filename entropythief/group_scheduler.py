@@ -0,0 +1,161 @@
+# group_scheduler
+# author: krunch3r (KJM github.com/krunch3r76)
+# license: General Poetic License (GPL3)
+
+"""
+queues the groups of task results waiting to be interleaved and decides which is next
+
+the Interleaver works on one group at a time, the head, until it has been exhausted.
+every other group waits in a queue ordered by the scheduler's policy:
+
+    fifo    - groups in the order they were committed, the original behavior
+    largest - the group with the most bytes first, measured in powers of two so that
+              groups within a factor of two of each other are served in fifo order
+    oldest  - the group holding the longest waiting result first, so that recovered
+              tails are not held up behind newer rounds
+
+every queue is a deque (largest keeps one per power of two, of which there are at most
+64), so pushing, selecting the next head and popping it are O(1) regardless of how many
+groups are waiting. oldest inserts from the back and only scans past newer groups, O(1)
+for the usual case of groups arriving in order
+"""
+
+import collections
+import time
+
+
+class _ScheduledGroup:
+    """a group of sources with the bookkeeping the scheduler needs"""
+
+    __slots__ = ("sources", "since", "queued", "size")
+
+    def __init__(self, sources, since, size):
+        self.sources = sources  # list of Interleaver__Source
+        self.since = since  # when the longest waiting source arrived
+        self.queued = time.monotonic()  # when the group was pushed
+        self.size = size  # bytes the sources had left when pushed
+
+
+class GroupScheduler:
+    """per Interleaver queue of source groups
+
+    methods:
+        push(sources, since): queue a group
+        head(): the sources of the group being worked, selecting one when there is none
+        prune_head(predicate): remove and return the head's sources matching predicate
+        pop_head(): remove and return the sources of the head group
+        clear(): remove and return the sources of every group
+        metrics(): queued groups, queued bytes and ages
+    """
+
+    POLICIES = ("fifo", "largest", "oldest")
+
+    def __init__(self, policy: str = "fifo"):
+        if policy not in self.POLICIES:
+            raise ValueError(f"Unknown group policy: {policy}. Use: {', '.join(self.POLICIES)}")
+        self._policy = policy
+        self._head = None  # _ScheduledGroup being worked, pinned until popped
+        self._queue = collections.deque()  # fifo and oldest
+        self._classes = collections.defaultdict(collections.deque)  # largest: bit_length -> groups
+        self._count = 0  # groups waiting, excluding the head
+        self._queued_bytes = 0  # bytes of the groups waiting, excluding the head
+
+    def __len__(self) -> int:
+        return self._count + (1 if self._head is not None else 0)
+
+    # ----------------GroupScheduler-------------------
+    def push(self, sources, since=None):
+        """queue a group of sources
+
+        in:
+            sources: list of Interleaver__Source
+            since: monotonic time the longest waiting source arrived, defaulting to now
+        """
+        # ----------------------------------------------
+        group = _ScheduledGroup(
+            sources,
+            time.monotonic() if since is None else since,
+            sum(source.remaining() for source in sources),
+        )
+        if self._policy == "largest":
+            self._classes[group.size.bit_length()].append(group)
+        elif self._policy == "oldest" and len(self._queue) > 0 and self._queue[-1].since > group.since:
+            # walk back past the newer groups, usually not at all
+            position = len(self._queue) - 1
+            while position > 0 and self._queue[position - 1].since > group.since:
+                position -= 1
+            self._queue.insert(position, group)
+        else:
+            self._queue.append(group)
+        self._count += 1
+        self._queued_bytes += group.size
+
+    # ----------------GroupScheduler-------------------
+    def _next(self):
+        """dequeue the next group by policy"""
+        # ----------------------------------------------
+        if self._policy == "largest":
+            size_class = max(size_class for size_class, groups in self._classes.items() if groups)
+            group = self._classes[size_class].popleft()
+        else:
+            group = self._queue.popleft()
+        self._count -= 1
+        self._queued_bytes -= group.size
+        return group
+
+    # ----------------GroupScheduler-------------------
+    def head(self):
+        """the sources of the group being worked, or None when nothing is queued"""
+        # ----------------------------------------------
+        if self._head is None and self._count > 0:
+            self._head = self._next()
+        return self._head.sources if self._head is not None else None
+
+    def prune_head(self, predicate):
+        """remove the head's sources for which predicate is true in one pass, returning them"""
+        sources = self.head()
+        if sources is None:
+            return []
+        kept, pruned = [], []
+        for source in sources:
+            (pruned if predicate(source) else kept).append(source)
+        if len(pruned) > 0:
+            sources[:] = kept  # in place, callers may hold the head list
+        return pruned
+
+    def pop_head(self):
+        """remove the head group returning its sources"""
+        sources = self.head()
+        self._head = None
+        return sources
+
+    def clear(self):
+        """remove every group, returning their sources"""
+        sources = []
+        while len(self) > 0:
+            sources.extend(self.pop_head())
+        return sources
+
+    # ----------------GroupScheduler-------------------
+    def metrics(self):
+        """report the depth and age of the queue
+
+        out: dict of
+            queued_groups: groups waiting, including the head
+            queued_bytes: bytes those groups have left
+            oldest_age: seconds the longest waiting source at the head or the front of a queue
+                        has waited
+            head_age: seconds since the head group was pushed
+        """
+        # ----------------------------------------------
+        now = time.monotonic()
+        fronts = [groups[0] for groups in [self._queue, *self._classes.values()] if groups]
+        if self._head is not None:
+            fronts.append(self._head)
+        head_bytes = sum(source.remaining() for source in self._head.sources) if self._head else 0
+        return {
+            "queued_groups": len(self),
+            "queued_bytes": self._queued_bytes + head_bytes,
+            "oldest_age": now - min((group.since for group in fronts), default=now),
+            "head_age": now - self._head.queued if self._head is not None else 0.0,
+        }
@@ -0,0 +1,223 @@
+# interleave
+# author: krunch3r (KJM github.com/krunch3r76)
+# license: General Poetic License (GPL3)
+
+"""
+interleave engines that weave equal length pages of task results into a single "book"
+
+every engine takes a sequence of pages (bytes-like, all of the same length) and returns
+the units of each page alternated across the pages, i.e.:
+
+    page0[0], page1[0], ..., pageN[0], page0[1], page1[1], ..., pageN[1], ...
+
+where a unit is set by the granularity:
+    bit   - single bits, most significant first (loop or numpy engines only)
+    byte  - single bytes, the original behavior
+    word  - 8 byte words
+    line  - 64 byte cache lines
+    block - 4 KiB blocks
+
+coarser units mix less finely but move far more bytes per operation. pages must be a
+whole number of units long, interleave_ragged() takes care of any that are not
+
+engines:
+    loop    - the original byte at a time loop, kept as the reference implementation
+    strided - extended slice assignment into a bytearray, standard library only
+    numpy   - columns of a 2d array flattened in row order (requires numpy)
+
+the engine is chosen at runtime by select_engine(), "auto" preferring numpy when it
+is importable and falling back to strided otherwise
+
+interleave_segments() reads the pages itself so that a book can be built in a worker
+process given only where the pages lie on disk
+"""
+
+import io
+import os
+from typing import Callable, Sequence, Union
+
+try:
+    import numpy
+except ModuleNotFoundError:
+    numpy = None
+
+
+BytesLike = Union[bytes, bytearray, memoryview]
+
+# bits alternated per turn at each granularity
+GRANULARITIES = {
+    "bit": 1,
+    "byte": 8,
+    "word": 64,
+    "line": 512,
+    "block": 32768,
+}
+
+
+def granularity_unit(granularity: str) -> int:
+    """the number of bytes pages must be a multiple of at the given granularity"""
+    try:
+        return max(1, GRANULARITIES[granularity] // 8)
+    except KeyError:
+        raise ValueError(
+            f"Unknown interleave granularity: {granularity}. Use: {', '.join(GRANULARITIES)}"
+        ) from None
+
+
+def interleave_loop(pages: Sequence[BytesLike], bits: int = 8) -> bytes:
+    """alternate one unit at a time across each page (reference implementation)"""
+    if bits == 1:
+        # collect the bits one at a time then pack them back up eight to a byte
+        accumulated = 0
+        for position in range(len(pages[0])):
+            for shift in range(7, -1, -1):
+                for page in pages:
+                    accumulated = (accumulated << 1) | ((page[position] >> shift) & 1)
+        return accumulated.to_bytes(len(pages[0]) * len(pages), "big")
+    unit = bits // 8
+    book = io.BytesIO()
+    readers = [io.BytesIO(page) for page in pages]
+    for _ in range(len(pages[0]) // unit):
+        for reader in readers:
+            book.write(reader.read(unit))
+    return book.getvalue()
+
+
+def interleave_strided(pages: Sequence[BytesLike], bits: int = 8) -> bytearray:
+    """assign each page to every n-th unit of the book starting at its own offset"""
+    if bits == 1:
+        raise ValueError("the strided engine cannot interleave single bits")
+    unit = bits // 8
+    count = len(pages)
+    book = bytearray(len(pages[0]) * count)
+    if unit == 1:
+        for offset, page in enumerate(pages):
+            book[offset::count] = page
+    elif unit <= 64:
+        # one extended slice of 64 bit words per word of the unit, each as long as the page has units
+        view = memoryview(book).cast("Q")
+        words = unit // 8
+        for offset, page in enumerate(pages):
+            page = memoryview(page).cast("B").cast("Q")
+            for word in range(words):
+                view[offset * words + word :: words * count] = page[word::words]
+    else:
+        # blocks are cheaper to copy whole than to stride over word by word
+        view = memoryview(book)
+        for offset, page in enumerate(pages):
+            for position, start in enumerate(range(0, len(page), unit)):
+                target = (position * count + offset) * unit
+                view[target : target + unit] = page[start : start + unit]
+    return book
+
+
+def interleave_numpy(pages: Sequence[BytesLike], bits: int = 8) -> bytes:
+    """stack each page as a column of units then read the matrix back out row by row"""
+    if bits == 1:
+        stacked = numpy.empty((len(pages[0]) * 8, len(pages)), dtype=numpy.uint8)
+        for column, page in enumerate(pages):
+            stacked[:, column] = numpy.unpackbits(numpy.frombuffer(page, dtype=numpy.uint8))
+        return numpy.packbits(stacked).tobytes()
+    # move whole 64 bit words where the unit allows rather than single bytes
+    dtype = numpy.uint64 if bits % 64 == 0 else numpy.uint8
+    words = bits // (8 * dtype().itemsize)
+    stacked = numpy.empty((len(pages[0]) * 8 // bits, len(pages), words), dtype=dtype)
+    for column, page in enumerate(pages):
+        stacked[:, column, :] = numpy.frombuffer(page, dtype=dtype).reshape(-1, words)
+    return stacked.tobytes()
+
+
+ENGINES = {
+    "loop": interleave_loop,
+    "strided": interleave_strided,
+}
+if numpy is not None:
+    ENGINES["numpy"] = interleave_numpy
+
+
+def interleave_ragged(
+    pages: Sequence[BytesLike],
+    engine: Callable[..., BytesLike],
+    granularity: str = "byte",
+) -> BytesLike:
+    """interleave pages of unequal length the way the reference loop does
+
+    positions past the end of a shorter page are skipped over, so the engine is applied
+    to the common prefix of whole units and then again to whatever remains of the longer
+    pages. a page ending part way through a unit takes its turn with the partial unit
+    """
+    bits = GRANULARITIES[granularity]
+    unit = granularity_unit(granularity)
+    pages = [page for page in pages if len(page) > 0]
+    if len(pages) == 0:
+        return b""
+    shortest = min(len(page) for page in pages)
+    whole = shortest - shortest % unit
+    if whole == shortest and all(len(page) == shortest for page in pages):
+        return engine(pages, bits)
+    parts = [engine([page[:whole] for page in pages], bits)] if whole > 0 else []
+    if whole < shortest:
+        # the turn in which the shortest page runs out
+        parts.append(b"".join(bytes(page[whole : whole + unit]) for page in pages))
+        whole += unit
+    parts.append(interleave_ragged([page[whole:] for page in pages], engine, granularity))
+    return b"".join(bytes(part) for part in parts)
+
+
+def ragged_runs(lengths: Sequence[int], granularity: str = "byte") -> list:
+    """the runs of the book interleave_ragged builds from pages of the given lengths
+
+    each run is a (count, width) pair: count bytes of whole turns across width pages. a
+    turn in which a page runs out part way through a unit is a run of width 0
+    """
+    unit = granularity_unit(granularity)
+    lengths = [length for length in lengths if length > 0]
+    runs = []
+    while len(lengths) > 0:
+        shortest = min(lengths)
+        whole = shortest - shortest % unit
+        if whole > 0:
+            runs.append((whole * len(lengths), len(lengths)))
+        if whole < shortest:
+            runs.append((sum(min(unit, length - whole) for length in lengths), 0))
+            whole += unit
+        lengths = [length - whole for length in lengths if length > whole]
+    return runs
+
+
+def select_engine(name: str = "auto", granularity: str = "byte") -> Callable[..., BytesLike]:
+    """return the interleave engine by name, "auto" selecting the fastest available
+
+    the granularity is only checked here, it is passed to the engine on each call
+    """
+    granularity_unit(granularity)  # raises on an unknown granularity
+    if name == "auto":
+        name = "numpy" if "numpy" in ENGINES else "strided"
+        if granularity == "bit" and name == "strided":
+            raise ModuleNotFoundError("bit granularity requires numpy, pip install numpy")
+    elif granularity == "bit" and name == "strided":
+        raise ValueError("the strided engine cannot interleave single bits, use loop or numpy")
+    try:
+        return ENGINES[name]
+    except KeyError:
+        raise ValueError(
+            f"Unknown interleave engine: {name}. Use: auto, {', '.join(ENGINES)}"
+        ) from None
+
+
+def interleave_segments(
+    segments, engine_name: str = "auto", granularity: str = "byte"
+) -> BytesLike:
+    """read each (path, offset, length) segment from disk and interleave them into a book
+
+    module level so that it can be pickled into the worker of a process pool
+    """
+    engine = select_engine(engine_name, granularity)
+    pages = []
+    for path, offset, length in segments:
+        fd = os.open(path, os.O_RDONLY)
+        try:
+            pages.append(os.pread(fd, length, offset))
+        finally:
+            os.close(fd)
+    return interleave_ragged(pages, engine, granularity)
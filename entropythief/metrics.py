@@ -0,0 +1,199 @@
+# metrics
+# author: krunch3r (KJM github.com/krunch3r76)
+# license: General Poetic License (GPL3)
+
+"""
+exports the state of the writer and the model in the Prometheus text format, over http
+on a local tcp port or a unix domain socket (see --metrics)
+
+metrics are registered with a function returning their value, which is only called when
+the endpoint is scraped, so nothing is counted twice and nothing runs between scrapes.
+a function may return a number, or a list of (labels, value) pairs for a metric with
+labels. a function that fails leaves its metric out of that scrape rather than failing
+the scrape
+
+e.g.
+    curl -s http://127.0.0.1:9464/metrics
+    curl -s --unix-socket /tmp/entropythief.metrics.sock http://localhost/metrics
+"""
+
+import asyncio
+import collections
+import math
+import os
+import time
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+_kMAX_REQUEST = 8192  # longest request head read before giving up on a client
+
+
+def _format_value(value) -> str:
+    if value is None or (isinstance(value, float) and math.isnan(value)):
+        return "NaN"
+    if value == math.inf:
+        return "+Inf"
+    if value == -math.inf:
+        return "-Inf"
+    return repr(float(value)) if isinstance(value, float) else str(int(value))
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labels: dict) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in labels.items()) + "}"
+
+
+class MetricsRegistry:
+    """named counters and gauges, each read from a function when rendered
+
+    methods:
+        counter(name, help, collect): register a value that only ever grows
+        gauge(name, help, collect): register a value that goes up and down
+        render(): every metric in the Prometheus text format
+    """
+
+    def __init__(self):
+        self._metrics = collections.OrderedDict()  # name -> (type, help, collect)
+
+    def _register(self, name, kind, help, collect) -> None:
+        if name in self._metrics:
+            raise ValueError(f"metric {name} is already registered")
+        self._metrics[name] = (kind, help, collect)
+
+    def counter(self, name: str, help: str, collect) -> None:
+        self._register(name, "counter", help, collect)
+
+    def gauge(self, name: str, help: str, collect) -> None:
+        self._register(name, "gauge", help, collect)
+
+    # ----------------MetricsRegistry-------------------
+    def render(self) -> str:
+        """every metric whose function succeeds, as HELP and TYPE lines then the samples"""
+        # -------------------------------------------------
+        lines = []
+        for name, (kind, help, collect) in self._metrics.items():
+            try:
+                value = collect()
+            except Exception:
+                continue  # e.g. the writer is between pipes, the rest are still reported
+            samples = value if isinstance(value, list) else [({}, value)]
+            lines.append(f"# HELP {name} {help}")
+            lines.append(f"# TYPE {name} {kind}")
+            for labels, sample in samples:
+                lines.append(f"{name}{_format_labels(labels)} {_format_value(sample)}")
+        return "\n".join(lines) + "\n"
+
+
+class LoopLagMonitor:
+    """measures how late the event loop wakes a coroutine that asks to sleep a fixed interval
+
+    the lag is what every other coroutine on the loop waits behind a step that does not
+    yield, e.g. interleaving a large book
+
+    methods:
+        run(): tick until cancelled
+        register(registry): export the lag
+    """
+
+    def __init__(self, interval: float = 0.1, window: float = 10.0):
+        """
+        in:
+            interval: seconds asked to sleep between ticks
+            window: seconds over which the worst lag is reported
+        """
+        self._interval = interval
+        self._lags = collections.deque(maxlen=max(1, int(window / interval)))
+        self.last = 0.0
+        self.total = 0.0  # seconds of lag summed over every tick
+        self.ticks = 0
+
+    async def run(self) -> None:
+        while True:
+            asked = time.monotonic()
+            await asyncio.sleep(self._interval)
+            self.last = max(0.0, time.monotonic() - asked - self._interval)
+            self._lags.append(self.last)
+            self.total += self.last
+            self.ticks += 1
+
+    def worst(self) -> float:
+        return max(self._lags, default=0.0)
+
+    def register(self, registry: MetricsRegistry, prefix: str = "entropythief") -> None:
+        registry.gauge(f"{prefix}_loop_lag_seconds", "lag of the latest tick of the event loop", lambda: self.last)
+        registry.gauge(f"{prefix}_loop_lag_max_seconds", "worst lag of the event loop over the window", self.worst)
+        registry.counter(f"{prefix}_loop_lag_seconds_total", "lag of the event loop summed over every tick", lambda: self.total)
+        registry.counter(f"{prefix}_loop_lag_ticks_total", "ticks the lag was measured over", lambda: self.ticks)
+
+
+class MetricsServer:
+    """serves a MetricsRegistry over http/1.0, on host:port or on a unix domain socket path
+
+    methods:
+        start(): listen, once the event loop is running
+        close(): stop listening
+    """
+
+    def __init__(self, registry: MetricsRegistry, address: str = "127.0.0.1:9464"):
+        """
+        in:
+            address: a path (containing "/") for a unix domain socket, otherwise [host]:port,
+                the host being 127.0.0.1 when left out
+        """
+        self._registry = registry
+        self._address = address
+        self._server = None
+        self.scrapes = 0
+
+    async def start(self) -> None:
+        if self._server is not None:
+            return
+        if "/" in self._address:
+            if os.path.exists(self._address):
+                os.unlink(self._address)  # left by an earlier run
+            self._server = await asyncio.start_unix_server(
+                self._on_client, self._address, limit=_kMAX_REQUEST
+            )
+        else:
+            host, _, port = self._address.rpartition(":")
+            self._server = await asyncio.start_server(
+                self._on_client, host or "127.0.0.1", int(port), limit=_kMAX_REQUEST
+            )
+
+    async def _on_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """answer a single request then close the connection"""
+        try:
+            head = await reader.readuntil(b"\r\n\r\n")
+            method, path, *_ = head.split(b"\r\n", 1)[0].decode("latin-1").split(" ")
+            if method not in ("GET", "HEAD"):
+                status, body = "405 Method Not Allowed", b""
+            elif path.split("?", 1)[0] in ("/", "/metrics"):
+                status, body = "200 OK", self._registry.render().encode()
+                self.scrapes += 1
+            else:
+                status, body = "404 Not Found", b""
+            writer.write(
+                f"HTTP/1.0 {status}\r\nContent-Type: {CONTENT_TYPE}\r\n"
+                f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode()
+            )
+            if method != "HEAD":
+                writer.write(body)
+            await writer.drain()
+        except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ValueError, ConnectionError):
+            pass  # not an http client, or it went away
+        finally:
+            writer.close()
+
+    def close(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            self._server = None
+            if "/" in self._address:
+                try:
+                    os.unlink(self._address)
+                except OSError:
+                    pass
@@ -25,9 +25,9 @@ from typing import AsyncIterable, Iterator
 from decimal import Decimal
 from dataclasses import dataclass, field
 import json
+import math
+import time
 import concurrent.futures
-from tempfile import gettempdir
-from uuid import uuid4
 import yapapi.rest
 
 try:
@@ -53,6 +53,9 @@ from yapapi.strategy import *
 
 # internal
 from . import utils
+from .metrics import MetricsRegistry, MetricsServer, LoopLagMonitor
+from .staging import is_out_of_space
+from . import ringlog
 from .worker import worker_public
 
 # from TaskResultWriter import Interleaver
@@ -62,17 +65,25 @@ kTASK_TIMEOUT = timedelta(
     minutes=5  # should be >= script timeout, which is actually used
 )
 DEVELOPER_LOG_EVENTS = True
+kREFILL_LEAD_SECONDS = 60.0  # assumed wait for a round's first result until one is timed
 
 
 _DEBUGLEVEL = (
     int(os.environ["PYTHONDEBUGLEVEL"]) if "PYTHONDEBUGLEVEL" in os.environ else 0
 )
 
-def _log_msg(msg, debug_level=0, color=utils.TEXT_COLOR_MAGENTA):
-    pass
-    if debug_level <= _DEBUGLEVEL:
-        print(f"\n[model.py] {color}{msg}{utils.TEXT_COLOR_DEFAULT}\n", file=sys.stderr)
-        # print(f"\n[model.py] {utils.TEXT_COLOR_MAGENTA}{msg}{utils.TEXT_COLOR_DEFAULT}\n", file=sys.stderr)
+# written to stderr in the background, see ringlog
+_log = ringlog.Logger(
+    "model",
+    formatter=lambda logger, created, thread, level, message: f"\n[model.py] {message}\n",
+    threshold=_DEBUGLEVEL,
+)
+kPROVISION_LOG_INTERVAL = 1.0  # least seconds between logs of the provisioning decision
+
+
+def _log_msg(msg, debug_level=0, color=utils.TEXT_COLOR_MAGENTA, every=None):
+    if _log.enabled(debug_level):
+        _log.log(debug_level, f"{color}{msg}{utils.TEXT_COLOR_DEFAULT}", every=every, stacklevel=2)
 
 
 # ==============================================================================
@@ -138,6 +149,9 @@ class model__EntropyThief:
         self.TASK_TIMEOUT = TASK_TIMEOUT
         self._costRunning = 0.0
         self.ENTROPY_BUFFER_CAPACITY = ENTROPY_BUFFER_CAPACITY
+        self._refillLeadSeconds = kREFILL_LEAD_SECONDS  # from provisioning to the first result
+        self._countRounds = 0  # provisioning rounds started
+        self._countResults = {"accepted": 0, "rejected": 0}  # task results seen
 
         # output yapapi logger INFO events to stderr and INFO+DEBUG to args.log_fle
         if not self.args.disable_logging:
@@ -158,6 +172,117 @@ class model__EntropyThief:
         # This method is now obsolete since we no longer track previous value.
         pass
 
+    # -----------model__EntropyThief------------------------ #
+    def _register_metrics(self, registry):
+        """registers the state of the writer and the model for export (see --metrics)"""
+        # ------------------------------------------------------ #
+        trw = self.taskResultWriter
+        writer = trw._writerPipe
+
+        def flow_stat(key):
+            return lambda: writer.get_data_flow_stats()[key]
+
+        def cost_per_gib():
+            gib = trw._bytesSeen / 2**30
+            return self._costRunning / gib if gib > 0 else math.nan
+
+        def per_pipe(key):
+            return lambda: [({"path": pipe["path"]}, pipe[key]) for pipe in writer.get_pipe_stats()]
+
+        def flow_estimate(key):
+            return lambda: trw.get_flow_estimates()[key]
+
+        def queue_stat(key):
+            return lambda: trw.get_queue_stats().get(key, 0)
+
+        def per_pipe_size(key):
+            return lambda: [
+                ({"path": pipe["path"]}, pipe[key]) for pipe in writer.get_pipe_sizes() if key in pipe
+            ]
+
+        counters = [
+            ("entropythief_bytes_received_total", "bytes handed to the pipe writer", flow_stat("total_received")),
+            ("entropythief_bytes_rejected_total", "bytes the pipe writer dropped", flow_stat("total_rejected")),
+            ("entropythief_bytes_to_pipe_total", "bytes written into the pipe(s)", flow_stat("total_to_pipe")),
+            ("entropythief_bytes_purchased_total", "bytes of task results received", lambda: trw._bytesSeen),
+            ("entropythief_provisioning_rounds_total", "provisioning rounds started", lambda: self._countRounds),
+            (
+                "entropythief_task_results_total",
+                "task results by outcome",
+                lambda: [({"outcome": outcome}, count) for outcome, count in self._countResults.items()],
+            ),
+            ("entropythief_cost_total", "cost incurred so far", lambda: self._costRunning),
+        ]
+        gauges = [
+            ("entropythief_pipe_bytes", "bytes in the pipe(s), ready for readers", writer.len_accessible),
+            (
+                "entropythief_writer_buffered_bytes",
+                "bytes the pipe writer holds until the pipe(s) take them",
+                writer._count_bytes_in_internal_buffers,
+            ),
+            ("entropythief_buffered_bytes", "bytes in the pipe(s), the writer and the reservoir", lambda: len(trw)),
+            (
+                "entropythief_buffer_capacity_bytes",
+                "bytes kept buffered before provisioning stops",
+                lambda: self.ENTROPY_BUFFER_CAPACITY,
+            ),
+            (
+                "entropythief_buffer_fill_ratio",
+                "buffered bytes over the buffer capacity",
+                lambda: len(trw) / self.ENTROPY_BUFFER_CAPACITY,
+            ),
+            (
+                "entropythief_drain_rate_bytes_per_second",
+                "rate readers drain the buffer at (ewma)",
+                flow_estimate("drain_rate"),
+            ),
+            (
+                "entropythief_fill_rate_bytes_per_second",
+                "rate results fill the buffer at (ewma)",
+                flow_estimate("fill_rate"),
+            ),
+            (
+                "entropythief_time_to_empty_seconds",
+                "seconds until the buffer runs dry if no more results arrive",
+                flow_estimate("time_to_empty_unfed"),
+            ),
+            ("entropythief_queued_groups", "groups of results waiting to be written", queue_stat("queued_groups")),
+            ("entropythief_queued_bytes", "bytes of results waiting to be written", queue_stat("queued_bytes")),
+            (
+                "entropythief_refill_lead_seconds",
+                "seconds from provisioning to a round's first result",
+                lambda: self._refillLeadSeconds,
+            ),
+            ("entropythief_budget", "budget for the session", lambda: self.BUDGET),
+            ("entropythief_cost_per_gib", "cost incurred per GiB of results received", cost_per_gib),
+            ("entropythief_paused", "1 while provisioning is paused", lambda: int(self.OP_PAUSE)),
+        ]
+        if hasattr(writer, "get_pipe_stats"):
+            gauges += [
+                ("entropythief_pipe_fill_bytes", "bytes in each consumer's pipe", per_pipe("in_pipe")),
+                ("entropythief_pipe_target_bytes", "bytes kept ready for each consumer", per_pipe("target_fill")),
+            ]
+        if hasattr(writer, "get_pipe_sizes"):
+            gauges += [
+                ("entropythief_pipe_size_bytes", "capacity of each named pipe (F_SETPIPE_SZ)", per_pipe_size("size")),
+                (
+                    "entropythief_pipe_burst_bytes",
+                    "90th percentile of the bytes readers take between the writer's looks",
+                    per_pipe_size("burst_p90"),
+                ),
+            ]
+            counters.append(
+                (
+                    "entropythief_pipe_resizes_total",
+                    "times each named pipe was resized to what its readers take (--pipe-size adaptive)",
+                    per_pipe_size("resizes"),
+                )
+            )
+        for name, help, collect in counters:
+            registry.counter(name, help, collect)
+        for name, help, collect in gauges:
+            registry.gauge(name, help, collect)
+
     # -----------model__EntropyThief------------------------ #
     def _hook_controller(self, qmsg):
         """processes the signal from the controller to update internal state"""
@@ -214,44 +339,61 @@ class model__EntropyThief:
 
         ## BEGIN ROUTINE _provision
         count_bytes_requested = self.ENTROPY_BUFFER_CAPACITY - len(self.taskResultWriter)
-        
-        # DEBUG: Log provisioning decision details
         current_buffered = len(self.taskResultWriter)
-        
-        # DEBUG: Break down what's in the buffer
-        pipe_writer = self.taskResultWriter._writerPipe
-        pipe_bytes = pipe_writer.len_accessible() if hasattr(pipe_writer, 'len_accessible') else 'N/A'
-        internal_bytes = pipe_writer._count_bytes_in_internal_buffers() if hasattr(pipe_writer, '_count_bytes_in_internal_buffers') else 'N/A'
-        total_pipe_writer = pipe_writer.len_total_buffered() if hasattr(pipe_writer, 'len_total_buffered') else 'N/A'
-        
-        _log_msg(f"_provision() - ENTROPY_BUFFER_CAPACITY: {self.ENTROPY_BUFFER_CAPACITY:,}", 3)
-        _log_msg(f"_provision() - len(taskResultWriter): {current_buffered:,}", 3)
-        _log_msg(f"_provision() - PipeWriter breakdown:", 3)
-        _log_msg(f"    pipe_bytes (accessible): {pipe_bytes}", 3)
-        _log_msg(f"    internal_buffer_bytes: {internal_bytes}", 3)
-        _log_msg(f"    total_pipe_writer_bytes: {total_pipe_writer}", 3)
-        _log_msg(f"_provision() - count_bytes_requested: {count_bytes_requested:,}", 3)
-        _log_msg(f"_provision() - pending: {self.taskResultWriter.pending}", 3)
-        _log_msg(f"_provision() - cost_running: {self._costRunning:.4f}", 3)
-        _log_msg(f"_provision() - budget_remaining: {(self.BUDGET - 0.02):,.4f}", 3)
+        flow = self.taskResultWriter.get_flow_estimates()
+
+        # DEBUG: Log provisioning decision details, at most every kPROVISION_LOG_INTERVAL
+        # as this runs on every pass of the loop
+        log_decision = _log.enabled(3) and _log.due("_provision", kPROVISION_LOG_INTERVAL)
+        if log_decision:
+            # DEBUG: Break down what's in the buffer
+            pipe_writer = self.taskResultWriter._writerPipe
+            pipe_bytes = pipe_writer.len_accessible() if hasattr(pipe_writer, 'len_accessible') else 'N/A'
+            internal_bytes = pipe_writer._count_bytes_in_internal_buffers() if hasattr(pipe_writer, '_count_bytes_in_internal_buffers') else 'N/A'
+            total_pipe_writer = pipe_writer.len_total_buffered() if hasattr(pipe_writer, 'len_total_buffered') else 'N/A'
+
+            _log_msg(f"_provision() - ENTROPY_BUFFER_CAPACITY: {self.ENTROPY_BUFFER_CAPACITY:,}", 3)
+            _log_msg(f"_provision() - len(taskResultWriter): {current_buffered:,}", 3)
+            _log_msg(f"_provision() - PipeWriter breakdown:", 3)
+            _log_msg(f"    pipe_bytes (accessible): {pipe_bytes}", 3)
+            _log_msg(f"    internal_buffer_bytes: {internal_bytes}", 3)
+            _log_msg(f"    total_pipe_writer_bytes: {total_pipe_writer}", 3)
+            if hasattr(pipe_writer, "get_pipe_stats"):
+                _log_msg(f"    per pipe: {pipe_writer.get_pipe_stats()}", 3)
+            _log_msg(f"_provision() - count_bytes_requested: {count_bytes_requested:,}", 3)
+            _log_msg(f"_provision() - pending: {self.taskResultWriter.pending}", 3)
+            _log_msg(f"_provision() - queued groups: {self.taskResultWriter.get_queue_stats()}", 3)
+            _log_msg(f"_provision() - staging: {self.taskResultWriter.staging.stats()}", 3)
+            _log_msg(f"_provision() - flow: {flow}", 3)
+            _log_msg(f"_provision() - cost_running: {self._costRunning:.4f}", 3)
+            _log_msg(f"_provision() - budget_remaining: {(self.BUDGET - 0.02):,.4f}", 3)
 
         # 2.4.1)  test if bytes available from task result writer are beneath threshold
         #     2   test if within budget
         condition_1 = count_bytes_requested > 0
         condition_2 = not self.taskResultWriter.pending
-        condition_3 = len(self.taskResultWriter) < int(self.ENTROPY_BUFFER_CAPACITY / 2)
+        # beneath half capacity, or draining fast enough to run dry before a round started
+        # now could deliver its first result
+        condition_3 = len(self.taskResultWriter) < int(self.ENTROPY_BUFFER_CAPACITY / 2) or (
+            flow.get("time_to_empty_unfed", math.inf) < self._refillLeadSeconds
+        )
         condition_4 = self._costRunning < (self.BUDGET - 0.02)
         
-        _log_msg(f"Provisioning conditions:", 3)
-        _log_msg(f"  bytes_requested > 0: {condition_1} ({count_bytes_requested:,} > 0)", 3)
-        _log_msg(f"  not pending: {condition_2}", 3)
-        _log_msg(f"  buffer < 50% capacity: {condition_3} ({current_buffered:,} < {int(self.ENTROPY_BUFFER_CAPACITY / 2):,})", 3)
-        _log_msg(f"  within budget: {condition_4} ({self._costRunning:.4f} < {(self.BUDGET - 0.02):.4f})", 3)
-        _log_msg(f"  ALL CONDITIONS MET: {condition_1 and condition_2 and condition_3 and condition_4}", 3)
+        if log_decision:
+            _log_msg(f"Provisioning conditions:", 3)
+            _log_msg(f"  bytes_requested > 0: {condition_1} ({count_bytes_requested:,} > 0)", 3)
+            _log_msg(f"  not pending: {condition_2}", 3)
+            _log_msg(f"  buffer < 50% capacity or emptying before refill: {condition_3} ({current_buffered:,} < {int(self.ENTROPY_BUFFER_CAPACITY / 2):,}"
+                     f", {flow.get('time_to_empty_unfed', math.inf):.1f}s < {self._refillLeadSeconds:.1f}s)", 3)
+            _log_msg(f"  within budget: {condition_4} ({self._costRunning:.4f} < {(self.BUDGET - 0.02):.4f})", 3)
+            _log_msg(f"  ALL CONDITIONS MET: {condition_1 and condition_2 and condition_3 and condition_4}", 3)
         
         if (
             condition_1 and condition_2 and condition_3 and condition_4
         ):
+            round_started = time.monotonic()
+            first_result_seen = False
+            self._countRounds += 1
             package = await vm.repo(
                 image_hash=self.IMAGE_HASH, min_mem_gib=0.3, min_storage_gib=0.3
             )
@@ -308,6 +450,10 @@ class model__EntropyThief:
                             f"::[provision()] saw a task result, its contents are {task.result}",
                             1,
                         )
+                        self._countResults["accepted"] += 1
+                        if not first_result_seen:
+                            first_result_seen = True
+                            self._refillLeadSeconds = time.monotonic() - round_started
                         self.taskResultWriter.add_result_file(task.result)
                         _log_msg(
                             f"::[provision()] number of task results added to writer: {self.taskResultWriter.count_uncommitted()}",
@@ -317,15 +463,18 @@ class model__EntropyThief:
 
                     else:
                         _log_msg(f"::[provision()] saw rejected result", 1)
+                        self._countResults["rejected"] += 1
                         pass  # no result implies rejection which steps reprovisions
                 #                                                                   /
 
+                # results already streamed into a group (see Interleaver min_group_results)
+                # are not committed again, only the late arrivals still pending
                 _log_msg(f"::[provision()] committing added files now", 1)
                 self.taskResultWriter.commit_added_result_files()
 
                 ####################################################################\
         else:
-            _log_msg(f"DEBUG: Provisioning SKIPPED - conditions not met", 3)
+            _log_msg(f"DEBUG: Provisioning SKIPPED - conditions not met", 3, every=kPROVISION_LOG_INTERVAL)
 
     # ---------model_EntropyThief----------
     async def __call__(self):
@@ -365,10 +514,22 @@ class model__EntropyThief:
         except Exception as e:
             print(f"Exception thrown in call to model: {e}\n", file=sys.stderr)
             sys.exit(1)
+        # export the state of the writer and the model for scraping (see --metrics)
+        metrics_server = None
+        if self.args.metrics:
+            registry = MetricsRegistry()
+            self._register_metrics(registry)
+            loop_lag = LoopLagMonitor()
+            loop_lag.register(registry)
+            lag_task = asyncio.create_task(loop_lag.run())
+            metrics_server = MetricsServer(registry, self.args.metrics)
+            await metrics_server.start()
+
         try:
             # see if there are any bytes already in the pipe # may not be necessary
             # self.bytesInPipe = len(self.taskResultWriter)
 
+            flow_reported = 0.0
             while not self.OP_STOP:
                 # 2.1) flush any pending processes/buffers in the task result writer
                 # await self.taskResultWriter.refresh()
@@ -376,6 +537,9 @@ class model__EntropyThief:
                 # 2.2) query task result writer for the number of bytes stored and relay to controller
                 msg = {"bytesInPipe": len(self.taskResultWriter)}
                 self.to_ctl_q.put_nowait(msg)
+                if time.monotonic() - flow_reported > 1.0:
+                    flow_reported = time.monotonic()
+                    self.to_ctl_q.put_nowait({"flow": self.taskResultWriter.get_flow_estimates()})
 
                 # 2.3) receive and handle a message from the controller if any
                 if not self.from_ctl_q.empty():
@@ -428,7 +592,14 @@ class model__EntropyThief:
             msg = {"model exception": {"name": e.__class__.__name__, "what": str(e)}}
             self.to_ctl_q.put_nowait(msg)
         finally:
-            msg = {"bytesPurchased": self.taskResultWriter._bytesSeen}
+            if metrics_server is not None:
+                metrics_server.close()
+                lag_task.cancel()
+            msg = {
+                "bytesPurchased": self.taskResultWriter._bytesSeen,
+                "tailStats": self.taskResultWriter.get_tail_stats(),
+                "stagingStats": self.taskResultWriter.staging.stats(),
+            }
             self.to_ctl_q.put_nowait(msg)
             # send a message back to the controller that the (daemonized) process has cleanly exited
             # consider a more clean exit by checking if task is running first
@@ -438,6 +609,7 @@ class model__EntropyThief:
                 # loop.run_until_complete(task)
             except:
                 pass
+            ringlog.flush()  # the process may end before the thread writes the last records
             msg = {"daemon": "finished"}
             self.to_ctl_q.put_nowait(msg)
 
@@ -472,42 +644,59 @@ async def steps(_ctx: yapapi.WorkContext, tasks: AsyncIterable[yapapi.Task]):
         ################################################
         # download the results on successful execution #
         ################################################
-        Path_output_file = Path(gettempdir()) / str(uuid4())
+        # to the writer's staging area when it has room, otherwise the temporary directory
+        staging = task.data["writer"].staging
+        Path_output_file = Path(staging.path_for(task.data["req_byte_count"]))
         script.download_file(worker_public.RESULT_PATH, str(Path_output_file))
 
-        # note: reject_result on exceptions behavior may have changed with recent yapapi updates
-        # TODO: test
-        try:
-            yield script
-        except rest.activity.BatchTimeoutError:  # credit to Golem's blender.py
-            print(
-                f"{utils.TEXT_COLOR_RED}"
-                f"Task {task} timed out on {_ctx.provider_name}, time: {task.running_time}"
-                f"{utils.TEXT_COLOR_DEFAULT}",
-                file=sys.stderr,
-            )
-            task.reject_result("timeout", retry=True)  # retry false is scary
-        except Exception as e:  # define exception TODO
-            print(
-                f"{utils.TEXT_COLOR_RED}"
-                f"A task threw an exception."
-                f"{utils.TEXT_COLOR_DEFAULT}",
-                file=sys.stderr,
-            )
-            print(e, file=sys.stderr)
-            # raise # exception will be caught by yapapi to place the task back in the queue???
-            # maybe don't raise because we need to cleanup reject instead
-            task.reject_result("unspecified error", retry=True)  # retry false is scary
-        else:
-            ###################################################
-            # accept the downloaded file as the task result   #
-            ###################################################
-            task.accept_result(result=str(Path_output_file))
-            script = _ctx.new_script(timeout=SCRIPT_TIMEOUT)
-        finally:
-            if not task.result:
-                if Path_output_file and Path_output_file.exists():
-                    Path_output_file.unlink()
+        downloading = True
+        while downloading:
+            downloading = False
+            # note: reject_result on exceptions behavior may have changed with recent yapapi updates
+            # TODO: test
+            try:
+                yield script
+            except rest.activity.BatchTimeoutError:  # credit to Golem's blender.py
+                print(
+                    f"{utils.TEXT_COLOR_RED}"
+                    f"Task {task} timed out on {_ctx.provider_name}, time: {task.running_time}"
+                    f"{utils.TEXT_COLOR_DEFAULT}",
+                    file=sys.stderr,
+                )
+                task.reject_result("timeout", retry=True)  # retry false is scary
+            except Exception as e:  # define exception TODO
+                if staging.is_staged(str(Path_output_file)) and is_out_of_space(e):
+                    # the staging directory filled up short of its quota, the result is still
+                    # on the provider so it is downloaded again, to the temporary directory
+                    _log_msg(f"staging full, downloading {task} again to the temporary directory", 1)
+                    downloading = True
+                else:
+                    print(
+                        f"{utils.TEXT_COLOR_RED}"
+                        f"A task threw an exception."
+                        f"{utils.TEXT_COLOR_DEFAULT}",
+                        file=sys.stderr,
+                    )
+                    print(e, file=sys.stderr)
+                    # raise # exception will be caught by yapapi to place the task back in the queue???
+                    # maybe don't raise because we need to cleanup reject instead
+                    task.reject_result("unspecified error", retry=True)  # retry false is scary
+            else:
+                ###################################################
+                # accept the downloaded file as the task result   #
+                ###################################################
+                staging.landed(str(Path_output_file))
+                task.accept_result(result=str(Path_output_file))
+                script = _ctx.new_script(timeout=SCRIPT_TIMEOUT)
+            finally:
+                if not task.result:
+                    if Path_output_file and Path_output_file.exists():
+                        Path_output_file.unlink()
+                    staging.discard(str(Path_output_file))
+            if downloading:
+                Path_output_file = Path(staging.spill_path())
+                script = _ctx.new_script(timeout=SCRIPT_TIMEOUT)
+                script.download_file(worker_public.RESULT_PATH, str(Path_output_file))
 
 
 ##########################{}##################################################
@@ -0,0 +1,98 @@
+# pipe_sizer
+# author: krunch3r (KJM github.com/krunch3r76)
+# license: General Poetic License (GPL3)
+
+"""
+chooses the capacity of a named pipe (F_SETPIPE_SZ) from how its readers drain it
+
+every byte of a pipe's capacity is kernel memory held for as long as the pipe is open,
+whether or not readers need it. what they need is enough to go on reading while the
+writer is not looking: the bytes taken between two of the writer's wake ups, and the
+bytes taken at the drain rate over the writer's latency. a pipe smaller than that runs
+dry and the reader waits, wakes and waits again for the writer; a pipe larger only
+holds memory.
+
+PipeSizer keeps the bytes taken between successive looks of the writer (its bursts)
+over a window and, every interval, proposes the smallest power of two covering
+headroom times the 90th percentile burst and the drain over the latency, within
+[minimum, maximum]. it grows the pipe at once and shrinks it only once a quarter of the
+capacity would do, so a pipe is not resized back and forth
+"""
+
+import collections
+import time
+
+
+def _round_up_pow2(count: int) -> int:
+    return 1 << max(0, count - 1).bit_length()
+
+
+class PipeSizer:
+    """proposes pipe capacities from the bursts readers take and their drain rate
+
+    methods:
+        observe(consumed): record the bytes ever consumed, each time the writer looks
+        due(): whether an interval has passed since the last proposal
+        propose(size, drain_rate): a new capacity for a pipe of size, or None to keep it
+        stats(): the bursts and capacity proposed
+    """
+
+    def __init__(self, minimum: int = 65536, maximum: int = 2**20, latency: float = 0.05,
+                 headroom: float = 2.0, interval: float = 5.0, window: int = 256):
+        """
+        in:
+            minimum, maximum: bounds of the capacities proposed, maximum normally being
+                /proc/sys/fs/pipe-max-size
+            latency: seconds the writer may take to notice room in the pipe
+            headroom: multiple of the 90th percentile burst the pipe holds
+            interval: least seconds between proposals
+            window: bursts kept
+        """
+        self._minimum = _round_up_pow2(minimum)
+        self._maximum = maximum
+        self._latency = latency
+        self._headroom = headroom
+        self._interval = interval
+        self._bursts = collections.deque(maxlen=window)
+        self._last_consumed = None
+        self._last_proposal = time.monotonic()
+        self.target = None  # the capacity last computed
+        self.resizes = 0
+
+    def observe(self, consumed: int) -> None:
+        """record the bytes readers have ever consumed, as the writer sees them"""
+        if self._last_consumed is not None and consumed > self._last_consumed:
+            self._bursts.append(consumed - self._last_consumed)
+        self._last_consumed = consumed
+
+    def burst(self) -> int:
+        """the 90th percentile of the bytes taken between the writer's looks"""
+        if len(self._bursts) == 0:
+            return 0
+        ordered = sorted(self._bursts)
+        return ordered[min(len(ordered) - 1, int(0.9 * len(ordered)))]
+
+    def due(self, now: float = None) -> bool:
+        now = time.monotonic() if now is None else now
+        return now - self._last_proposal >= self._interval and len(self._bursts) > 0
+
+    # ------------------PipeSizer------------------
+    def propose(self, size: int, drain_rate: float, now: float = None):
+        """a capacity for a pipe of size bytes, None while it should be kept"""
+        # ---------------------------------------------
+        now = time.monotonic() if now is None else now
+        if not self.due(now):
+            return None
+        self._last_proposal = now
+        needed = max(self._headroom * self.burst(), drain_rate * self._latency)
+        self.target = min(self._maximum, max(self._minimum, _round_up_pow2(int(needed))))
+        if self.target > size or self.target * 4 <= size:
+            return self.target
+        return None
+
+    def resized(self) -> None:
+        """count a capacity proposed being applied"""
+        self.resizes += 1
+
+    def stats(self) -> dict:
+        return {"burst_p90": self.burst(), "target": self.target, "resizes": self.resizes}
@@ -17,151 +17,115 @@ import os
 import fcntl
 import asyncio
 import termios
-import io
 import collections
+import ctypes
+import mmap
 import time
-import logging
 from typing import Optional, Union
 import multiprocessing
-import queue
 import sys
 
+from .shm_ring import SharedRing, SharedCounters
+from .flow_estimator import FlowEstimator
+from .pipe_sizer import PipeSizer
+from . import ringlog
+
 
 _DEBUGLEVEL = (
     int(os.environ["PYTHONDEBUGLEVEL"]) if "PYTHONDEBUGLEVEL" in os.environ else 0
 )
 
+try:
+    _kIOV_MAX = os.sysconf("SC_IOV_MAX")  # most buffers a single writev takes
+except (ValueError, OSError):
+    _kIOV_MAX = 1024
 
-# Configure file-based logging for pipe_writer (NO stderr output)
-def _setup_pipe_writer_logging():
-    """Set up file-based logging for pipe_writer module"""
-    logger = logging.getLogger('pipe_writer')
-    
-    # Don't add handlers if already configured
-    if logger.handlers:
-        return logger
-    
-    # Set log level based on PYTHONDEBUGLEVEL
-    if _DEBUGLEVEL >= 3:
-        logger.setLevel(logging.DEBUG)
-    elif _DEBUGLEVEL >= 2:
-        logger.setLevel(logging.INFO)
-    elif _DEBUGLEVEL >= 1:
-        logger.setLevel(logging.WARNING)
-    else:
-        logger.setLevel(logging.ERROR)
-    
-    # Create file handler - write to .logs/pipewriter.log
-    log_dir = ".logs"
-    log_file = os.path.join(log_dir, "pipewriter.log")
-    try:
-        os.makedirs(log_dir, exist_ok=True)
-        file_handler = logging.FileHandler(log_file, mode='w')  # Clear file on each run
-    except Exception:
-        # Fallback to /tmp if main log directory fails
-        fallback_log = f"/tmp/pipe_writer_fallback_{os.getpid()}.log"
-        file_handler = logging.FileHandler(fallback_log, mode='w')  # Clear file on each run
-    
-    # Create formatter with thread information
-    formatter = logging.Formatter(
-        '[%(asctime)s] [Thread-%(thread)d] [%(name)s] [%(levelname)s] %(message)s',
-        datefmt='%Y-%m-%d %H:%M:%S'
-    )
-    file_handler.setFormatter(formatter)
-    
-    # Add handler to logger
-    logger.addHandler(file_handler)
-    
-    # Prevent propagation to root logger (avoid any stderr output)
-    logger.propagate = False
-    
-    # Log session start
-    logger.info("=== PipeWriter Session Started ===")
-    
-    return logger
 
+# file-based logging for pipe_writer (NO stderr output), written out in the background
+_log = ringlog.Logger("pipe_writer", ringlog.file_sink(os.path.join(".logs", "pipewriter.log")),
+                      threshold=_DEBUGLEVEL)
+_log.log(2, "=== PipeWriter Session Started ===")
 
-# Initialize the logger
-_logger = _setup_pipe_writer_logging()
 
+def _log_msg(msg, debug_level: int = 0, *args, every: float = None) -> None:
+    """log to .logs/pipewriter.log, formatting msg with args only if debug_level is enabled
 
-def _log_msg(msg: str, debug_level: int = 0) -> None:
-    """File-based logging function - NO stderr output"""
-    # Map debug levels to logging levels
-    if debug_level <= 0:
-        _logger.error(msg)
-    elif debug_level == 1:
-        _logger.warning(msg)
-    elif debug_level == 2:
-        _logger.info(msg)
-    else:  # debug_level >= 3
-        _logger.debug(msg)
+    msg may also be a function returning the message (see ringlog)
+    """
+    _log.log(debug_level, msg, *args, every=every, stacklevel=2)
 
 
 def log_exception(e: Exception, location: str) -> None:
     """Log exception details to file with context"""
-    _logger.error(f"Exception in {location}: {type(e).__name__}: {e}")
+    _log.log(0, "Exception in {}: {}: {}", location, type(e).__name__, e)
 
 
-class OptimizedBytesIO(io.BytesIO):
-    """Optimized BytesIO wrapper for efficient streaming"""
-    
-    def __init__(self, initial_value: Union[bytes, bytearray, memoryview]):
-        if not isinstance(initial_value, (bytes, bytearray, memoryview)):
-            raise TypeError(f"Expected bytes-like object, got {type(initial_value).__name__}")
-        
-        super().__init__(initial_value)
-        self.seek(0, io.SEEK_END)
-        self.__end = self.tell()
-        self.seek(0, io.SEEK_SET)
-    
-    @property
-    def end(self) -> int:
-        return self.__end
-    
+class ViewChunk:
+    """a view of a producer's buffer with a cursor at the first byte not yet written"""
+
+    __slots__ = ("view", "offset")
+
+    def __init__(self, view: memoryview):
+        self.view = view
+        self.offset = 0
+
     def len(self) -> int:
-        return self.__end - self.tell()
-    
+        return len(self.view) - self.offset
+
     def __len__(self) -> int:
         return self.len()
-    
-    def putback(self, count: int) -> None:
-        """Move read position back by count bytes"""
-        self.seek(-count, io.SEEK_CUR)
 
+    def peek(self, count: int) -> memoryview:
+        """a view of up to count unwritten bytes, leaving the cursor"""
+        return self.view[self.offset : self.offset + count]
+
+
+class ViewChunkDeque(collections.deque):
+    """Deque of ViewChunk with running total tracking for efficient length calculation
+
+    nothing is copied in or out: chunks are views of the buffers written, and consume()
+    moves cursors and drops the chunks written in full
+    """
 
-class OptimizedBytesDeque(collections.deque):
-    """Deque with running total tracking for efficient length calculation"""
-    
     def __init__(self):
         super().__init__()
         self._running_total = 0
-    
-    def append(self, bytes_io: OptimizedBytesIO) -> None:
-        if not isinstance(bytes_io, OptimizedBytesIO):
-            raise TypeError("Expected OptimizedBytesIO object")
-        self._running_total += len(bytes_io)
-        super().append(bytes_io)
-    
-    def appendleft(self, bytes_io: OptimizedBytesIO) -> None:
-        if not isinstance(bytes_io, OptimizedBytesIO):
-            raise TypeError("Expected OptimizedBytesIO object")
-        self._running_total += len(bytes_io)
-        super().appendleft(bytes_io)
-    
-    def popleft(self) -> OptimizedBytesIO:
-        rv = super().popleft()
-        self._running_total -= len(rv)
-        return rv
-    
+
+    def append(self, chunk: ViewChunk) -> None:
+        self._running_total += len(chunk)
+        super().append(chunk)
+
+    def consume(self, count: int) -> None:
+        """Advance past count bytes from the front"""
+        self._running_total -= count
+        while count > 0:
+            chunk = self[0]
+            taken = min(count, chunk.len())
+            chunk.offset += taken
+            count -= taken
+            if chunk.len() == 0:
+                super().popleft()
+
+    def take(self, count: int) -> list:
+        """Remove up to count bytes from the front, returned as a list of views"""
+        views = []
+        taken = 0
+        for chunk in self:
+            if taken >= count:
+                break
+            views.append(chunk.peek(count - taken))
+            taken += len(views[-1])
+        self.consume(taken)
+        return views
+
     def clear(self) -> None:
         """Clear all items and reset running total"""
         super().clear()
         self._running_total = 0
-    
+
     def len(self) -> int:
         return max(0, self._running_total)
-    
+
     def __len__(self) -> int:
         return self.len()
 
@@ -170,7 +134,8 @@ class PipeWriter:
     """High-performance pipe writer using vectored I/O and intelligent buffering"""
     
     def __init__(self, namedPipeFilePathString: str = "/tmp/pilferedbits", 
-                 chunk_size: int = 2097152, target_capacity: int = None):
+                 chunk_size: int = 2097152, target_capacity: int = None,
+                 pipe_size: Union[str, int] = "adaptive"):
         """Initialize PipeWriter with optimized settings
         
         Args:
@@ -178,11 +143,15 @@ class PipeWriter:
             chunk_size: Size of chunks for buffering (default 2MB for optimal pipe writing)
             target_capacity: Target capacity limit for total buffered data (pipe + internal)
                            If None, no capacity enforcement is applied
+            pipe_size: capacity of the pipe: "adaptive" to resize it to what its readers take
+                       (see pipe_sizer.py), "max" for /proc/sys/fs/pipe-max-size, or bytes
         """
         self._kNamedPipeFilePathString = namedPipeFilePathString
         self.chunk_size = chunk_size
         self._fdPipe: Optional[int] = None
-        self._byteQ = OptimizedBytesDeque()
+        self._byteQ = ViewChunkDeque()  # views of the books written, not copies
+        self._watchers = set()  # callbacks waiting for the pipe to become writable
+        self._watching = None  # (loop, fd) registered with loop.add_writer
         
         # CAPACITY ENFORCEMENT: Add target capacity tracking
         self._target_capacity = target_capacity
@@ -197,6 +166,7 @@ class PipeWriter:
         self._total_bytes_buffered = 0  
         self._total_bytes_rejected = 0
         self._total_bytes_to_pipe = 0
+        self._flow = FlowEstimator()  # drain and fill rates, sampled on refresh
         
         # Get system's pipe capacity - let the system determine this, not external config
         try:
@@ -204,6 +174,14 @@ class PipeWriter:
                 self._desired_pipe_capacity = int(f.read().strip())
         except (FileNotFoundError, PermissionError, ValueError):
             self._desired_pipe_capacity = 2**20  # 1MB fallback
+        self._sizer = None
+        self._pending_pipe_size = None  # a smaller size waiting for the pipe to drain to it
+        if pipe_size == "adaptive":
+            # from 1MiB, the size both ends used to settle on, the pipe follows its readers
+            self._sizer = PipeSizer(maximum=self._desired_pipe_capacity)
+            self._desired_pipe_capacity = min(2**20, self._desired_pipe_capacity)
+        elif pipe_size != "max":
+            self._desired_pipe_capacity = int(pipe_size)
         
         # fcntl constants
         self._F_GETPIPE_SZ = 1032
@@ -218,7 +196,7 @@ class PipeWriter:
                 # Try to open pipe for writing (requires a reader to be connected)
                 self._fdPipe = os.open(self._kNamedPipeFilePathString, os.O_WRONLY | os.O_NONBLOCK)
                 
-                # Set pipe to maximum size
+                # Set pipe to the desired size
                 try:
                     fcntl.fcntl(self._fdPipe, self._F_SETPIPE_SZ, self._desired_pipe_capacity)
                 except Exception as e:
@@ -242,6 +220,48 @@ class PipeWriter:
     def _whether_pipe_is_broken(self) -> bool:
         """Check if pipe is still writable"""
         return self._fdPipe is None
+
+    def _close_pipe(self) -> None:
+        """Close the write end, waking anyone waiting on it, so a reader can connect again"""
+        self._wake_watchers()
+        if self._fdPipe:
+            try:
+                os.close(self._fdPipe)
+            except OSError:
+                pass
+        self._fdPipe = None
+
+    def when_writable(self, callback) -> bool:
+        """Call callback once, as soon as the kernel reports room in the pipe
+
+        the pipe is registered with the running loop (loop.add_writer) instead of being
+        polled, so nothing runs while it stays full. callers only ask while they hold bytes
+        for the pipe, since an empty pipe is writable at once
+
+        Returns:
+            False, registering nothing, when no reader is connected
+        """
+        if self._whether_pipe_is_broken():
+            return False
+        self._watchers.add(callback)
+        if self._watching is None:
+            loop = asyncio.get_running_loop()
+            loop.add_writer(self._fdPipe, self._wake_watchers)
+            self._watching = (loop, self._fdPipe)
+        return True
+
+    def _wake_watchers(self) -> None:
+        """Unregister the pipe from the loop and call everyone waiting on it"""
+        if self._watching is not None:
+            loop, fd = self._watching
+            self._watching = None
+            try:
+                loop.remove_writer(fd)
+            except Exception:
+                pass  # the loop has closed
+        watchers, self._watchers = self._watchers, set()
+        for callback in watchers:
+            callback()
     
     def _count_bytes_in_pipe(self) -> int:
         """Get current bytes in pipe using FIONREAD"""
@@ -266,8 +286,11 @@ class PipeWriter:
         return self._desired_pipe_capacity
     
     def get_available_space(self) -> int:
-        """Calculate available space in pipe"""
-        return max(0, self.named_pipe_system_capacity - self._count_bytes_in_pipe())
+        """Calculate available space in pipe, within the size it is shrinking to if any"""
+        capacity = self.named_pipe_system_capacity
+        if self._pending_pipe_size is not None:
+            capacity = min(capacity, self._pending_pipe_size)
+        return max(0, capacity - self._count_bytes_in_pipe())
     
     def _clear_stale_buffers(self) -> int:
         """Clear stale internal buffers if they've been sitting too long without writes"""
@@ -295,7 +318,7 @@ class PipeWriter:
         
         if would_exceed:
             excess = (current_total + additional_bytes) - self._target_capacity
-            _log_msg(f"Capacity limit check: Would exceed target by {excess:,} bytes", 2)
+            _log_msg("Capacity limit check: Would exceed target by {:,} bytes", 2, excess)
             
         return not would_exceed
     
@@ -319,9 +342,11 @@ class PipeWriter:
             accepted_size = min(data_size, available_capacity)
             
             if accepted_size < data_size:
-                _log_msg(f"Refill mode: Accepting {accepted_size:,} of {data_size:,} bytes (buffer at {current_total:,}/{self._target_capacity:,})", 2)
+                _log_msg("Refill mode: Accepting {:,} of {:,} bytes (buffer at {:,}/{:,})", 2,
+                         accepted_size, data_size, current_total, self._target_capacity)
             else:
-                _log_msg(f"Refill mode: Accepting all {data_size:,} bytes (buffer at {current_total:,}/{self._target_capacity:,})", 3)
+                _log_msg("Refill mode: Accepting all {:,} bytes (buffer at {:,}/{:,})", 3,
+                         data_size, current_total, self._target_capacity)
             
             return accepted_size
         
@@ -331,29 +356,44 @@ class PipeWriter:
             accepted_size = min(data_size, available_capacity)
             
             if accepted_size < data_size:
-                _log_msg(f"Capacity enforcement: Accepting {accepted_size:,} of {data_size:,} bytes (buffer at {current_total:,}/{self._target_capacity:,})", 2)
+                _log_msg("Capacity enforcement: Accepting {:,} of {:,} bytes (buffer at {:,}/{:,})", 2,
+                         accepted_size, data_size, current_total, self._target_capacity)
             
             return accepted_size
         
         # If we're at or above high water mark, reject writes
         else:
-            _log_msg(f"Capacity limit reached: Rejecting {data_size:,} bytes (buffer at {current_total:,}/{self._target_capacity:,})", 1)
+            _log_msg("Capacity limit reached: Rejecting {:,} bytes (buffer at {:,}/{:,})", 1,
+                     data_size, current_total, self._target_capacity)
             return 0
 
     async def write(self, data: Union[bytes, bytearray, memoryview]) -> int:
-        """Write data using optimized chunking and vectored I/O with capacity enforcement"""
+        """Write data using vectored I/O with capacity enforcement, see write_many"""
         if not data:
             # Empty write - just flush existing buffers and clear stale data
             self._clear_stale_buffers()
             return await self._flush_buffers()
+        return await self.write_many([data])
+
+    async def write_many(self, buffers) -> int:
+        """Queue several buffers and flush them together with one vectored write
+
+        the buffers are queued as views, not copies, and reach os.writev as they are, so a
+        caller must not modify a buffer once it has been handed over
+
+        Returns:
+            the bytes accepted, less than the total only when the target capacity is reached
+        """
+        views = [memoryview(buffer).cast("B") for buffer in buffers]
         
         # DATA FLOW TRACKING: Record bytes received
-        original_size = len(data)
+        original_size = sum(len(view) for view in views)
         self._total_bytes_received += original_size
-        _log_msg(f"PipeWriter.write: Received {original_size:,} bytes (total received: {self._total_bytes_received:,})", 2)
+        _log_msg("PipeWriter.write: Received {:,} bytes (total received: {:,})", 2,
+                 original_size, self._total_bytes_received)
         
         # CAPACITY ENFORCEMENT: Check and limit data size based on target capacity
-        if self._enforce_capacity:
+        if self._enforce_capacity and original_size > 0:
             # Clear any stale buffers first to free up space
             self._clear_stale_buffers()
             
@@ -362,51 +402,51 @@ class PipeWriter:
             
             if accepted_size == 0:
                 self._total_bytes_rejected += original_size
-                _log_msg(f"DATA LOSS: Rejected {original_size:,} bytes (total rejected: {self._total_bytes_rejected:,})", 1)
+                _log_msg("DATA LOSS: Rejected {:,} bytes (total rejected: {:,})", 1,
+                         original_size, self._total_bytes_rejected)
                 return 0
             elif accepted_size < original_size:
                 rejected_bytes = original_size - accepted_size
                 self._total_bytes_rejected += rejected_bytes
-                _log_msg(f"DATA LOSS: Partial reject - accepting {accepted_size:,}, rejecting {rejected_bytes:,} (total rejected: {self._total_bytes_rejected:,})", 1)
-                data = data[:accepted_size]
+                _log_msg("DATA LOSS: Partial reject - accepting {:,}, rejecting {:,} (total rejected: {:,})", 1,
+                         accepted_size, rejected_bytes, self._total_bytes_rejected)
+                # keep the leading accepted_size bytes, in order
+                kept = []
+                for view in views:
+                    if accepted_size <= 0:
+                        break
+                    kept.append(view[:accepted_size])
+                    accepted_size -= len(kept[-1])
+                views = kept
         
         bytes_written = 0
         
-        # PHASE 1: Chunk incoming data into buffer queue
-        if isinstance(data, (bytes, bytearray, memoryview)) and len(data) > 0:
-            actual_buffered = len(data)
-            self._total_bytes_buffered += actual_buffered
-            _log_msg(f"PipeWriter.write: Buffered {actual_buffered:,} bytes (total buffered: {self._total_bytes_buffered:,})", 3)
-            
-            bytestream = io.BytesIO(data)
-            chunk_count = 0
-            
-            while True:
-                chunk = bytestream.read(self.chunk_size)
-                if not chunk:
-                    break
-                
-                self._byteQ.append(OptimizedBytesIO(chunk))
-                chunk_count += 1
-                
-                # Yield periodically to prevent blocking event loop
-                if chunk_count % 4 == 0:
-                    await asyncio.sleep(0)
-            
-            bytes_written = len(data)
+        # PHASE 1: Queue views of the incoming data
+        for view in views:
+            if len(view) > 0:
+                await self._buffer(view)
+                bytes_written += len(view)
+        if bytes_written > 0:
+            self._total_bytes_buffered += bytes_written
+            _log_msg("PipeWriter.write: Buffered {:,} bytes (total buffered: {:,})", 3,
+                     bytes_written, self._total_bytes_buffered)
             # Update last write time for stale buffer tracking
             self._last_write_time = time.time()
         
         # PHASE 2: Write buffered data using vectored I/O
         flushed_bytes = await self._flush_buffers()
         if flushed_bytes > 0:
-            self._total_bytes_to_pipe += flushed_bytes
-            _log_msg(f"PipeWriter.write: Flushed {flushed_bytes:,} bytes to pipe (total to pipe: {self._total_bytes_to_pipe:,})", 3)
+            _log_msg("PipeWriter.write: Flushed {:,} bytes to pipe (total to pipe: {:,})", 3,
+                     flushed_bytes, self._total_bytes_to_pipe)
         
         return bytes_written
     
+    async def _buffer(self, data: memoryview) -> None:
+        """Queue a view of data, which is written from where it lies"""
+        self._byteQ.append(ViewChunk(data))
+    
     async def _flush_buffers(self) -> int:
-        """Flush internal buffers to pipe using vectored I/O"""
+        """Flush internal buffers to pipe using vectored I/O, counting what went in _total_bytes_to_pipe"""
         if self._whether_pipe_is_broken():
             self._open_pipe()
         
@@ -418,103 +458,65 @@ class PipeWriter:
             # Pipe is full - data stays in internal buffers until space is available
             return 0
         
-        # Prepare vectored write buffers
+        # Collect views that fit in available space, at most IOV_MAX of them
+        # nothing is consumed until the write has returned, so whatever the kernel did not
+        # take is simply left in place
         chunks_to_write = []
-        buffers_used = []
         bytes_prepared = 0
-        
-        # Collect buffers that fit in available space
-        while bytes_prepared < available_space and len(self._byteQ) > 0:
-            try:
-                next_buffer = self._byteQ[0]
-                buffer_size = next_buffer.len()
-                
-                if bytes_prepared + buffer_size <= available_space:
-                    # Entire buffer fits
-                    buffer_obj = self._byteQ.popleft()
-                    chunks_to_write.append(buffer_obj.getbuffer())
-                    buffers_used.append((buffer_obj, buffer_size, True))  # complete
-                    bytes_prepared += buffer_size
-                else:
-                    # Only partial buffer fits
-                    buffer_obj = self._byteQ.popleft()
-                    usable_size = available_space - bytes_prepared
-                    buffer_data = buffer_obj.read(usable_size)
-                    chunks_to_write.append(buffer_data)
-                    buffers_used.append((buffer_obj, usable_size, False))  # partial
-                    self._byteQ.appendleft(buffer_obj)  # Put back remainder
-                    bytes_prepared += usable_size
-                    break
-            except IndexError:
+        for chunk in self._byteQ:
+            if bytes_prepared >= available_space or len(chunks_to_write) == _kIOV_MAX:
                 break
+            chunks_to_write.append(chunk.peek(available_space - bytes_prepared))
+            bytes_prepared += len(chunks_to_write[-1])
         
         # Write using vectored I/O (KEY OPTIMIZATION!)
         total_written = 0
-        if chunks_to_write:
-            try:
-                total_written = os.writev(self._fdPipe, chunks_to_write)
-                
-                # Handle partial writes
-                if total_written < bytes_prepared:
-                    self._restore_partial_write(buffers_used, total_written)
-                    
-            except BlockingIOError:
-                _log_msg("BlockingIOError during vectored write", 2)
-                # Restore all buffers if write blocked
-                self._restore_all_buffers(buffers_used)
-            except BrokenPipeError:
-                _log_msg("BrokenPipeError during vectored write", 2)
-                # Pipe broken - mark as such and restore buffers
-                self._fdPipe = None
-                self._restore_all_buffers(buffers_used)
+        try:
+            total_written = os.writev(self._fdPipe, chunks_to_write)
+        except BlockingIOError:
+            _log_msg("BlockingIOError during vectored write", 2, every=1.0)
+        except BrokenPipeError:
+            _log_msg("BrokenPipeError during vectored write", 2)
+            # Pipe broken - mark as such, the views stay queued
+            self._close_pipe()
+        self._byteQ.consume(total_written)
+        self._total_bytes_to_pipe += total_written
         
         return total_written
     
-    def _restore_partial_write(self, buffers_used, bytes_written: int) -> None:
-        """Handle partial write by restoring unwritten portions"""
-        bytes_accounted = 0
-        
-        for i, (buffer_obj, size, complete) in enumerate(buffers_used):
-            if bytes_accounted + size <= bytes_written:
-                # This buffer was completely written
-                bytes_accounted += size
-                continue
-            
-            if bytes_accounted >= bytes_written:
-                # This buffer wasn't written at all
-                if not complete:
-                    buffer_obj.putback(size)
-                self._byteQ.appendleft(buffer_obj)
-                
-                # Restore all remaining buffers
-                for j in range(i + 1, len(buffers_used)):
-                    remaining_buffer, remaining_size, remaining_complete = buffers_used[j]
-                    if not remaining_complete:
-                        remaining_buffer.putback(remaining_size)
-                    self._byteQ.appendleft(remaining_buffer)
-                break
-            
-            # This buffer was partially written
-            partial_bytes = bytes_written - bytes_accounted
-            remaining_bytes = size - partial_bytes
-            buffer_obj.putback(remaining_bytes)
-            self._byteQ.appendleft(buffer_obj)
-            
-            # Restore remaining buffers
-            for j in range(i + 1, len(buffers_used)):
-                remaining_buffer, remaining_size, remaining_complete = buffers_used[j]
-                if not remaining_complete:
-                    remaining_buffer.putback(remaining_size)
-                self._byteQ.appendleft(remaining_buffer)
-            break
-    
-    def _restore_all_buffers(self, buffers_used) -> None:
-        """Restore all buffers in case of write failure"""
-        for buffer_obj, size, complete in reversed(buffers_used):
-            if not complete:
-                buffer_obj.putback(size)
-            self._byteQ.appendleft(buffer_obj)
-    
+    def splice_from(self, fd: int, offset: int, count: int) -> int:
+        """Move up to count bytes at offset of the file fd straight into the pipe
+
+        the bytes are moved by the kernel (splice, or sendfile where splice is unavailable)
+        without entering python memory. nothing is moved while internal buffers hold bytes
+        written earlier, so that the order of the stream is kept
+
+        Returns:
+            the number of bytes moved, 0 when the pipe is full or has no reader
+        """
+        if self._count_bytes_in_internal_buffers() > 0 or count <= 0:
+            return 0
+        self._open_pipe()
+        if self._whether_pipe_is_broken():
+            return 0
+        try:
+            if hasattr(os, "splice"):
+                moved = os.splice(
+                    fd, self._fdPipe, count, offset_src=offset, flags=os.SPLICE_F_NONBLOCK
+                )
+            else:
+                moved = os.sendfile(self._fdPipe, fd, offset, count)
+        except BlockingIOError:
+            return 0
+        except BrokenPipeError:
+            _log_msg("BrokenPipeError during splice", 2)
+            self._close_pipe()
+            return 0
+        self._total_bytes_received += moved
+        self._total_bytes_buffered += moved
+        self._total_bytes_to_pipe += moved
+        return moved
+
     async def refresh(self) -> None:
         """Periodic refresh with stuck buffer monitoring and stale data cleanup"""
         try:
@@ -522,12 +524,17 @@ class PipeWriter:
             self._clear_stale_buffers()
             
             self._open_pipe()
-            flushed = await self._flush_buffers()
+            await self._flush_buffers()
+            consumed = self._count_bytes_consumed()
+            self._flow.sample(self._total_bytes_received, consumed, self.len_total_buffered())
+            if self._sizer is not None:
+                self._adapt_pipe_size(consumed)
             
             # Monitor for stuck buffers
             if self.is_buffer_stuck():
-                _log_msg(f"WARNING: {self._byteQ.len()} bytes stuck in internal buffers", 1)
-                _log_msg(f"Available pipe space: {self.get_available_space()}", 2)
+                _log_msg("WARNING: {} bytes stuck in internal buffers", 1,
+                         self._count_bytes_in_internal_buffers(), every=5.0)
+                _log_msg(lambda: f"Available pipe space: {self.get_available_space()}", 2, every=5.0)
 
             # DATA FLOW REPORTING: Periodic statistics (every ~30 calls to refresh)
             if not hasattr(self, '_refresh_counter'):
@@ -535,23 +542,15 @@ class PipeWriter:
             self._refresh_counter += 1
             
             if self._refresh_counter % 30 == 0:  # Report every 30 refresh cycles
-                stats = self.get_data_flow_stats()
-                _log_msg(f"DATA FLOW STATS: Received={stats['total_received']:,}, "
-                        f"Buffered={stats['total_buffered']:,}, "
-                        f"Rejected={stats['total_rejected']:,}, "
-                        f"ToPipe={stats['total_to_pipe']:,}, "
-                        f"Loss={stats['loss_percentage']:.1f}%", 1)
+                _log_msg(lambda: "DATA FLOW STATS: Received={total_received:,}, Buffered={total_buffered:,}, "
+                         "Rejected={total_rejected:,}, ToPipe={total_to_pipe:,}, "
+                         "Loss={loss_percentage:.1f}%".format(**self.get_data_flow_stats()), 1)
                 
         except Exception as e:
             log_exception(e, "PipeWriter.refresh")
             _log_msg(f"Error in refresh: {e}", 0)
             # Try to recover
-            if self._fdPipe:
-                try:
-                    os.close(self._fdPipe)
-                except:
-                    pass
-                self._fdPipe = None
+            self._close_pipe()
     
     def len_accessible(self) -> int:
         """Bytes accessible to readers (only what's actually in the pipe)"""
@@ -559,11 +558,11 @@ class PipeWriter:
     
     def len_total_buffered(self) -> int:
         """Total bytes in pipeline (pipe + internal buffers) - for internal use"""
-        return self._count_bytes_in_pipe() + self._byteQ.len()
+        return self._count_bytes_in_pipe() + self._count_bytes_in_internal_buffers()
     
     def is_buffer_stuck(self) -> bool:
         """Check if internal buffers have data that can't be flushed to pipe"""
-        return self._byteQ.len() > 0 and self.get_available_space() > 0
+        return self._count_bytes_in_internal_buffers() > 0 and self.get_available_space() > 0
     
     def get_buffer_health(self) -> dict:
         """Return detailed buffer status for diagnostics"""
@@ -587,7 +586,7 @@ class PipeWriter:
         
         return {
             "accessible_bytes": self.len_accessible(),
-            "buffered_bytes": self._byteQ.len(), 
+            "buffered_bytes": self._count_bytes_in_internal_buffers(), 
             "total_bytes": current_total,
             "available_space": self.get_available_space(),
             "pipe_writable": not self._whether_pipe_is_broken(),
@@ -606,13 +605,63 @@ class PipeWriter:
             "total_buffered": getattr(self, '_total_bytes_buffered', 0),
             "total_rejected": getattr(self, '_total_bytes_rejected', 0),
             "total_to_pipe": getattr(self, '_total_bytes_to_pipe', 0),
-            "current_internal_buffer": self._byteQ.len(),
+            "current_internal_buffer": self._count_bytes_in_internal_buffers(),
             "current_pipe_buffer": self.len_accessible(),
             "efficiency_buffered": (getattr(self, '_total_bytes_buffered', 0) / max(1, getattr(self, '_total_bytes_received', 1))) * 100,
             "efficiency_to_pipe": (getattr(self, '_total_bytes_to_pipe', 0) / max(1, getattr(self, '_total_bytes_buffered', 1))) * 100,
             "loss_percentage": (getattr(self, '_total_bytes_rejected', 0) / max(1, getattr(self, '_total_bytes_received', 1))) * 100
         }
 
+    def _count_bytes_consumed(self) -> int:
+        """Bytes readers have taken from the pipe since the writer was created"""
+        return self._total_bytes_to_pipe - self._count_bytes_in_pipe()
+
+    def _adapt_pipe_size(self, consumed: int) -> None:
+        """Resize the pipe to what its readers take, as proposed by the PipeSizer"""
+        if self._whether_pipe_is_broken():
+            return
+        self._sizer.observe(consumed)
+        if self._pending_pipe_size is not None:
+            self._resize_pipe(self._pending_pipe_size)
+        elif self._sizer.due():
+            proposed = self._sizer.propose(self.named_pipe_system_capacity, self._flow.rates()[0])
+            if proposed is not None and proposed != self.named_pipe_system_capacity:
+                self._resize_pipe(proposed)
+
+    def _resize_pipe(self, size: int) -> None:
+        """Set the pipe's capacity, or once it has drained to size when it holds more"""
+        previous = self.named_pipe_system_capacity
+        if self._count_bytes_in_pipe() > size:
+            # the kernel refuses (EBUSY) to shrink a pipe below what it holds, so it is
+            # filled no further than size until readers have drained it that far
+            self._pending_pipe_size = size
+            return
+        try:
+            fcntl.fcntl(self._fdPipe, self._F_SETPIPE_SZ, size)
+        except OSError as e:
+            _log_msg(f"Failed to resize pipe from {previous} to {size} bytes: {e}", 2)
+            self._pending_pipe_size = None
+            return
+        self._pending_pipe_size = None
+        self._desired_pipe_capacity = size  # kept when a reader connects again
+        self._sizer.resized()
+        _log_msg(f"Resized pipe from {previous} to {size} bytes ({self._sizer.stats()})", 1)
+
+    def get_pipe_sizes(self) -> list:
+        """The pipe's path, capacity and, when adaptive, resizes, p90 burst and target"""
+        stats = {"path": self._kNamedPipeFilePathString, "size": self.named_pipe_system_capacity}
+        if self._sizer is not None:
+            stats.update(self._sizer.stats())
+        return [stats]
+
+    def get_flow_estimates(self) -> dict:
+        """Drain and fill rates in bytes per second and the seconds until the bytes held run out
+
+        see FlowEstimator.estimates, the drain being what readers took from the pipe and the
+        fill what was written to the writer
+        """
+        return self._flow.estimates()
+
     def len(self) -> int:
         """Total entropy bytes available in the system (for UI display purposes)
         
@@ -646,79 +695,318 @@ total bytes: {self._count_bytes_in_internal_buffers() + self._count_bytes_in_pip
     def __del__(self) -> None:
         """Cleanup resources"""
         try:
-            if self._fdPipe:
-                os.close(self._fdPipe)
+            self._close_pipe()
         except:
             pass
 
 
+# ==============================================================================
+# ZERO-COPY VMSPLICE PIPEWRITER
+# ==============================================================================
+
+SPLICE_F_NONBLOCK = 0x02
+SPLICE_F_GIFT = 0x08
+
+
+class _iovec(ctypes.Structure):
+    _fields_ = [("iov_base", ctypes.c_void_p), ("iov_len", ctypes.c_size_t)]
+
+
+def _load_vmsplice():
+    """the libc vmsplice function, None where it is unavailable"""
+    try:
+        libc = ctypes.CDLL(None, use_errno=True)
+        vmsplice = libc.vmsplice
+    except (OSError, AttributeError):
+        return None
+    vmsplice.argtypes = [ctypes.c_int, ctypes.POINTER(_iovec), ctypes.c_size_t, ctypes.c_uint]
+    vmsplice.restype = ctypes.c_ssize_t
+    return vmsplice
+
+
+_vmsplice = _load_vmsplice()
+
+
+class _PoolBuffer:
+    """a page aligned anonymous mapping filled by write and spliced into the pipe"""
+
+    def __init__(self, size: int):
+        self.map = mmap.mmap(-1, size)  # anonymous maps start on a page boundary
+        self.address = ctypes.addressof(ctypes.c_char.from_buffer(self.map))
+        self.size = size
+        self.reset()
+
+    def reset(self) -> None:
+        self.filled = 0  # bytes copied in
+        self.spliced = 0  # bytes handed to the pipe
+        self.end = 0  # count of bytes spliced by the writer once its last byte was spliced
+        self.sealed = False  # no more bytes may be copied in
+
+
+class PagePool:
+    """recycles page aligned buffers, keeping at most max_free of them mapped while idle"""
+
+    def __init__(self, buffer_size: int = 2097152, max_free: int = 8):
+        self.buffer_size = buffer_size - buffer_size % mmap.PAGESIZE or mmap.PAGESIZE
+        self._free = []
+        self._max_free = max_free
+
+    def acquire(self) -> _PoolBuffer:
+        return self._free.pop() if self._free else _PoolBuffer(self.buffer_size)
+
+    def release(self, buffer: _PoolBuffer) -> None:
+        if len(self._free) < self._max_free:
+            buffer.reset()
+            self._free.append(buffer)
+        # otherwise the mapping is dropped with the last reference to it
+
+
+class VmsplicePipeWriter(PipeWriter):
+    """PipeWriter that maps its buffers into the pipe with vmsplice instead of copying them
+
+    a book is copied once, into page aligned buffers from a PagePool, and the kernel then
+    references those pages from the pipe rather than copying them again as writev does.
+    since the reader sees the pages themselves, a buffer is only reused once everything
+    spliced from it has been read out of the pipe, which is known from the count of bytes
+    spliced less the bytes still in the pipe.
+
+    with gift=True the pages are instead given to the kernel (SPLICE_F_GIFT): a buffer is
+    sealed once anything in it has been spliced and is never touched again, a fresh one
+    being mapped in its place
+    """
+
+    def __init__(self, namedPipeFilePathString: str = "/tmp/pilferedbits",
+                 chunk_size: int = 2097152, target_capacity: int = None, gift: bool = False,
+                 pipe_size: Union[str, int] = "adaptive"):
+        """
+        Args:
+            namedPipeFilePathString, chunk_size, target_capacity, pipe_size: see PipeWriter,
+                chunk_size being the size of each pool buffer
+            gift: splice pages with SPLICE_F_GIFT and never reuse them
+        """
+        if _vmsplice is None:
+            raise OSError("vmsplice is not available on this platform")
+        self._pool = PagePool(chunk_size, max_free=0 if gift else 8)
+        self._buffers = collections.deque()  # filling, waiting or in the pipe, in stream order
+        self._internal_bytes = 0  # bytes copied in but not yet spliced
+        self._spliced_total = 0  # bytes spliced over the life of the pipe
+        self._gift = gift
+        super().__init__(namedPipeFilePathString, chunk_size, target_capacity, pipe_size)
+
+    def _count_bytes_in_internal_buffers(self) -> int:
+        return self._internal_bytes
+
+    async def _buffer(self, data: Union[bytes, bytearray, memoryview]) -> None:
+        """copy data into the free space of the pool buffers"""
+        view = memoryview(data).cast("B")
+        copied = 0
+        while copied < len(view):
+            if len(self._buffers) == 0 or self._buffers[-1].sealed:
+                self._buffers.append(self._pool.acquire())
+            buffer = self._buffers[-1]
+            count = min(buffer.size - buffer.filled, len(view) - copied)
+            buffer.map[buffer.filled : buffer.filled + count] = view[copied : copied + count]
+            buffer.filled += count
+            buffer.sealed = buffer.filled == buffer.size
+            copied += count
+            self._internal_bytes += count
+            await asyncio.sleep(0)
+
+    def _recycle(self) -> None:
+        """return the buffers the reader has finished with to the pool"""
+        consumed = self._spliced_total - self._count_bytes_in_pipe()
+        while len(self._buffers) > 0:
+            buffer = self._buffers[0]
+            if not buffer.sealed or buffer.spliced < buffer.filled:
+                break  # still being filled or spliced
+            if not self._gift and buffer.end > consumed:
+                break  # the reader has yet to read its pages out of the pipe
+            self._buffers.popleft()
+            self._pool.release(buffer)
+
+    def _drop_spliced(self) -> None:
+        """forget what the pipe held when it broke, its pages went with it"""
+        for buffer in self._buffers:
+            buffer.end = 0
+        self._spliced_total = 0
+
+    def _open_pipe(self) -> None:
+        """see PipeWriter._open_pipe, a new pipe starts with nothing spliced into it"""
+        if not self._fdPipe:
+            self._drop_spliced()
+        super()._open_pipe()
+
+    async def _flush_buffers(self) -> int:
+        """splice the filled, not yet spliced, parts of the buffers into the pipe, see PipeWriter._flush_buffers"""
+        if self._whether_pipe_is_broken():
+            self._open_pipe()
+        if self._whether_pipe_is_broken():
+            return 0
+        self._recycle()
+        available_space = self.get_available_space()
+        if available_space <= 0 or self._internal_bytes == 0:
+            return 0
+
+        iovecs = []
+        segments = []  # (buffer, count) in the order of iovecs
+        prepared = 0
+        for buffer in self._buffers:
+            if prepared >= available_space:
+                break
+            count = min(buffer.filled - buffer.spliced, available_space - prepared)
+            if count <= 0:
+                continue
+            if self._gift:
+                buffer.sealed = True  # a gifted page must not be written to again
+            iovecs.append(_iovec(buffer.address + buffer.spliced, count))
+            segments.append((buffer, count))
+            prepared += count
+        if len(iovecs) == 0:
+            return 0
+
+        flags = SPLICE_F_NONBLOCK | (SPLICE_F_GIFT if self._gift else 0)
+        written = _vmsplice(self._fdPipe, (_iovec * len(iovecs))(*iovecs), len(iovecs), flags)
+        if written < 0:
+            errno = ctypes.get_errno()
+            if errno == 32:  # EPIPE, the reader went away
+                _log_msg("BrokenPipeError during vmsplice", 2)
+                self._close_pipe()
+                self._drop_spliced()
+            elif errno != 11:  # EAGAIN, the pipe filled up meanwhile
+                _log_msg(f"vmsplice failed: {os.strerror(errno)}", 1)
+            return 0
+
+        remaining = written
+        for buffer, count in segments:
+            taken = min(count, remaining)
+            buffer.spliced += taken
+            remaining -= taken
+            self._spliced_total += taken
+            buffer.end = self._spliced_total
+            if remaining == 0:
+                break
+        self._internal_bytes -= written
+        self._total_bytes_to_pipe += written
+        self._recycle()
+        return written
+
+    def splice_from(self, fd: int, offset: int, count: int) -> int:
+        """see PipeWriter.splice_from, the bytes count as spliced so buffers are not reused early"""
+        moved = super().splice_from(fd, offset, count)
+        self._spliced_total += moved
+        return moved
+
+
 # ==============================================================================
 # OPTIMIZED PROCESS-BASED PIPEWRITER (from isolated_pipe_writer.py)
 # ==============================================================================
 
+# published by the IsolatedPipeWriter process, see SharedCounters
+ISOLATED_COUNTERS = (
+    "pipe_bytes",  # bytes in the named pipe
+    "internal_bytes",  # bytes held by the process's PipeWriter
+    "bytes_written",  # bytes taken from the ring
+    "items_processed",  # chunks taken from the ring
+    "bytes_to_pipe",  # bytes written to the pipe
+    "pipe_size",  # capacity of the named pipe
+    "published",  # time.monotonic_ns() of the last publication
+)
+
+
 class IsolatedPipeWriter:
-    """PipeWriter that runs in a separate process to avoid event loop starvation"""
+    """PipeWriter that runs in a separate process to avoid event loop starvation
+
+    books reach the process through a SharedRing, copied once into shared memory instead
+    of being pickled through a queue. the process takes from the ring only as much as its
+    PipeWriter can pass on to the pipe, so what the pipe cannot take waits in the ring and
+    write() waits once the ring is full: memory is bounded by ring_capacity
+
+    the process publishes its counters to shared memory as it goes (ISOLATED_COUNTERS),
+    so len() and get_stats() read them without a round trip to the process
+    """
     
-    def __init__(self, namedPipeFilePathString: str = "/tmp/pilferedbits"):
+    def __init__(self, namedPipeFilePathString: str = "/tmp/pilferedbits",
+                 ring_capacity: int = 64 * 2**20):
         self.namedPipeFilePathString = namedPipeFilePathString
-        # Remove arbitrary queue size limit - data should never be dropped
-        self.data_queue = multiprocessing.Queue()  # Unlimited queue to prevent data loss
-        self.control_queue = multiprocessing.Queue()
-        self.stats_queue = multiprocessing.Queue()
+        self.ring = SharedRing(ring_capacity)
+        self.counters = SharedCounters(ISOLATED_COUNTERS)
         self.process = None
         self._shutdown = False
+        self._total_bytes_received = 0
+        self._flow = FlowEstimator()
         
     def start(self):
         """Start the isolated PipeWriter process"""
         if self.process and self.process.is_alive():
             return
             
-        self.process = multiprocessing.Process(
+        # forked, so that the process inherits the ring's shared memory and doorbells
+        self.process = multiprocessing.get_context("fork").Process(
             target=self._worker_process,
-            args=(self.data_queue, self.control_queue, self.stats_queue, self.namedPipeFilePathString)
+            args=(self.ring, self.counters, self.namedPipeFilePathString)
         )
         self.process.daemon = True  # Clean shutdown with parent
         self.process.start()
         
     async def write(self, data):
-        """Write data to the isolated pipe (blocking to ensure no data loss)"""
+        """Copy data into the ring, waiting while it is full (never drops data)"""
         if not self.process or not self.process.is_alive():
             self.start()
             
-        if data:
-            # Block until data is queued - never drop data
-            self.data_queue.put(data)
-            return len(data)
-        return 0
+        view = memoryview(data).cast("B") if data else memoryview(b"")
+        written = 0
+        while written < len(view):
+            put = self.ring.put(view[written:])
+            written += put
+            if put == 0:
+                await self.ring.wait_for_space(0.1)
+                if not self.process.is_alive():
+                    self.start()
+        self._total_bytes_received += written
+        return written
     
     def get_stats(self):
-        """Get statistics from the isolated writer"""
-        try:
-            self.control_queue.put("stats", timeout=0.1)
-            return self.stats_queue.get(timeout=0.1)
-        except (queue.Empty, queue.Full):
-            return {"error": "stats unavailable"}
+        """Get statistics from the isolated writer, as last published by its process"""
+        stats = self.counters.snapshot()
+        stats["queue_size"] = len(self.ring)
+        return stats
     
     def len(self):
         """Get current bytes in pipeline for TaskResultWriter compatibility"""
-        stats = self.get_stats()
-        return stats.get('pipe_bytes', 0)
+        return (
+            self.counters.get("pipe_bytes") + self.counters.get("internal_bytes") + len(self.ring)
+        )
     
     def __len__(self):
         """Python len() support"""
         return self.len()
     
     async def refresh(self):
-        """No-op refresh since isolated process handles its own refreshing"""
-        # The isolated worker process continuously refreshes on its own
-        # No action needed here
-        pass
+        """Sample the flow, the isolated process handles its own refreshing"""
+        consumed = self.counters.get("bytes_to_pipe") - self.counters.get("pipe_bytes")
+        self._flow.sample(self._total_bytes_received, consumed, self.len())
+
+    def get_flow_estimates(self) -> dict:
+        """see PipeWriter.get_flow_estimates, from the counters the process published"""
+        return self._flow.estimates()
+
+    def get_pipe_sizes(self) -> list:
+        """see PipeWriter.get_pipe_sizes, as last published by the process"""
+        return [{"path": self.namedPipeFilePathString, "size": self.counters.get("pipe_size")}]
+
+    def get_data_flow_stats(self) -> dict:
+        """bytes written, and written on to the pipe by the process"""
+        return {
+            "total_received": self._total_bytes_received,
+            "total_rejected": 0,  # write() waits for room instead
+            "total_to_pipe": self.counters.get("bytes_to_pipe"),
+        }
     
     def stop(self):
         """Stop the isolated PipeWriter process"""
         if self.process and self.process.is_alive():
             try:
-                self.control_queue.put("shutdown", timeout=1.0)
+                self.ring.close()  # wakes the process, which exits
                 self.process.join(timeout=2.0)
             except:
                 pass
@@ -730,9 +1018,11 @@ class IsolatedPipeWriter:
     def __del__(self):
         """Cleanup on destruction"""
         self.stop()
+        self.ring.release()
+        self.counters.release()
     
     @staticmethod
-    def _worker_process(data_queue, control_queue, stats_queue, pipe_path):
+    def _worker_process(ring, counters, pipe_path):
         """Worker process that handles all pipe writing"""
         import asyncio
         import signal
@@ -752,41 +1042,57 @@ class IsolatedPipeWriter:
             writer = PipeWriter(namedPipeFilePathString=pipe_path)
             bytes_written = 0
             items_processed = 0
+            handed = 0  # bytes past the ring's tail handed to the writer as views
+            drained = asyncio.Event()
+            
+            def advance_past_flushed():
+                # what the writer no longer holds has gone to the pipe (or been dropped),
+                # so the ring may reuse it
+                nonlocal handed
+                flushed = handed - writer._count_bytes_in_internal_buffers()
+                if flushed > 0:
+                    ring.advance(flushed)
+                    handed -= flushed
             
             try:
-                while True:
-                    # Handle control commands
-                    try:
-                        cmd = control_queue.get_nowait()
-                        if cmd == "shutdown":
-                            break
-                        elif cmd == "stats":
-                            stats = {
-                                "bytes_written": bytes_written,
-                                "items_processed": items_processed,
-                                "queue_size": data_queue.qsize(),
-                                "pipe_bytes": len(writer)
-                            }
-                            try:
-                                stats_queue.put_nowait(stats)
-                            except queue.Full:
-                                pass  # Drop stats if queue full
-                    except queue.Empty:
-                        pass
-                    
-                    # Process data queue
-                    try:
-                        data = data_queue.get_nowait()
-                        if data:
-                            written = await writer.write(data)
-                            bytes_written += written
-                            items_processed += 1
-                    except queue.Empty:
-                        pass
+                while not ring.closed():
+                    # hand the writer views of only what it can pass on, the rest waits in the
+                    # ring, which is advanced past them once they are flushed so that the bytes
+                    # are never copied out of the ring by python
+                    while len(ring) > handed and writer._count_bytes_in_internal_buffers() < writer.chunk_size:
+                        chunk = ring.peek(writer.chunk_size, handed)
+                        handed += len(chunk)
+                        bytes_written += await writer.write(chunk)
+                        del chunk  # the writer holds views of its own, which the ring outlives
+                        items_processed += 1
+                        advance_past_flushed()
                     
                     # Refresh the writer
                     await writer.refresh()
-                    await asyncio.sleep(0.01)  # Prevent busy waiting
+                    advance_past_flushed()
+                    counters.set(
+                        pipe_bytes=writer._count_bytes_in_pipe(),
+                        internal_bytes=writer._count_bytes_in_internal_buffers(),
+                        bytes_written=bytes_written,
+                        items_processed=items_processed,
+                        bytes_to_pipe=writer._total_bytes_to_pipe,
+                        pipe_size=writer.named_pipe_system_capacity,
+                        published=time.monotonic_ns(),
+                    )
+                    
+                    # sleep until the pipe drains or more bytes arrive, at most 10ms so
+                    # that what the reader takes is published
+                    drained.clear()
+                    if writer._count_bytes_in_internal_buffers() > 0:
+                        if writer.when_writable(drained.set):
+                            try:
+                                await asyncio.wait_for(drained.wait(), 0.01)
+                            except asyncio.TimeoutError:
+                                pass
+                        else:
+                            await asyncio.sleep(0.01)  # no reader yet
+                    else:
+                        await ring.wait_for_data(0.01)
                     
             except Exception as e:
                 print(f"PipeWriter worker error: {e}", file=sys.stderr)
@@ -796,6 +1102,9 @@ class IsolatedPipeWriter:
                     await writer.refresh()
                 except:
                     pass
+                writer._byteQ.clear()  # the views of the ring, which cannot be released while they remain
+                ring.release()
+                counters.release()
         
         try:
             loop.run_until_complete(worker_main())
@@ -805,6 +1114,361 @@ class IsolatedPipeWriter:
             loop.close()
 
 
+# ==============================================================================
+# FAIR MULTI-PIPE WRITER
+# ==============================================================================
+
+def _sum_data_flow_stats(writers, total_received: int) -> dict:
+    """the bytes received by a writer of writers, and those its writers rejected and wrote"""
+    totals = {"total_received": total_received, "total_rejected": 0, "total_to_pipe": 0}
+    for writer in writers:
+        stats = writer.get_data_flow_stats()
+        totals["total_rejected"] += stats.get("total_rejected", 0)
+        totals["total_to_pipe"] += stats.get("total_to_pipe", 0)
+    return totals
+
+
+class FairPipe:
+    """one consumer's named pipe as scheduled by MultiPipeWriter"""
+
+    def __init__(self, namedPipeFilePathString: str, target_fill: int, weight: float = 1.0,
+                 writer=PipeWriter):
+        """
+        Args:
+            namedPipeFilePathString: Path to the consumer's named pipe
+            target_fill: bytes kept ready for the consumer, in its pipe and internal buffers
+            weight: share of the stream while several consumers are below their target
+            writer: PipeWriter class writing to the pipe
+        """
+        if weight <= 0:
+            raise ValueError(f"weight must be positive, got {weight}")
+        self.writer = writer(namedPipeFilePathString)
+        self.path = namedPipeFilePathString
+        self.target_fill = target_fill
+        self.weight = weight
+        self.finish_tag = 0.0  # virtual time at which the last byte assigned finishes
+        self.bytes_assigned = 0
+
+    def deficit(self) -> int:
+        """bytes missing from the target fill"""
+        return max(0, self.target_fill - self.writer.len_total_buffered())
+
+
+class MultiPipeWriter:
+    """Writes one stream across several consumers' named pipes by weighted fair queuing
+
+    every byte goes to exactly one pipe. bytes are assigned a quantum at a time to the
+    pipe, among those below their target fill, whose next quantum would finish first in
+    virtual time (start-time fair queuing): each consumer in need receives a share of
+    the stream in proportion to its weight, so a greedy reader cannot starve the rest.
+    a consumer at its target takes nothing and does not bank credit while it waits.
+    bytes no pipe needs wait in a backlog.
+
+    offers the interface of PipeWriter used by the TaskResultWriter
+    """
+
+    def __init__(self, pipes, quantum: int = 65536, writer=PipeWriter):
+        """
+        Args:
+            pipes: sequence of (path, target_fill, weight), or of (path, target_fill, weight,
+                   writer) for a consumer served by another writer class, e.g. an
+                   EntropySocketServer
+            quantum: bytes assigned to a pipe at a time
+            writer: PipeWriter class writing to each pipe, e.g. VmsplicePipeWriter
+        """
+        if len(pipes) == 0:
+            raise ValueError("at least one pipe is required")
+        self._pipes = [FairPipe(*pipe) if len(pipe) > 3 else FairPipe(*pipe, writer) for pipe in pipes]
+        self._quantum = quantum
+        self._virtual_time = 0.0
+        self._backlog = ViewChunkDeque()  # bytes not yet assigned to a pipe
+        self._total_bytes_received = 0
+        self._flow = FlowEstimator()  # across every pipe
+
+    def _next_pipe(self, size_hint: int) -> Optional[FairPipe]:
+        """the pipe in need whose next quantum would finish first, None if none is in need"""
+        in_need = [pipe for pipe in self._pipes if pipe.deficit() > 0]
+        if len(in_need) == 0:
+            return None
+        return min(
+            in_need,
+            key=lambda pipe: max(self._virtual_time, pipe.finish_tag) + size_hint / pipe.weight,
+        )
+
+    def _charge(self, pipe: FairPipe, size: int) -> None:
+        """advance the pipe's finish tag and the virtual time for size bytes assigned to it"""
+        start_tag = max(self._virtual_time, pipe.finish_tag)
+        pipe.finish_tag = start_tag + size / pipe.weight
+        pipe.bytes_assigned += size
+        self._virtual_time = start_tag
+
+    async def _distribute(self) -> None:
+        """assign the backlog to the pipes in need, a quantum at a time"""
+        while self._backlog.len() > 0:
+            pipe = self._next_pipe(min(self._quantum, self._backlog.len()))
+            if pipe is None:
+                break
+            views = self._backlog.take(min(self._quantum, pipe.deficit()))
+            self._charge(pipe, sum(len(view) for view in views))
+            await pipe.writer.write_many(views)
+
+    async def write(self, data: Union[bytes, bytearray, memoryview]) -> int:
+        """Queue data for the pipes then distribute whatever they have room for"""
+        return await self.write_many([data] if data else [])
+
+    async def write_many(self, buffers) -> int:
+        """Queue views of the buffers for the pipes, see PipeWriter.write_many"""
+        queued = 0
+        for buffer in buffers:
+            view = memoryview(buffer).cast("B")
+            if len(view) > 0:
+                self._backlog.append(ViewChunk(view))
+                queued += len(view)
+        self._total_bytes_received += queued
+        await self._distribute()
+        return queued
+
+    def splice_from(self, fd: int, offset: int, count: int) -> int:
+        """Move up to a quantum of the file fd into the pipe in need next, see PipeWriter.splice_from"""
+        if self._backlog.len() > 0:
+            return 0  # bytes written earlier go first
+        pipe = self._next_pipe(min(self._quantum, count))
+        if pipe is None:
+            return 0
+        moved = pipe.writer.splice_from(fd, offset, min(count, self._quantum, pipe.deficit()))
+        if moved > 0:
+            self._charge(pipe, moved)
+            self._total_bytes_received += moved
+        return moved
+
+    def when_writable(self, callback) -> bool:
+        """Watch every pipe holding bytes, see PipeWriter.when_writable
+
+        a pipe holding none takes more of the backlog once its reader has drained it below
+        the target fill, which the kernel does not signal, so while the backlog could go to
+        such a pipe nothing is registered and False is returned
+        """
+        holding = [pipe for pipe in self._pipes if pipe.writer._count_bytes_in_internal_buffers() > 0]
+        if self._backlog.len() > 0 and len(holding) < len(self._pipes):
+            return False
+        return any([pipe.writer.when_writable(callback) for pipe in holding])
+
+    async def refresh(self) -> None:
+        """Flush every pipe then hand out the backlog to those that drained"""
+        for pipe in self._pipes:
+            await pipe.writer.refresh()
+        await self._distribute()
+        self._flow.sample(self._total_bytes_received, self._count_bytes_consumed(), self.len_total_buffered())
+
+    def _count_bytes_consumed(self) -> int:
+        return sum(pipe.writer._count_bytes_consumed() for pipe in self._pipes)
+
+    def get_flow_estimates(self) -> dict:
+        """see PipeWriter.get_flow_estimates, readers of every pipe together"""
+        return self._flow.estimates()
+
+    def get_data_flow_stats(self) -> dict:
+        """bytes received, and rejected and written by the pipes' writers"""
+        return _sum_data_flow_stats([pipe.writer for pipe in self._pipes], self._total_bytes_received)
+
+    def get_pipe_sizes(self) -> list:
+        """see PipeWriter.get_pipe_sizes, for every named pipe written"""
+        return [
+            sizes for pipe in self._pipes if hasattr(pipe.writer, "get_pipe_sizes")
+            for sizes in pipe.writer.get_pipe_sizes()
+        ]
+
+    def get_pipe_stats(self) -> list:
+        """per pipe: path, weight, target fill, bytes in the pipe, bytes buffered, bytes assigned"""
+        return [
+            {
+                "path": pipe.path,
+                "weight": pipe.weight,
+                "target_fill": pipe.target_fill,
+                "in_pipe": pipe.writer.len_accessible(),
+                "buffered": pipe.writer._count_bytes_in_internal_buffers(),
+                "assigned": pipe.bytes_assigned,
+                "consumed": pipe.writer._count_bytes_consumed(),
+            }
+            for pipe in self._pipes
+        ]
+
+    def len_accessible(self) -> int:
+        """Bytes accessible to readers across all pipes"""
+        return sum(pipe.writer.len_accessible() for pipe in self._pipes)
+
+    def _count_bytes_in_internal_buffers(self) -> int:
+        """Bytes held by the pipes' writers and the backlog"""
+        internal = sum(pipe.writer._count_bytes_in_internal_buffers() for pipe in self._pipes)
+        return internal + self._backlog.len()
+
+    def len_total_buffered(self) -> int:
+        return self.len_accessible() + self._count_bytes_in_internal_buffers()
+
+    def len(self) -> int:
+        return self.len_total_buffered()
+
+    def __len__(self) -> int:
+        return self.len()
+
+    def __del__(self) -> None:
+        for pipe in getattr(self, "_pipes", []):
+            pipe.writer.__del__()
+
+
+def parse_pipe_spec(spec: str, default_target_fill: int = 4 * 2**20) -> tuple:
+    """parse "path[:target_mib[:weight]]" into (path, target_fill, weight)"""
+    path, _, rest = spec.partition(":")
+    target_mib, _, weight = rest.partition(":")
+    target_fill = int(float(target_mib) * 2**20) if target_mib else default_target_fill
+    return path, target_fill, float(weight) if weight else 1.0
+
+
+# ==============================================================================
+# SHARDED PIPEWRITER
+# ==============================================================================
+
+class ShardedPipeWriter:
+    """Writes one stream across a ring of named pipes, PATH.0 .. PATH.K-1, read together
+
+    a single pipe is capped at /proc/sys/fs/pipe-max-size and every byte through it takes
+    a turn on the same pipe. a reader polling K pipes (readers/pipe_reader.py, shards=K)
+    finds K times the bytes ready and reads each pipe while the writer fills the others.
+    bytes are handed out a quantum at a time, round robin, to the next pipe that has
+    taken everything it was given so far, so a slow shard is passed over rather than
+    stalling the rest. bytes none can take wait in a backlog.
+
+    offers the interface of PipeWriter used by the TaskResultWriter and MultiPipeWriter
+    """
+
+    def __init__(self, namedPipeFilePathString: str = "/tmp/pilferedbits", shards: int = 4,
+                 quantum: int = 2**20, writer=PipeWriter):
+        """
+        Args:
+            namedPipeFilePathString: Path the shards' paths are numbered from
+            shards: Number of named pipes
+            quantum: bytes handed to a shard at a time
+            writer: PipeWriter class writing to each shard, e.g. VmsplicePipeWriter
+        """
+        if shards < 1:
+            raise ValueError(f"at least one shard is required, got {shards}")
+        self._shards = [writer(f"{namedPipeFilePathString}.{index}") for index in range(shards)]
+        self._quantum = quantum
+        self._next = 0  # index of the shard whose turn is next
+        self._backlog = ViewChunkDeque()  # bytes not yet handed to a shard
+        self._total_bytes_received = 0
+        self._flow = FlowEstimator()  # across every shard
+
+    def _next_shard(self) -> Optional[PipeWriter]:
+        """the next shard in turn holding nothing back, None if every shard is backed up"""
+        for step in range(len(self._shards)):
+            index = (self._next + step) % len(self._shards)
+            if self._shards[index]._count_bytes_in_internal_buffers() == 0:
+                self._next = (index + 1) % len(self._shards)
+                return self._shards[index]
+        return None
+
+    async def _distribute(self) -> None:
+        """hand the backlog out to the shards, a quantum at a time"""
+        while self._backlog.len() > 0:
+            shard = self._next_shard()
+            if shard is None:
+                break
+            await shard.write_many(self._backlog.take(self._quantum))
+
+    async def write(self, data: Union[bytes, bytearray, memoryview]) -> int:
+        """Queue data for the shards then hand out whatever they can take"""
+        return await self.write_many([data] if data else [])
+
+    async def write_many(self, buffers) -> int:
+        """Queue views of the buffers for the shards, see PipeWriter.write_many"""
+        queued = 0
+        for buffer in buffers:
+            view = memoryview(buffer).cast("B")
+            if len(view) > 0:
+                self._backlog.append(ViewChunk(view))
+                queued += len(view)
+        self._total_bytes_received += queued
+        await self._distribute()
+        return queued
+
+    def splice_from(self, fd: int, offset: int, count: int) -> int:
+        """Move up to a quantum of the file fd into the next shard, see PipeWriter.splice_from"""
+        if self._backlog.len() > 0:
+            return 0  # bytes written earlier go first
+        shard = self._next_shard()
+        if shard is None:
+            return 0
+        moved = shard.splice_from(fd, offset, min(count, self._quantum))
+        self._total_bytes_received += moved
+        return moved
+
+    def when_writable(self, callback) -> bool:
+        """Watch every shard holding bytes, see PipeWriter.when_writable
+
+        the backlog only waits while every shard holds bytes back, so watching those is
+        enough to learn when it can move
+        """
+        holding = [shard for shard in self._shards if shard._count_bytes_in_internal_buffers() > 0]
+        return any([shard.when_writable(callback) for shard in holding])
+
+    async def refresh(self) -> None:
+        """Flush every shard then hand out the backlog to those that drained"""
+        for shard in self._shards:
+            await shard.refresh()
+        await self._distribute()
+        self._flow.sample(self._total_bytes_received, self._count_bytes_consumed(), self.len_total_buffered())
+
+    def _count_bytes_consumed(self) -> int:
+        return sum(shard._count_bytes_consumed() for shard in self._shards)
+
+    def get_flow_estimates(self) -> dict:
+        """see PipeWriter.get_flow_estimates, the shards together"""
+        return self._flow.estimates()
+
+    def get_data_flow_stats(self) -> dict:
+        """bytes received, and rejected and written by the shards' writers"""
+        return _sum_data_flow_stats(self._shards, self._total_bytes_received)
+
+    def get_pipe_sizes(self) -> list:
+        """see PipeWriter.get_pipe_sizes, for every shard"""
+        return [sizes for shard in self._shards for sizes in shard.get_pipe_sizes()]
+
+    def get_shard_stats(self) -> list:
+        """per shard: path, bytes in the pipe, bytes buffered, bytes readers took"""
+        return [
+            {
+                "path": shard._kNamedPipeFilePathString,
+                "in_pipe": shard.len_accessible(),
+                "buffered": shard._count_bytes_in_internal_buffers(),
+                "consumed": shard._count_bytes_consumed(),
+            }
+            for shard in self._shards
+        ]
+
+    def len_accessible(self) -> int:
+        """Bytes accessible to readers across all shards"""
+        return sum(shard.len_accessible() for shard in self._shards)
+
+    def _count_bytes_in_internal_buffers(self) -> int:
+        """Bytes held by the shards' writers and the backlog"""
+        internal = sum(shard._count_bytes_in_internal_buffers() for shard in self._shards)
+        return internal + self._backlog.len()
+
+    def len_total_buffered(self) -> int:
+        return self.len_accessible() + self._count_bytes_in_internal_buffers()
+
+    def len(self) -> int:
+        return self.len_total_buffered()
+
+    def __len__(self) -> int:
+        return self.len()
+
+    def __del__(self) -> None:
+        for shard in getattr(self, "_shards", []):
+            shard.__del__()
+
+
 # ==============================================================================
 # CONVENIENCE FACTORY FUNCTIONS
 # ==============================================================================
@@ -0,0 +1,157 @@
+# reservoir
+# author: krunch3r (KJM github.com/krunch3r76)
+# license: General Poetic License (GPL3)
+
+"""
+a persistent, memory mapped ring of entropy that survives restarts
+
+the reservoir sits between the TaskResultWriter and its PipeWriter. it absorbs books the
+pipe cannot take right away and, on the next launch, tops off the named pipe at once
+while new results are still being provisioned.
+
+layout of the file:
+    [0, 4096)              header: magic, capacity, head, tail (little endian u64s)
+    [4096, 4096+capacity)  ring of entropy bytes
+
+head counts every byte ever put and tail every byte ever taken, so the bytes held are
+head - tail and a counter's position in the ring is counter % capacity. the header is
+the consumed-offset journal: tail is flushed to disk before taken bytes are handed
+out, so after a crash bytes may be lost but are never served twice.
+
+put() and take() only touch memory. sync() writes the bytes put since the last sync and
+then the header, so it is what journals both counters; it blocks on the disk and is
+meant to be run off the event loop, once per batch of puts and takes. bytes taken must
+not be handed out before a sync() following the take has returned.
+"""
+
+import os
+import mmap
+import struct
+import threading
+
+_kMAGIC = b"ETRSVR01"
+_kHEADER_SIZE = 4096
+_kHEADER = struct.Struct("<8sQQQ")  # magic, capacity, head, tail
+
+
+class EntropyReservoir:
+    """ring buffer of entropy persisted to a memory mapped file
+
+    methods:
+        put(data): store as much of data as fits, returning the count stored
+        take(count): remove and return up to count bytes, oldest first
+        dirty(): whether a put or take has not yet been synced
+        sync(): journal the puts and takes so far to disk
+        len(): bytes held
+        free(): bytes that can still be put
+    """
+
+    def __init__(self, filePath: str, capacity: int):
+        """open filePath as a reservoir of capacity bytes, creating or resetting it as needed
+
+        an existing file of the same capacity is reused with its contents (warm start),
+        one of a different capacity is reset to empty
+        """
+        self._filePath = filePath
+        self._capacity = capacity
+        fd = os.open(filePath, os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            if os.fstat(fd).st_size != _kHEADER_SIZE + capacity:
+                os.ftruncate(fd, _kHEADER_SIZE + capacity)
+            self._map = mmap.mmap(fd, _kHEADER_SIZE + capacity)
+        finally:
+            os.close(fd)
+
+        self._sync_lock = threading.Lock()  # one sync at a time, so the header only moves forward
+        magic, stored_capacity, self._head, self._tail = _kHEADER.unpack_from(self._map, 0)
+        if (
+            magic != _kMAGIC
+            or stored_capacity != capacity
+            or not 0 <= self._head - self._tail <= capacity
+        ):
+            self._head, self._tail = 0, 0
+            self._write_header(0, 0)
+        self._synced_head, self._synced_tail = self._head, self._tail
+
+    def _write_header(self, head: int, tail: int) -> None:
+        """journal head and tail to disk"""
+        _kHEADER.pack_into(self._map, 0, _kMAGIC, self._capacity, head, tail)
+        self._map.flush(0, _kHEADER_SIZE)
+
+    def dirty(self) -> bool:
+        return self._head != self._synced_head or self._tail != self._synced_tail
+
+    def sync(self) -> None:
+        """flush the bytes put since the last sync, then journal head and tail
+
+        safe to call from a thread while the owner keeps putting and taking, what was put
+        or taken after the call began is left to the next sync
+        """
+        with self._sync_lock:
+            head, tail = self._head, self._tail  # put copies its bytes in before moving head
+            if self._map is None or (head, tail) == (self._synced_head, self._synced_tail):
+                return
+            # flush the data before the header can claim it
+            for offset, length in self._ring_spans(self._synced_head, min(head - self._synced_head, self._capacity)):
+                aligned = offset - offset % mmap.PAGESIZE
+                self._map.flush(aligned, offset + length - aligned)
+            self._write_header(head, tail)
+            self._synced_head, self._synced_tail = head, tail
+
+    def _ring_spans(self, counter: int, count: int):
+        """split count bytes starting at counter into at most two (offset, length) spans of the file"""
+        position = counter % self._capacity
+        first = min(count, self._capacity - position)
+        spans = [(_kHEADER_SIZE + position, first)]
+        if count > first:
+            spans.append((_kHEADER_SIZE, count - first))
+        return spans
+
+    def len(self) -> int:
+        return self._head - self._tail
+
+    def __len__(self) -> int:
+        return self.len()
+
+    def free(self) -> int:
+        return self._capacity - self.len()
+
+    def put(self, data) -> int:
+        """store as much of data as fits, returning the count stored"""
+        count = min(len(data), self.free())
+        if count == 0:
+            return 0
+        view = memoryview(data)
+        consumed = 0
+        for offset, length in self._ring_spans(self._head, count):
+            self._map[offset : offset + length] = view[consumed : consumed + length]
+            consumed += length
+        self._head += count  # journaled by the next sync
+        return count
+
+    def take(self, count: int) -> bytes:
+        """remove and return up to count bytes, oldest first
+
+        the bytes may be handed out only once a following sync() has journaled the take
+        """
+        count = min(count, self.len())
+        if count == 0:
+            return b""
+        taken = b"".join(
+            self._map[offset : offset + length]
+            for offset, length in self._ring_spans(self._tail, count)
+        )
+        self._tail += count
+        return taken
+
+    def close(self) -> None:
+        if self._map is not None:
+            self.sync()
+            self._map.close()
+            self._map = None
+
+    def __del__(self):
+        try:
+            self.close()
+        except Exception:
+            pass
@@ -0,0 +1,222 @@
+# ringlog
+# author: krunch3r (KJM github.com/krunch3r76)
+# license: General Poetic License (GPL3)
+
+"""
+logging for the hot paths of the writer, the model and the controller: a message costs
+a comparison unless its level is enabled, and what is logged is written by a thread in
+the background rather than by the caller
+
+levels are the project's debug levels, a message being logged when its level is at most
+PYTHONDEBUGLEVEL (0 when unset): 0 for errors, 1 for warnings, 2 for information and 3
+and above for debugging.
+
+a message is a format string whose arguments are only formatted, with str.format, by
+the background thread, or a function returning the message, only called once the level
+is known to be enabled. the arguments should therefore be values that do not change
+afterwards (numbers, strings, fresh dicts). a block of messages is guarded with
+logger.enabled(level).
+
+records go into a ring in memory shared by every logger of the process, which a
+thread empties every 200ms, or sooner once half full. a ring that fills up faster than
+it is emptied drops its oldest records, which the next flush reports, instead of
+holding up the caller. a site logging in a loop may pass every=seconds to log at most
+once per interval, the records suppressed in between being counted in the next one.
+flush() writes out whatever is in the ring, e.g. before the process exits
+
+e.g.
+    _log = ringlog.Logger("pipe_writer", ringlog.file_sink(".logs/pipewriter.log"))
+    _log.log(3, "flushed {:,} bytes", count)
+    _log.log(1, lambda: f"pipe stats: {writer.get_pipe_stats()}", every=5.0)
+"""
+
+import collections
+import os
+import sys
+import threading
+import time
+
+THRESHOLD = int(os.environ["PYTHONDEBUGLEVEL"]) if "PYTHONDEBUGLEVEL" in os.environ else 0
+LEVEL_NAMES = {0: "ERROR", 1: "WARNING", 2: "INFO"}  # and DEBUG above
+
+
+def level_name(level: int) -> str:
+    return LEVEL_NAMES.get(level, "DEBUG") if level >= 0 else "ERROR"
+
+
+def format_record(logger, created: float, thread: int, level: int, message: str) -> str:
+    """the format of .logs/pipewriter.log"""
+    stamp = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(created))
+    return f"[{stamp}] [Thread-{thread}] [{logger.name}] [{level_name(level)}] {message}\n"
+
+
+def file_sink(path: str, fallback: str = None):
+    """a sink appending to path, which is emptied now, e.g. as its module is imported
+
+    each process opens the file on its first flush, so the processes forked after the
+    sink was made write to it alongside. when path cannot be written the records go to
+    fallback, by default a file in /tmp
+    """
+    try:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        open(path, "w").close()
+    except OSError:
+        path = fallback or f"/tmp/{os.path.basename(path)}.{os.getpid()}"
+    opened = {}  # pid -> stream
+
+    def sink():
+        stream = opened.get(os.getpid())
+        if stream is None:
+            stream = opened[os.getpid()] = open(path, "a")
+        return stream
+
+    return sink
+
+
+def stderr_sink():
+    """sys.stderr as it is when flushed, which the controller redirects to a file"""
+    return sys.stderr
+
+
+class _Ring:
+    """the records of every logger of the process and the thread that writes them out"""
+
+    def __init__(self, capacity: int = 65536, interval: float = 0.2):
+        self._records = collections.deque(maxlen=capacity)
+        self._capacity = capacity
+        self._interval = interval
+        self._dropped = 0
+        self._wakeup = threading.Event()
+        self._lock = threading.Lock()  # one flush at a time
+        self._thread_pid = None  # a forked process starts its own thread
+
+    def put(self, record: tuple) -> None:
+        if self._thread_pid != os.getpid():
+            self._start()
+        if len(self._records) == self._capacity:
+            self._dropped += 1  # appending pushes out the oldest
+        self._records.append(record)
+        if len(self._records) > self._capacity // 2:
+            self._wakeup.set()
+
+    def _start(self) -> None:
+        """start the thread of this process, leaving records of the parent to the parent"""
+        if self._thread_pid is not None:
+            # forked: the parent's thread may have held the lock as the fork happened
+            self._lock = threading.Lock()
+            self._records.clear()
+            self._dropped = 0
+        self._thread_pid = os.getpid()
+        threading.Thread(target=self._run, name="ringlog", daemon=True).start()
+
+    def _run(self) -> None:
+        while True:
+            self._wakeup.wait(self._interval)
+            self._wakeup.clear()
+            self.flush()
+
+    # ---------------_Ring-------------------
+    def flush(self) -> None:
+        """format and write out every record in the ring"""
+        # ------------------------------------
+        with self._lock:
+            streams = {}
+            if self._dropped > 0:
+                dropped, self._dropped = self._dropped, 0
+                stream = stderr_sink()
+                streams[id(stream)] = stream
+                stream.write(f"[ringlog] {dropped} records dropped, the ring filled faster than it was written\n")
+            while len(self._records) > 0:
+                logger, created, thread, level, message, args, suppressed = self._records.popleft()
+                try:
+                    if args:
+                        try:
+                            message = message.format(*args)
+                        except Exception as e:
+                            # kept, so that the record leaves a trace of what went wrong
+                            message = f"[ringlog] could not format {message!r} with {args!r}: {type(e).__name__}: {e}"
+                    if suppressed > 0:
+                        message = f"{message} ({suppressed} suppressed)"
+                    stream = logger.sink()
+                    stream.write(logger.formatter(logger, created, thread, level, message))
+                    streams[id(stream)] = stream
+                except Exception:
+                    pass  # a record that cannot be written is lost, not raised
+            for stream in streams.values():
+                try:
+                    stream.flush()
+                except Exception:
+                    pass
+
+
+_ring = _Ring()
+
+
+def flush() -> None:
+    """write out every record logged so far"""
+    _ring.flush()
+
+
+class Logger:
+    """logs a module's messages into the ring
+
+    methods:
+        enabled(level): whether messages of level are logged
+        due(site, every): whether a site may log again, at most once every so many seconds
+        log(level, message, *args, every=None): log a message if its level is enabled
+    """
+
+    def __init__(self, name: str, sink=stderr_sink, formatter=format_record, threshold: int = None):
+        """
+        in:
+            sink: function returning the stream to write to, called when flushed
+            formatter: function(logger, created, thread, level, message) returning the line
+            threshold: highest level logged, by default PYTHONDEBUGLEVEL
+        """
+        self.name = name
+        self.sink = sink
+        self.formatter = formatter
+        self.threshold = THRESHOLD if threshold is None else threshold
+        self._sites = {}  # site -> [time last logged, records suppressed since]
+
+    def enabled(self, level: int) -> bool:
+        return level <= self.threshold
+
+    def _admit(self, site, every: float):
+        """the records suppressed at site since it last logged, None while it may not log"""
+        now = time.monotonic()
+        last = self._sites.get(site)
+        if last is not None and now - last[0] < every:
+            last[1] += 1
+            return None
+        self._sites[site] = [now, 0]
+        return last[1] if last is not None else 0
+
+    def due(self, site, every: float) -> bool:
+        """whether site, any hashable, has not been due in the last every seconds
+
+        guards a block of messages logged together, e.g. on every pass of a loop
+        """
+        return self._admit(site, every) is not None
+
+    # ---------------Logger-------------------
+    def log(self, level: int, message, *args, every: float = None, stacklevel: int = 1) -> None:
+        """log message, formatted with args (or called, if a function) only if level is enabled
+
+        in:
+            every: log at most once every this many seconds from the same line
+            stacklevel: as for the logging module, which caller's line that is, 2 for
+                the caller of a function wrapping log
+        """
+        # ------------------------------------
+        if level > self.threshold:
+            return
+        suppressed = 0
+        if every is not None:
+            caller = sys._getframe(stacklevel)
+            suppressed = self._admit((caller.f_code, caller.f_lineno), every)
+            if suppressed is None:
+                return
+        if callable(message):
+            message = message()
+        _ring.put((self, time.time(), threading.get_ident(), level, message, args, suppressed))
@@ -0,0 +1,241 @@
+# shm_ring
+# author: krunch3r (KJM github.com/krunch3r76)
+# license: General Poetic License (GPL3)
+
+"""
+a single producer, single consumer ring of bytes in shared memory, for handing books to
+a writer process without pickling them, and a struct of counters the writer process
+publishes for its parent to read without a round trip
+
+layout of the shared memory:
+    [0, 8)                 head: every byte ever put (written by the producer only)
+    [64, 72)               tail: every byte ever taken (written by the consumer only)
+    [128, 136)             closed: nonzero once the producer will put no more
+    [4096, 4096+capacity)  ring of bytes
+
+each counter has a single writer and lives on its own cache line. a counter is stored as
+one aligned 8 byte word, and only after the bytes it covers have been copied, so on x86-64
+(where stores are not reordered with earlier stores) the other side never sees a count
+ahead of its bytes.
+
+the sides wake each other with doorbells, an eventfd (or a pipe where eventfd is not
+available): data is rung after every put, space after every take. a side that found
+nothing to do clears its doorbell and looks at the counters again before waiting on it,
+so a ring is never missed
+"""
+
+import asyncio
+import os
+from multiprocessing import shared_memory
+
+_kHEADER_SIZE = 4096
+_kHEAD, _kTAIL, _kCLOSED = 0, 8, 16  # indexes of the counters as u64s
+
+
+class _Doorbell:
+    """a nonblocking eventfd, or pipe, rung by one process to wake a waiter in another"""
+
+    def __init__(self):
+        if hasattr(os, "eventfd"):
+            self._fdRead = self._fdWrite = os.eventfd(0, os.EFD_NONBLOCK | os.EFD_CLOEXEC)
+        else:
+            self._fdRead, self._fdWrite = os.pipe()
+            os.set_blocking(self._fdRead, False)
+            os.set_blocking(self._fdWrite, False)
+
+    def fileno(self) -> int:
+        return self._fdRead
+
+    def ring(self) -> None:
+        try:
+            os.write(self._fdWrite, (1).to_bytes(8, "little"))
+        except BlockingIOError:
+            pass  # the waiter has rings pending already
+
+    def clear(self) -> None:
+        try:
+            while len(os.read(self._fdRead, 4096)) > 0:
+                pass
+        except BlockingIOError:
+            pass
+
+    async def wait(self, timeout=None) -> None:
+        """return once rung, or after timeout seconds"""
+        loop = asyncio.get_running_loop()
+        rung = loop.create_future()
+        loop.add_reader(self._fdRead, lambda: rung.done() or rung.set_result(None))
+        try:
+            await asyncio.wait_for(rung, timeout)
+        except asyncio.TimeoutError:
+            pass
+        finally:
+            loop.remove_reader(self._fdRead)
+
+    def close(self) -> None:
+        for fd in {self._fdRead, self._fdWrite}:
+            try:
+                os.close(fd)
+            except OSError:
+                pass
+
+
+class SharedRing:
+    """ring of bytes in shared memory between one producer and one consumer process
+
+    the ring is created before the consumer is forked, which inherits it
+
+    methods:
+        put(data): copy as much of data as fits, returning the count copied (producer)
+        wait_for_space(timeout): wait until the consumer has made room (producer)
+        peek(count, offset): a view of up to count bytes past the tail without taking them (consumer)
+        advance(count): take count bytes that were peeked (consumer)
+        wait_for_data(timeout): wait until bytes are put or the ring is closed (consumer)
+        len(): bytes held
+        free(): bytes that can still be put
+        close(): no more bytes will be put
+    """
+
+    def __init__(self, capacity: int = 64 * 2**20):
+        self._capacity = capacity
+        self._shm = shared_memory.SharedMemory(create=True, size=_kHEADER_SIZE + capacity)
+        self._counters = self._shm.buf[:_kHEADER_SIZE].cast("Q")
+        self._ring = self._shm.buf[_kHEADER_SIZE:]
+        self._data = _Doorbell()  # rung by the producer
+        self._space = _Doorbell()  # rung by the consumer
+        self._owner = os.getpid()
+
+    @property
+    def capacity(self) -> int:
+        return self._capacity
+
+    def len(self) -> int:
+        return self._counters[_kHEAD] - self._counters[_kTAIL]
+
+    def __len__(self) -> int:
+        return self.len()
+
+    def free(self) -> int:
+        return self._capacity - self.len()
+
+    def closed(self) -> bool:
+        return self._counters[_kCLOSED] != 0
+
+    # ----------------SharedRing-------------------
+    def put(self, data) -> int:
+        """copy as much of data as fits into the ring, returning the count copied"""
+        # ----------------------------------------------
+        head = self._counters[_kHEAD]
+        count = min(len(data), self._capacity - (head - self._counters[_kTAIL]))
+        if count == 0:
+            return 0
+        view = memoryview(data).cast("B")
+        position = head % self._capacity
+        first = min(count, self._capacity - position)
+        self._ring[position : position + first] = view[:first]
+        if count > first:
+            self._ring[: count - first] = view[first:count]
+        self._counters[_kHEAD] = head + count  # publish only once the bytes are in place
+        self._data.ring()
+        return count
+
+    async def wait_for_space(self, timeout=None) -> None:
+        """return once the ring has room, or after timeout seconds"""
+        self._space.clear()
+        if self.free() == 0:
+            await self._space.wait(timeout)
+
+    # ----------------SharedRing-------------------
+    def peek(self, count: int, offset: int = 0) -> memoryview:
+        """a view of up to count bytes, offset bytes past the tail, stopping short at the end of the ring
+
+        the producer may overwrite the bytes once they are advanced past, so they must not be
+        read afterwards, and every view must be let go of before the ring is released
+        """
+        # ----------------------------------------------
+        tail = self._counters[_kTAIL] + offset
+        position = tail % self._capacity
+        count = min(count, self._counters[_kHEAD] - tail, self._capacity - position)
+        return self._ring[position : position + count]
+
+    def advance(self, count: int) -> None:
+        """take count bytes, making room for the producer"""
+        self._counters[_kTAIL] += count
+        self._space.ring()
+
+    async def wait_for_data(self, timeout=None) -> None:
+        """return once bytes are held or the ring is closed, or after timeout seconds"""
+        self._data.clear()
+        if self.len() == 0 and not self.closed():
+            await self._data.wait(timeout)
+
+    # ----------------SharedRing-------------------
+    def close(self) -> None:
+        """tell the consumer no more bytes will be put"""
+        # ----------------------------------------------
+        self._counters[_kCLOSED] = 1
+        self._data.ring()
+
+    def release(self) -> None:
+        """unmap the ring, removing it once the process that created it lets go"""
+        if self._shm is None:
+            return
+        self._counters.release()
+        self._ring.release()
+        self._shm.close()
+        if os.getpid() == self._owner:
+            self._shm.unlink()
+            self._data.close()
+            self._space.close()
+        self._shm = None
+
+    def __del__(self):
+        try:
+            self.release()
+        except Exception:
+            pass
+
+
+class SharedCounters:
+    """named u64 counters in shared memory, set by one process and read by others
+
+    each counter is a single aligned 8 byte word, so a read never sees half of a store.
+    counters are stored one at a time, so a snapshot may mix values from before and after
+    a publication, each of them valid on its own
+
+    methods:
+        set(**values): store counters by name
+        get(name): a counter's value
+        snapshot(): every counter as a dict
+    """
+
+    def __init__(self, fields):
+        self._fields = {name: index for index, name in enumerate(fields)}
+        self._shm = shared_memory.SharedMemory(create=True, size=8 * max(1, len(self._fields)))
+        self._values = self._shm.buf.cast("Q")
+        self._owner = os.getpid()
+
+    def set(self, **values) -> None:
+        for name, value in values.items():
+            self._values[self._fields[name]] = value
+
+    def get(self, name: str) -> int:
+        return self._values[self._fields[name]]
+
+    def snapshot(self) -> dict:
+        return {name: self._values[index] for name, index in self._fields.items()}
+
+    def release(self) -> None:
+        """unmap the counters, removing them once the process that created them lets go"""
+        if self._shm is None:
+            return
+        self._values.release()
+        self._shm.close()
+        if os.getpid() == self._owner:
+            self._shm.unlink()
+        self._shm = None
+
+    def __del__(self):
+        try:
+            self.release()
+        except Exception:
+            pass
@@ -0,0 +1,254 @@
+# socket_server
+# author: krunch3r (KJM github.com/krunch3r76)
+# license: General Poetic License (GPL3)
+
+"""
+serves entropy to many clients over a unix domain socket, alongside the named pipe
+
+readers of the named pipe race each other for whatever it holds. clients of the socket
+instead ask for a count of bytes and are answered with at most that count, each byte
+going to exactly one client, and the server accounts for what every connection took.
+
+protocol (integers are unsigned 32 bit little endian):
+    request: count            ask for count bytes, 1 <= count <= MAX_REQUEST
+    reply:   answered, bytes  1 <= answered <= count followed by that many bytes
+
+a request is answered as soon as anything is pooled, with as much of it as the pool
+holds, since the pool may never be filled past what a request asks for (a MultiPipeWriter
+tops it up only to its target fill). the client asks again for the rest. requests may be
+pipelined and are answered in the order sent. a request outside the bounds closes the
+connection. readers/socket_reader.py is a matching client.
+
+EntropySocketServer offers the interface of PipeWriter used by the TaskResultWriter and
+MultiPipeWriter, so the same books that feed the named pipe feed the socket: bytes
+written are pooled, as views, until requested. pending requests are answered round
+robin, one per connection per pass, and all the replies a connection is due in a pass
+go out in one batch. a connection whose client has not read its earlier replies (more
+than _kMAX_UNREAD bytes waiting in its transport) is passed over until it catches up
+"""
+
+import asyncio
+import collections
+import os
+import struct
+import time
+
+from .pipe_writer import ViewChunk, ViewChunkDeque
+
+MAX_REQUEST = 16 * 2**20  # most bytes a single request may ask for
+_kHEADER = struct.Struct("<I")
+_kMAX_UNREAD = 4 * 2**20  # bytes a client may leave unread before it is passed over
+
+
+class _Connection:
+    """a client's pending requests and accounting"""
+
+    def __init__(self, writer: asyncio.StreamWriter):
+        self.writer = writer
+        self.pending = collections.deque()  # counts requested, oldest first
+        self.connected = time.monotonic()
+        self.requests = 0
+        self.bytes_served = 0
+        self.resuming = None  # task waiting for the client to read its replies
+
+
+class EntropySocketServer:
+    """answers requests for bytes on a unix domain socket from a pool of written books
+
+    methods:
+        write(data), write_many(buffers): pool bytes for the clients
+        refresh(): start listening once the event loop is running
+        get_client_stats(): per connection requests, bytes served and backlog
+        close(): stop listening and disconnect the clients
+    """
+
+    def __init__(self, socketFilePathString: str = "/tmp/pilferedbits.sock"):
+        self._path = socketFilePathString
+        self._server = None
+        self._pool = ViewChunkDeque()  # bytes written and not yet served
+        self._connections = collections.OrderedDict()  # writer -> _Connection, serving order
+        self._watchers = set()  # callbacks waiting for a client to take bytes
+        self._total_bytes_to_clients = 0
+        self._total_bytes_received = 0
+
+    # ---------------EntropySocketServer------------------
+    async def _listen(self) -> None:
+        """bind the socket, replacing a stale one left by an earlier run"""
+        # -----------------------------------------------------
+        if self._server is not None:
+            return
+        if os.path.exists(self._path):
+            os.unlink(self._path)
+        self._server = await asyncio.start_unix_server(self._on_client, self._path)
+
+    async def _on_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """read a client's requests until it disconnects"""
+        connection = _Connection(writer)
+        writer.transport.set_write_buffer_limits(high=_kMAX_UNREAD)
+        self._connections[writer] = connection
+        received = bytearray()  # requests read, the last possibly in part
+        try:
+            while True:
+                data = await reader.read(65536)  # every request already received in one go
+                if not data:
+                    return
+                received += data
+                whole = len(received) // _kHEADER.size * _kHEADER.size
+                for (count,) in _kHEADER.iter_unpack(received[:whole]):
+                    if not 1 <= count <= MAX_REQUEST:
+                        return
+                    connection.pending.append(count)
+                    connection.requests += 1
+                del received[:whole]
+                self._serve()
+        except ConnectionError:
+            pass
+        finally:
+            del self._connections[writer]
+            writer.close()
+
+    # ---------------EntropySocketServer------------------
+    def _serve(self) -> None:
+        """answer pending requests round robin, in part when the pool runs short, until it is empty"""
+        # -----------------------------------------------------
+        batches = collections.defaultdict(list)
+        served = 0
+        progress = True
+        while progress:
+            progress = False
+            for connection in self._connections.values():
+                if len(connection.pending) == 0 or self._pool.len() == 0:
+                    continue
+                if connection.writer.transport.get_write_buffer_size() > _kMAX_UNREAD:
+                    # the client is behind, the others go first until it has caught up
+                    if connection.resuming is None:
+                        connection.resuming = asyncio.ensure_future(self._resume(connection))
+                    continue
+                count = min(connection.pending.popleft(), self._pool.len())
+                # the views go to the transport, which copies what it cannot send at once
+                batches[connection].append(_kHEADER.pack(count))
+                batches[connection].extend(self._pool.take(count))
+                connection.bytes_served += count
+                served += count
+                progress = True
+        for connection, batch in batches.items():
+            connection.writer.writelines(batch)
+        if served > 0:
+            self._total_bytes_to_clients += served
+            watchers, self._watchers = self._watchers, set()
+            for callback in watchers:
+                callback()
+
+    async def _resume(self, connection: _Connection) -> None:
+        """serve a client passed over once it has read its earlier replies"""
+        try:
+            await connection.writer.drain()
+        except ConnectionError:
+            return
+        finally:
+            connection.resuming = None
+        self._serve()
+
+    # ---------------EntropySocketServer------------------
+    async def write(self, data) -> int:
+        """pool data for the clients, see write_many"""
+        return await self.write_many([data] if data else [])
+
+    async def write_many(self, buffers) -> int:
+        """pool views of the buffers, which must not be modified afterwards, and serve them"""
+        # -----------------------------------------------------
+        await self._listen()
+        queued = 0
+        for buffer in buffers:
+            view = memoryview(buffer).cast("B")
+            if len(view) > 0:
+                self._pool.append(ViewChunk(view))
+                queued += len(view)
+        self._total_bytes_received += queued
+        self._serve()
+        return queued
+
+    def splice_from(self, fd: int, offset: int, count: int) -> int:
+        """pool up to count bytes at offset of the file fd, for the Passthrough writer
+
+        sockets cannot be spliced into per request, so the bytes are read into the pool
+        """
+        if count <= 0 or self._server is None:
+            return 0
+        data = os.pread(fd, count, offset)
+        if len(data) > 0:
+            self._pool.append(ViewChunk(memoryview(data)))
+            self._total_bytes_received += len(data)
+            self._serve()
+        return len(data)
+
+    async def refresh(self) -> None:
+        await self._listen()
+        self._serve()  # clients that caught up with their replies
+
+    def when_writable(self, callback) -> bool:
+        """call callback once a client has taken bytes, see PipeWriter.when_writable"""
+        if self._server is None:
+            return False
+        self._watchers.add(callback)
+        return True
+
+    # ---------------EntropySocketServer------------------
+    def len_accessible(self) -> int:
+        """bytes pooled, ready to be requested"""
+        # -----------------------------------------------------
+        return self._pool.len()
+
+    def _count_bytes_in_internal_buffers(self) -> int:
+        return 0  # nothing waits on the clients' side, the pool is what they read from
+
+    def len_total_buffered(self) -> int:
+        return self.len_accessible()
+
+    def _count_bytes_consumed(self) -> int:
+        """bytes served to clients"""
+        return self._total_bytes_to_clients
+
+    def get_data_flow_stats(self) -> dict:
+        """bytes pooled and served, see PipeWriter.get_data_flow_stats"""
+        return {
+            "total_received": self._total_bytes_received,
+            "total_rejected": 0,
+            "total_to_pipe": self._total_bytes_to_clients,
+        }
+
+    def len(self) -> int:
+        return self.len_total_buffered()
+
+    def __len__(self) -> int:
+        return self.len()
+
+    def get_client_stats(self) -> list:
+        """per connection: seconds connected, requests, bytes served, bytes requested and pending"""
+        now = time.monotonic()
+        return [
+            {
+                "connected": now - connection.connected,
+                "requests": connection.requests,
+                "bytes_served": connection.bytes_served,
+                "bytes_pending": sum(connection.pending),
+            }
+            for connection in self._connections.values()
+        ]
+
+    def close(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            self._server = None
+            for writer in list(self._connections):
+                writer.close()
+            try:
+                os.unlink(self._path)
+            except OSError:
+                pass
+
+    def __del__(self) -> None:
+        try:
+            self.close()
+        except Exception:
+            pass
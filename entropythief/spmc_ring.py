@@ -0,0 +1,157 @@
+# spmc_ring
+# author: krunch3r (KJM github.com/krunch3r76)
+# license: General Poetic License (GPL3)
+
+"""
+publishes entropy into a memory mapped ring in /dev/shm that any number of reader
+processes take from, without a system call per byte range as the named pipe needs
+
+layout of the file (integers are little endian u64s):
+    [0, 8)                 magic
+    [8, 16)                capacity
+    [64, 72)               head: every byte ever published (written by the writer only)
+    [128, 136)             tail: every byte ever taken (written by readers, under the lock)
+    [4096, 4096+capacity)  ring of entropy bytes
+
+the writer copies bytes into the ring and then advances head; it never writes past
+tail + capacity. a reader claims the next range by advancing tail while holding an
+fcntl lock on the tail's bytes, so concurrent readers always take disjoint ranges (the
+lock stands in for the compare-and-swap python lacks, and is uncontended unless two
+readers claim at the same instant). a reader copies its range out before advancing
+tail, so the writer cannot overwrite a range still being copied.
+
+readers/pipe_reader.py provides ShmRingReader, with the read(count) of PipeReader
+"""
+
+import os
+import mmap
+import struct
+
+from .pipe_writer import ViewChunk, ViewChunkDeque
+
+MAGIC = b"ETSPMC01"
+HEADER_SIZE = 4096
+HEAD_OFFSET = 64
+TAIL_OFFSET = 128
+
+
+class ShmRingWriter:
+    """writes books into a ring in /dev/shm for ShmRingReader, offering PipeWriter's interface
+
+    bytes the ring has no room for wait, as views, until readers make room
+    """
+
+    def __init__(self, filePathString: str = "/dev/shm/pilferedbits", capacity: int = 64 * 2**20):
+        self._path = filePathString
+        self._capacity = capacity
+        self._pending = ViewChunkDeque()  # written but not yet published
+        self._total_bytes_to_ring = 0
+        self._total_bytes_received = 0
+        fd = os.open(filePathString, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            os.ftruncate(fd, HEADER_SIZE + capacity)
+            self._map = mmap.mmap(fd, HEADER_SIZE + capacity)
+        finally:
+            os.close(fd)
+        self._counters = memoryview(self._map)[:HEADER_SIZE].cast("Q")
+        self._ring = memoryview(self._map)[HEADER_SIZE:]
+        # a fresh ring, whatever an earlier run left (readers see head == tail meanwhile)
+        self._counters[HEAD_OFFSET // 8] = 0
+        self._counters[TAIL_OFFSET // 8] = 0
+        struct.pack_into("<8sQ", self._map, 0, MAGIC, capacity)
+
+    def _held(self) -> int:
+        return self._counters[HEAD_OFFSET // 8] - self._counters[TAIL_OFFSET // 8]
+
+    # ---------------ShmRingWriter------------------
+    def _publish(self) -> int:
+        """copy pending bytes into the free part of the ring then advance head past them"""
+        # -----------------------------------------------
+        head = self._counters[HEAD_OFFSET // 8]
+        free = self._capacity - (head - self._counters[TAIL_OFFSET // 8])
+        count = 0
+        for view in self._pending.take(min(free, self._pending.len())):
+            position = (head + count) % self._capacity
+            first = min(len(view), self._capacity - position)
+            self._ring[position : position + first] = view[:first]
+            if len(view) > first:
+                self._ring[: len(view) - first] = view[first:]
+            count += len(view)
+        if count > 0:
+            self._counters[HEAD_OFFSET // 8] = head + count  # only once the bytes are in place
+            self._total_bytes_to_ring += count
+        return count
+
+    async def write(self, data) -> int:
+        return await self.write_many([data] if data else [])
+
+    async def write_many(self, buffers) -> int:
+        """queue views of the buffers, which must not be modified afterwards, and publish"""
+        queued = 0
+        for buffer in buffers:
+            view = memoryview(buffer).cast("B")
+            if len(view) > 0:
+                self._pending.append(ViewChunk(view))
+                queued += len(view)
+        self._total_bytes_received += queued
+        self._publish()
+        return queued
+
+    def splice_from(self, fd: int, offset: int, count: int) -> int:
+        """read up to count bytes at offset of the file fd straight into the ring"""
+        if self._pending.len() > 0 or count <= 0:
+            return 0  # bytes written earlier go first
+        head = self._counters[HEAD_OFFSET // 8]
+        position = head % self._capacity
+        count = min(count, self._capacity - self._held(), self._capacity - position)
+        if count == 0:
+            return 0
+        moved = os.preadv(fd, [self._ring[position : position + count]], offset)
+        self._counters[HEAD_OFFSET // 8] = head + moved
+        self._total_bytes_to_ring += moved
+        self._total_bytes_received += moved
+        return moved
+
+    async def refresh(self) -> None:
+        self._publish()
+
+    def when_writable(self, callback) -> bool:
+        return False  # readers make room without telling anyone, so the ring is polled
+
+    # ---------------ShmRingWriter------------------
+    def len_accessible(self) -> int:
+        """bytes in the ring, ready for readers"""
+        # -----------------------------------------------
+        return self._held()
+
+    def _count_bytes_in_internal_buffers(self) -> int:
+        return self._pending.len()
+
+    def len_total_buffered(self) -> int:
+        return self.len_accessible() + self._count_bytes_in_internal_buffers()
+
+    def _count_bytes_consumed(self) -> int:
+        """bytes readers have taken from the ring"""
+        return self._counters[TAIL_OFFSET // 8]
+
+    def get_data_flow_stats(self) -> dict:
+        """bytes written and published, see PipeWriter.get_data_flow_stats"""
+        return {
+            "total_received": self._total_bytes_received,
+            "total_rejected": 0,
+            "total_to_pipe": self._total_bytes_to_ring,
+        }
+
+    def len(self) -> int:
+        return self.len_total_buffered()
+
+    def __len__(self) -> int:
+        return self.len()
+
+    def __del__(self) -> None:
+        try:
+            self._counters.release()
+            self._ring.release()
+            self._map.close()
+        except Exception:
+            pass
@@ -0,0 +1,136 @@
+# staging
+# author: krunch3r (KJM github.com/krunch3r76)
+# license: General Poetic License (GPL3)
+
+"""
+decides where task results are downloaded to before the Interleaver consumes them
+
+results are read within seconds of landing and then unlinked, so when the temporary
+directory is on disk every byte is written and read back for nothing. a StagingArea
+places results in a memory backed directory (e.g. /dev/shm) instead, up to a quota of
+bytes or the space the directory has free, whichever is less, spilling anything past it
+to the temporary directory as before.
+
+a path handed out is reserved at the size requested until it has landed, then counted
+at its size on disk until whoever consumed it reports the file unlinked (released)
+"""
+
+import errno
+import os
+from pathlib import Path
+from tempfile import gettempdir
+from typing import Optional
+from uuid import uuid4
+
+
+class StagingArea:
+    """hands out download paths within a quota of a staging directory
+
+    methods:
+        path_for(byte_count): a path to download a result of byte_count bytes to
+        spill_path(): a path in the temporary directory, e.g. to download again to
+        is_staged(path): whether path is in the staging directory
+        landed(path): the download to path completed
+        discard(path): the download to path was abandoned
+        released(path): the file at path was unlinked once consumed
+        stats(): occupancy of the staging directory and counts of staged and spilled results
+    """
+
+    def __init__(self, directory: Optional[str] = None, quota: int = 0):
+        """
+        in:
+            directory: staging directory, None stages nothing and downloads to the temporary
+                       directory as before
+            quota: most bytes held in the staging directory at once
+        """
+        self._directory = Path(directory) if directory else None
+        self._quota = quota if directory else 0
+        if self._directory is not None:
+            self._directory.mkdir(parents=True, exist_ok=True)
+        self._reserved = {}  # path still downloading -> bytes reserved
+        self._landed = {}  # path downloaded and not yet consumed -> bytes on disk
+        self._staged = 0  # results placed in the staging directory
+        self._spilled = 0  # results that did not fit the quota
+
+    # ----------------StagingArea-------------------
+    def _occupied(self) -> int:
+        """bytes held or reserved in the staging directory"""
+        # ----------------------------------------------
+        return sum(self._reserved.values()) + sum(self._landed.values())
+
+    def _free(self) -> int:
+        """bytes the staging directory's filesystem has free, less what is reserved but not yet landed"""
+        try:
+            vfs = os.statvfs(self._directory)
+        except OSError:
+            return 0
+        return vfs.f_bavail * vfs.f_frsize - sum(self._reserved.values())
+
+    # ----------------StagingArea-------------------
+    def path_for(self, byte_count: int) -> str:
+        """a path for a result of byte_count bytes, staged when it fits the quota and the free space"""
+        # ----------------------------------------------
+        if self._directory is None:
+            return str(Path(gettempdir()) / str(uuid4()))
+        if self._occupied() + byte_count > self._quota or byte_count > self._free():
+            return self.spill_path()
+        path = str(self._directory / str(uuid4()))
+        self._reserved[path] = byte_count
+        self._staged += 1
+        return path
+
+    def spill_path(self) -> str:
+        """a path in the temporary directory, counted as spilled"""
+        self._spilled += 1
+        return str(Path(gettempdir()) / str(uuid4()))
+
+    def is_staged(self, path: str) -> bool:
+        return path in self._reserved or path in self._landed
+
+    def landed(self, path: str) -> None:
+        """counts a staged download at its size on disk from now until it is released"""
+        if self._reserved.pop(path, None) is not None:
+            self._landed[path] = os.path.getsize(path)
+
+    def discard(self, path: str) -> None:
+        """releases the reservation of a staged download that did not complete"""
+        self._reserved.pop(path, None)
+
+    def released(self, path: str) -> None:
+        """stops counting a landed file, which whoever consumed it has unlinked"""
+        self._landed.pop(path, None)
+
+    # ----------------StagingArea-------------------
+    def stats(self):
+        """report how full the staging directory is and how often results spilled past it
+
+        out: dict of
+            directory: the staging directory or None
+            quota: most bytes staged at once
+            occupied: bytes currently held or reserved
+            files: results currently held or downloading
+            staged: results placed in the staging directory so far
+            spilled: results downloaded to the temporary directory because the quota (or the
+                     staging directory) was full
+        """
+        # ----------------------------------------------
+        occupied = self._occupied()
+        return {
+            "directory": str(self._directory) if self._directory else None,
+            "quota": self._quota,
+            "occupied": occupied,
+            "files": len(self._reserved) + len(self._landed),
+            "staged": self._staged,
+            "spilled": self._spilled,
+        }
+
+
+def is_out_of_space(e: BaseException) -> bool:
+    """whether e, or an exception it was raised from, is a filesystem running out of space"""
+    seen = set()
+    while e is not None and id(e) not in seen:
+        if isinstance(e, OSError) and e.errno == errno.ENOSPC:
+            return True
+        seen.add(id(e))
+        e = e.__cause__ or e.__context__
+    return False
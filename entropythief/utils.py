@@ -24,6 +24,22 @@ TEXT_COLOR_DEFAULT = "\033[0m"
 colorama.init()
 
 
+def _pipe_size(value: str):
+    """--pipe-size: adaptive, max or a positive number of bytes"""
+    if value in ("adaptive", "max"):
+        return value
+    if not value.isdigit() or int(value) == 0:
+        raise argparse.ArgumentTypeError(f"expected adaptive, max or a number of bytes, got {value}")
+    return int(value)
+
+
+def _stream_min_results(value: str):
+    """--stream-min-results: 0, or at least the two results a group needs to be interleaved"""
+    if not value.isdigit() or int(value) == 1:
+        raise argparse.ArgumentTypeError(f"expected 0 or a count of at least 2, got {value}")
+    return int(value)
+
+
 def build_parser(description: str):
     current_time_str = datetime.now(tz=timezone.utc).strftime("%Y%m%d_%H%M%S%z")
     default_log_path = "entropythief-yapapi.log"
@@ -65,6 +81,125 @@ def build_parser(description: str):
         action="store_true",
         help="do not stream bytes to console - prevents backlog in memory",
     )
+    parser.add_argument(
+        "--read-workers",
+        type=int,
+        default=2,
+        help="read results in this many threads, reading ahead the next page of each (0 reads on the event loop); default: \033[1m%(default)s\033[0m",
+    )
+    parser.add_argument(
+        "--mix-workers",
+        type=int,
+        default=0,
+        help="interleave results in this many worker processes instead of the event loop (0 disables); default: \033[1m%(default)s\033[0m",
+    )
+    parser.add_argument(
+        "--writer",
+        choices=["interleave", "passthrough"],
+        default="interleave",
+        help="interleave results across providers, or pass them through unmixed by splicing each file into the pipe; default: \033[1m%(default)s\033[0m",
+    )
+    parser.add_argument(
+        "--flush",
+        choices=["writev", "vmsplice"],
+        default="writev",
+        help="write books into the pipe from where they lie with writev, or copy them into page aligned buffers mapped into the pipe with vmsplice (Linux); default: \033[1m%(default)s\033[0m",
+    )
+    parser.add_argument(
+        "--pipe",
+        action="append",
+        metavar="PATH[:TARGET_MIB[:WEIGHT]]",
+        help="write to this consumer's named pipe instead of /tmp/pilferedbits, keeping TARGET_MIB (default 4) ready in it; repeat for several consumers, which share the stream in proportion to WEIGHT (default 1)",
+    )
+    parser.add_argument(
+        "--pipe-size",
+        default="adaptive",
+        type=_pipe_size,
+        metavar="{adaptive,max,BYTES}",
+        help="capacity of each named pipe: adapted to the bursts its readers take and their drain rate, /proc/sys/fs/pipe-max-size, or a number of bytes; default: \033[1m%(default)s\033[0m",
+    )
+    parser.add_argument(
+        "--shards",
+        type=int,
+        default=1,
+        metavar="K",
+        help="write each named pipe as a ring of K named pipes, PATH.0 .. PATH.K-1, handed the stream round robin and read together with readers/pipe_reader.py's PipeReader(shards=K); default: \033[1m%(default)s\033[0m",
+    )
+    parser.add_argument(
+        "--metrics",
+        metavar="ADDRESS",
+        help="serve metrics in the Prometheus text format over http on [HOST]:PORT (HOST defaults to 127.0.0.1) or on a unix domain socket PATH, e.g. 9464 or /tmp/entropythief.metrics.sock",
+    )
+    parser.add_argument(
+        "--socket",
+        action="append",
+        metavar="PATH[:TARGET_MIB[:WEIGHT]]",
+        help="also serve entropy on this unix domain socket, keeping TARGET_MIB (default 4) ready for its clients, who ask for bytes with readers/socket_reader.py; shares the stream with the named pipe(s) in proportion to WEIGHT (default 1)",
+    )
+    parser.add_argument(
+        "--shm",
+        action="append",
+        metavar="PATH[:MIB[:WEIGHT]]",
+        help="also publish entropy into a ring of MIB (default 4) in shared memory, e.g. /dev/shm/pilferedbits, which any number of processes read with readers/pipe_reader.py's ShmRingReader; shares the stream with the named pipe(s) in proportion to WEIGHT (default 1)",
+    )
+    parser.add_argument(
+        "--interleave-granularity",
+        choices=["bit", "byte", "word", "line", "block"],
+        default="byte",
+        help="unit alternated across providers: bit (requires numpy), byte, word (8 bytes), line (64 bytes) or block (4 KiB); default: \033[1m%(default)s\033[0m",
+    )
+    parser.add_argument(
+        "--group-policy",
+        choices=["fifo", "largest", "oldest"],
+        default="fifo",
+        help="order in which groups of results are interleaved; default: \033[1m%(default)s\033[0m",
+    )
+    parser.add_argument(
+        "--stream-min-results",
+        type=_stream_min_results,
+        default=0,
+        help="start interleaving once this many (at least 2) results of a round have arrived (0 waits for the whole round); default: \033[1m%(default)s\033[0m",
+    )
+    parser.add_argument(
+        "--extractor",
+        choices=["none", "toeplitz", "xorfold"],
+        default="none",
+        help="randomness extractor applied to interleaved output; default: \033[1m%(default)s\033[0m",
+    )
+    parser.add_argument(
+        "--extractor-ratio",
+        type=float,
+        default=None,
+        help="extractor output/input ratio (toeplitz default 0.5, xorfold default 1/number of providers in the group)",
+    )
+    parser.add_argument(
+        "--extractor-seed",
+        type=int,
+        default=0,
+        help="seed of the toeplitz matrix; default: \033[1m%(default)s\033[0m",
+    )
+    parser.add_argument(
+        "--staging-dir",
+        default=None,
+        help="download results to this (memory backed) directory, e.g. /dev/shm/entropythief, instead of the temporary directory",
+    )
+    parser.add_argument(
+        "--staging-mib",
+        type=int,
+        default=64,
+        help="most MiB of results held in the staging directory, the rest spill to the temporary directory; default: \033[1m%(default)s\033[0m",
+    )
+    parser.add_argument(
+        "--reservoir-mib",
+        type=int,
+        default=0,
+        help="keep up to this many MiB of entropy in a persistent reservoir file that tops off the pipe on the next launch (0 disables); default: \033[1m%(default)s\033[0m",
+    )
+    parser.add_argument(
+        "--reservoir-path",
+        default="entropythief.reservoir",
+        help="reservoir file; default: \033[2m%(default)s\033[0m",
+    )
     return parser
 
 
@@ -352,6 +352,7 @@ class View:
         count_workers,
         bytesInPipe,
         whether_paused,
+        flow=None,
     ):
         # update status line
 
@@ -392,6 +393,17 @@ class View:
                 + locale.format_string("%d", ENTROPY_BUFFER_CAPACITY, grouping=True),
             )
         )
+        if flow and flow["drain_rate"] >= 1:
+            # how fast readers drain the buffer and how long it lasts without new results
+            empty_in = flow["time_to_empty_unfed"]
+            msg.append(
+                (
+                    "  drain:"
+                    + locale.format_string("%.2f", flow["drain_rate"] / 2**20, grouping=True)
+                    + "MiB/s"
+                    + ("  empty:{:.0f}s".format(empty_in) if empty_in < 3600 else ""),
+                )
+            )
 
         length_of_status_msg = functools.reduce(
             lambda a, b: a + b, [len(e[0]) for e in msg]
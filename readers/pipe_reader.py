@@ -9,6 +9,8 @@ import select
 import sys
 import io
 import threading
+import mmap
+import struct
 
 import sys
 import os
@@ -35,6 +37,10 @@ class _PipeReader:
     recreates pipe if needed (note, if another user runs this it will
     require changing permissions so entropythief can write to it) REVIEW
 
+    when entropythief shards its output (see --shards), the reader reads the ring of
+    named pipes PATH.0 .. PATH.K-1 together, polling them all and reading whichever
+    hold bytes
+
     methods:
         read(count): return count number of bytes as type bytes
     """
@@ -42,16 +48,33 @@ class _PipeReader:
     _F_SETPIPE_SZ = 1031  # opcode for fnctl to setpipe size
 
     # --------------------------------------
-    def __init__(self):
+    def __init__(self, namedPipeFilePathString=None, shards=None, pipe_size=None):
         # --------------------------------------
         """set up interface to pipe, open, and populate attributes
 
-        post:
-            _fdPipe : file descriptor to opened named pipe
+        in:
+            namedPipeFilePathString: the consumer's named pipe when entropythief writes to
+                several (see --pipe), by default self._kNamedPipeFilePathString
+            shards: the number of named pipes entropythief shards the path into (see
+                --shards), None when it writes to the path itself
+            pipe_size: bytes the pipes are sized to, None to leave the size to entropythief,
+                which adapts it to how fast and in what bursts they are read (see --pipe-size)
 
-        notes: the named pipe open is the constant self._kNamedPipeFilePathString
+        post:
+            _fdPipes : file descriptors to the opened named pipes
+            _fdPipe : the first of them
         """
+        if namedPipeFilePathString is not None:
+            self._kNamedPipeFilePathString = namedPipeFilePathString
+        if shards:
+            self._paths = [f"{self._kNamedPipeFilePathString}.{index}" for index in range(shards)]
+        else:
+            self._paths = [self._kNamedPipeFilePathString]
+        self._fdPipes = []
         self._fdPipe = None
+        self._poller = None
+        self._turn = 0  # index of the pipe read first next time, so each is drained in turn
+        self._pipe_size = pipe_size
         self._lock = threading.Lock()  # Thread safety for file descriptor operations
         self._open_pipe()
 
@@ -63,18 +86,23 @@ class _PipeReader:
         in: none
         out: none
         post:
-            _fdPipe : descriptor to current or newly created named pipe
+            _fdPipes : descriptors to current or newly created named pipes
+            _poller : polls _fdPipes for bytes to read
 
             notes:
-            named pipe created if needed and pipe size set to 1mb
+            named pipes created if needed, and sized if _pipe_size is set
         """
         _log_msg("opening pipe", 5)
-        if not os.path.exists(self._kNamedPipeFilePathString):
-            os.mkfifo(self._kNamedPipeFilePathString)
-        self._fdPipe = os.open(
-            self._kNamedPipeFilePathString, os.O_RDONLY | os.O_NONBLOCK
-        )
-        fcntl.fcntl(self._fdPipe, self._F_SETPIPE_SZ, 2**20)
+        self._poller = select.poll()
+        for path in self._paths:
+            if not os.path.exists(path):
+                os.mkfifo(path)
+            fd = os.open(path, os.O_RDONLY | os.O_NONBLOCK)
+            if self._pipe_size is not None:
+                fcntl.fcntl(fd, self._F_SETPIPE_SZ, self._pipe_size)
+            self._fdPipes.append(fd)
+            self._poller.register(fd, select.POLLIN)
+        self._fdPipe = self._fdPipes[0]
         _log_msg("opened pipe", 5)
 
     # ........................................
@@ -84,14 +112,15 @@ class _PipeReader:
         pre: none
         in: none
         out: none
-        post: _fdPipe (None if failed to open)
+        post: _fdPipes (empty if failed to open)
         """
-        if self._fdPipe:
+        for fd in self._fdPipes:
             try:
-                os.close(self._fdPipe)
+                os.close(fd)
             except OSError:
                 pass
-            self._fdPipe = None
+        self._fdPipes = []
+        self._fdPipe = None
         self._open_pipe()
 
     def _whether_pipe_is_readable(self, timeout_ms=0) -> bool:
@@ -106,6 +135,21 @@ class _PipeReader:
         rlist, _, _ = select.select([self._fdPipe], [], [], timeout_seconds)
         return bool(rlist)
 
+    def _readable_pipes(self, timeout_ms=0) -> list:
+        """descriptors of the pipes with bytes to read (or no writer), waiting up to timeout_ms
+
+        in turn, starting with the pipe after the one read last
+        """
+        ready = {fd for fd, _ in self._poller.poll(timeout_ms)}
+        if len(ready) == 0:
+            return []
+        count = len(self._fdPipes)
+        return [
+            self._fdPipes[(self._turn + step) % count]
+            for step in range(count)
+            if self._fdPipes[(self._turn + step) % count] in ready
+        ]
+
     # continuously read pipes until read count satisfied, then return the read count
     # revision shall asynchronously read the pipe and deliver in chunks
     # -------------------------------------------
@@ -122,28 +166,33 @@ class _PipeReader:
             remainingCount = count
 
             while remainingCount > 0:
-                if not self._whether_pipe_is_readable(0):  # Pure immediate polling - max performance
-                    # FIX: Add small sleep to prevent 100% CPU usage when no entropy available
-                    time.sleep(0.001)  # 1ms yield to prevent busy-waiting
-                    continue
-                
-                try:
-                    _ba = os.read(self._fdPipe, remainingCount)
-                except BlockingIOError:
-                    _log_msg("pipe reader: BLOCKING ERROR", 5)
-                    # FIX: Also yield CPU on blocking errors
-                    time.sleep(0.001)  # 1ms yield
+                # wait up to 1ms for any pipe to hold bytes, to prevent busy-waiting
+                readable = self._readable_pipes(1)
+                if not readable:
                     continue
-                except Exception as e:
-                    _log_msg(f"Other exception: {e}", 5)
-                    # FIX: Yield CPU on other exceptions too
-                    time.sleep(0.001)  # 1ms yield
-                    continue
-                else:
+
+                ended = 0
+                for fd in readable:
+                    if remainingCount == 0:
+                        break
+                    try:
+                        _ba = os.read(fd, remainingCount)
+                    except BlockingIOError:
+                        _log_msg("pipe reader: BLOCKING ERROR", 5)
+                        continue
+                    except Exception as e:
+                        _log_msg(f"Other exception: {e}", 5)
+                        # FIX: Yield CPU on other exceptions too
+                        time.sleep(0.001)  # 1ms yield
+                        continue
                     if not _ba:
-                        break  # EOF reached
+                        ended += 1
+                        continue
                     remainingCount -= len(_ba)
                     result.extend(_ba)
+                    self._turn = (self._fdPipes.index(fd) + 1) % len(self._fdPipes)
+                if ended == len(readable):
+                    break  # EOF reached on every pipe that woke us
             return bytes(result)
 
 
@@ -158,13 +207,13 @@ class _PipeReader:
         pre: none
         in: none
         out: none
-        post: _fdPipe is closed
+        post: _fdPipes are closed
         """
-        try:
-            if self._fdPipe is not None:
-                os.close(self._fdPipe)
-        except Exception:
-            pass
+        for fd in getattr(self, "_fdPipes", []):
+            try:
+                os.close(fd)
+            except Exception:
+                pass
 
 
 
@@ -179,8 +228,11 @@ class PipeReader(_PipeReader):
         sourced it
     """
 
-    def __init__(self, buffer_size=None, max_read_size=None, greedy_read_size=None):
-        super().__init__()
+    def __init__(
+        self, buffer_size=None, max_read_size=None, greedy_read_size=None, namedPipeFilePathString=None,
+        shards=None, pipe_size=None,
+    ):
+        super().__init__(namedPipeFilePathString, shards, pipe_size)
         if buffer_size is None:
             self.buffer_size = 100 * 1024 * 1024  # 100MB default buffer (down from 1GB for efficiency)
         else:
@@ -287,3 +339,87 @@ class PipeReader(_PipeReader):
                 "buffer_utilization": f"{self.buffer_end - self.buffer_pos} bytes available",
                 "greedy_read_size": f"{self.greedy_read_size} bytes"
             }
+
+
+class ShmRingReader:
+    """read entropy from the ring entropythief publishes in /dev/shm (see --shm)
+
+    the ring is mapped into this process, so a read copies bytes out of shared memory
+    instead of asking the kernel for them. readers in any number of processes take
+    disjoint ranges: a range is claimed, and copied out, while holding an fcntl lock on
+    the ring's tail (see entropythief/spmc_ring.py for the layout)
+
+    methods:
+        read(count): return count number of bytes as type bytes, waiting for them
+    """
+
+    _kFilePathString = "/dev/shm/pilferedbits"
+    _kMAGIC = b"ETSPMC01"
+    _kHEADER_SIZE = 4096
+    _kHEAD_OFFSET = 64
+    _kTAIL_OFFSET = 128
+
+    def __init__(self, filePathString=None):
+        """map the ring, waiting for entropythief to create it
+
+        in:
+            filePathString: the ring entropythief publishes, by default self._kFilePathString
+        """
+        if filePathString is not None:
+            self._kFilePathString = filePathString
+        self._lock = threading.Lock()  # fcntl locks do not exclude threads of one process
+        while True:
+            try:
+                self._fd = os.open(self._kFilePathString, os.O_RDWR)
+            except FileNotFoundError:
+                time.sleep(0.01)
+                continue
+            size = os.fstat(self._fd).st_size
+            if size > self._kHEADER_SIZE:
+                self._map = mmap.mmap(self._fd, size)
+                magic, self._capacity = struct.unpack_from("<8sQ", self._map, 0)
+                if magic == self._kMAGIC and self._capacity == size - self._kHEADER_SIZE:
+                    break
+                self._map.close()
+            os.close(self._fd)
+            time.sleep(0.01)
+        self._counters = memoryview(self._map)[: self._kHEADER_SIZE].cast("Q")
+        self._ring = memoryview(self._map)[self._kHEADER_SIZE :]
+
+    def _take(self, view) -> int:
+        """copy as many bytes as are published, up to len(view), into view and claim them"""
+        with self._lock:
+            fcntl.lockf(self._fd, fcntl.LOCK_EX, 8, self._kTAIL_OFFSET)
+            try:
+                tail = self._counters[self._kTAIL_OFFSET // 8]
+                count = min(len(view), self._counters[self._kHEAD_OFFSET // 8] - tail)
+                position = tail % self._capacity
+                first = min(count, self._capacity - position)
+                view[:first] = self._ring[position : position + first]
+                view[first:count] = self._ring[: count - first]
+                self._counters[self._kTAIL_OFFSET // 8] = tail + count  # the writer may reuse it now
+            finally:
+                fcntl.lockf(self._fd, fcntl.LOCK_UN, 8, self._kTAIL_OFFSET)
+        return count
+
+    def read(self, count) -> bytes:
+        if not isinstance(count, int) or count < 0:
+            raise ValueError(f"read() count parameter must be a non-negative integer, got {type(count).__name__}: {count}")
+        result = bytearray(count)
+        view = memoryview(result)
+        position = 0
+        while position < count:
+            taken = self._take(view[position:])
+            if taken == 0:
+                time.sleep(0.001)  # 1ms yield while the ring is empty
+            position += taken
+        return bytes(result)
+
+    def __del__(self):
+        try:
+            self._counters.release()
+            self._ring.release()
+            self._map.close()
+            os.close(self._fd)
+        except Exception:
+            pass
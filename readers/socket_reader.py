@@ -0,0 +1,97 @@
+# socket_reader
+# author: krunch3r (KJM github.com/krunch3r76)
+# license: General Poetic License (GPL3)
+
+import socket
+import struct
+import threading
+
+_kHEADER = struct.Struct("<I")  # see entropythief/socket_server.py
+_kMAX_REQUEST = 16 * 2**20
+
+
+# ******************{}********************
+class SocketReader:
+    # ******************{}********************
+    """
+    ask entropythief's unix domain socket (see --socket) for entropy
+
+    unlike readers of the named pipe, each reader is answered with exactly the bytes it
+    asked for and no other client receives them
+
+    methods:
+        read(count): return count number of bytes as type bytes, waiting for them
+        get_stats(): requests made and bytes received
+    """
+
+    _kSocketFilePathString = "/tmp/pilferedbits.sock"
+
+    # --------------------------------------
+    def __init__(self, socketFilePathString=None):
+        # --------------------------------------
+        """connect to the socket
+
+        in:
+            socketFilePathString: the socket entropythief serves, by default
+                self._kSocketFilePathString
+        """
+        if socketFilePathString is not None:
+            self._kSocketFilePathString = socketFilePathString
+        self._socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self._socket.connect(self._kSocketFilePathString)
+        self._lock = threading.Lock()  # a request and its reply must not interleave with another's
+        self._total_requests = 0
+        self._total_bytes = 0
+
+    def _receive_into(self, view):
+        """fill view from the socket"""
+        received = 0
+        while received < len(view):
+            count = self._socket.recv_into(view[received:])
+            if count == 0:
+                raise ConnectionError("entropythief closed the socket")
+            received += count
+
+    # -------------------------------------------
+    def read(self, count) -> bytes:
+        # -------------------------------------------
+        """return count bytes, asking for them in requests of at most 16 MiB sent together
+
+        a request may be answered with fewer bytes than asked for, whatever entropythief had
+        ready, in which case the shortfall is asked for again until count bytes have arrived
+        """
+        if not isinstance(count, int) or count < 0:
+            raise ValueError(f"read() count parameter must be a non-negative integer, got {type(count).__name__}: {count}")
+        if count == 0:
+            return b""
+        result = bytearray(count)
+        view = memoryview(result)
+        header = bytearray(_kHEADER.size)
+        position = 0
+        with self._lock:
+            while position < count:
+                remaining = count - position
+                requests = [min(_kMAX_REQUEST, remaining - start) for start in range(0, remaining, _kMAX_REQUEST)]
+                self._socket.sendall(b"".join(_kHEADER.pack(request) for request in requests))
+                for request in requests:
+                    self._receive_into(memoryview(header))
+                    (answered,) = _kHEADER.unpack(header)
+                    if not 1 <= answered <= request:
+                        raise ConnectionError(f"asked for {request} bytes, answered with {answered}")
+                    self._receive_into(view[position : position + answered])
+                    position += answered
+                self._total_requests += len(requests)
+            self._total_bytes += count
+        return bytes(result)
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            return {"total_requests": self._total_requests, "total_bytes": self._total_bytes}
+
+    # -------------------------------------------
+    def __del__(self):
+        # -------------------------------------------
+        try:
+            self._socket.close()
+        except Exception:
+            pass